@@ -0,0 +1,326 @@
+"""
+Anti Gravity - Lesson Job API
+
+A small asynchronous HTTP service over the lesson pipeline, for integrations
+(LMS, scripts) that should not drive the Streamlit UI. Submitting a lesson
+returns a job ID at once; the render runs in a background worker pool
+(jobs.py) and progress can be polled or streamed as Server-Sent Events.
+
+Endpoints:
+    POST   /jobs               {"topic": ..., "subject": ..., "quality": ..., "priority": ..., "languages": [...]} -> 202 {"job_id": ...}
+    GET    /jobs/<id>          status and, once finished, the result
+    GET    /jobs/<id>/events   progress as text/event-stream until the job ends
+    GET    /jobs/<id>/stream.m3u8  HLS playlist of the render so far (STREAM_OUTPUT=1)
+    POST   /jobs/<id>/cancel   cancel a queued or running job
+    DELETE /jobs/<id>          same as cancel
+    GET    /healthz            liveness and job counts
+    GET    /metrics            Prometheus metrics (see metrics.py)
+
+With --queue, jobs go to the durable render queue (render_queue.py) instead
+of this process's worker pool, and render workers (render_worker.py, on this
+or other machines) lease them through:
+    POST   /queue/lease              {"worker": ..., "lease_seconds": ...} -> 200 job or 204
+    POST   /queue/<id>/heartbeat     {"worker": ..., "events": [...]} -> 200 {"cancel": bool}
+    POST   /queue/<id>/complete      {"worker": ..., "status": ..., "result": {...}, "events": [...]}
+A worker that no longer holds the lease gets 409.
+
+If API_TOKEN is set, every request except /healthz and /metrics needs
+"Authorization: Bearer <API_TOKEN>". The server binds to 127.0.0.1 unless
+--address says otherwise, and refuses a non-loopback address without API_TOKEN.
+
+Usage:
+    python api_server.py --port 8600 --workers 2
+    python api_server.py --port 8600 --queue
+"""
+
+import os
+import sys
+import json
+import argparse
+import asyncio
+import ipaddress
+
+import tornado.web
+import tornado.ioloop
+from tornado.iostream import StreamClosedError
+
+import llm
+import metrics
+import streaming
+from janitor import start_janitor
+from jobs import JobManager, JOB_WORKERS
+from render_scheduler import get_scheduler
+from render_queue import RenderQueue, QueueJobManager, QUEUE_PATH, LEASE_SECONDS, LEASE_LOST
+from warmup import start_warmup
+
+API_PORT = int(os.getenv("API_PORT", "8600"))
+API_ADDRESS = os.getenv("API_ADDRESS", "127.0.0.1")
+API_TOKEN = os.getenv("API_TOKEN", "")
+
+# How often the event stream checks for new progress events
+EVENT_POLL_SECONDS = 0.5
+# Comment line sent on quiet streams so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, manager):
+        self.manager = manager
+
+    def prepare(self):
+        if API_TOKEN and self.request.headers.get("Authorization") != f"Bearer {API_TOKEN}":
+            self.send_json(401, {"error": "Unauthorized"})
+
+    def send_json(self, status, payload):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload))
+
+    def get_body(self):
+        """The JSON object sent with the request, or None after answering 400."""
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError:
+            body = None
+        if not isinstance(body, dict):
+            self.send_json(400, {"error": "Body must be a JSON object"})
+            return None
+        return body
+
+    def get_job(self, job_id):
+        job = self.manager.get(job_id)
+        if job is None:
+            self.send_json(404, {"error": "Unknown job"})
+        return job
+
+class JobsHandler(BaseHandler):
+    def post(self):
+        params = self.get_body()
+        if params is None:
+            return
+
+        success, error, job = self.manager.submit(params)
+        if not success:
+            return self.send_json(400, {"error": error})
+        self.set_header("Location", f"/jobs/{job.id}")
+        self.send_json(202, {"job_id": job.id, "status": job.status})
+
+class JobHandler(BaseHandler):
+    def get(self, job_id):
+        job = self.get_job(job_id)
+        if job:
+            self.send_json(200, job.to_dict())
+
+    def delete(self, job_id):
+        cancel(self, job_id)
+
+class CancelHandler(BaseHandler):
+    def post(self, job_id):
+        cancel(self, job_id)
+
+def cancel(handler, job_id):
+    job = handler.get_job(job_id)
+    if job is None:
+        return
+    success, error = handler.manager.cancel(job_id)
+    if not success:
+        return handler.send_json(409, {"error": error, "status": job.status})
+    handler.send_json(202, {"job_id": job_id, "status": job.status})
+
+class EventsHandler(BaseHandler):
+    async def get(self, job_id):
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+
+        # Resume from the last event a reconnecting client saw
+        last_id = self.request.headers.get("Last-Event-ID")
+        index = int(last_id) + 1 if last_id and last_id.isdigit() else 0
+        quiet = 0.0
+        try:
+            while True:
+                finished = job.finished
+                for event in job.events_since(index):
+                    self.write(f"id: {event['index']}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n")
+                    index = event["index"] + 1
+                    quiet = 0.0
+                if finished:
+                    self.write(f"event: done\ndata: {json.dumps(job.to_dict())}\n\n")
+                    await self.flush()
+                    break
+                if quiet >= KEEPALIVE_SECONDS:
+                    self.write(": keepalive\n\n")
+                    quiet = 0.0
+                await self.flush()
+                await asyncio.sleep(EVENT_POLL_SECONDS)
+                quiet += EVENT_POLL_SECONDS
+        except StreamClosedError:
+            # Client went away; the job keeps running
+            return
+        self.finish()
+
+class StreamHandler(BaseHandler):
+    def get(self, job_id):
+        job = self.get_job(job_id)
+        if job is None:
+            return
+        finished = job.finished
+        messages = [event["message"] for event in job.events_since(0) if event["kind"] == "segment"]
+        if not messages:
+            return self.send_json(404, {"error": "No stream segments yet", "status": job.status})
+        self.set_header("Content-Type", "application/vnd.apple.mpegurl")
+        self.set_header("Cache-Control", "no-cache")
+        self.finish(streaming.playlist(messages, ended=finished))
+
+class HealthHandler(BaseHandler):
+    def prepare(self):
+        pass
+
+    def get(self):
+        self.send_json(200, {"status": "ok", "jobs": self.manager.stats(), "renders": get_scheduler().stats(), "llm": llm.metrics()})
+
+class MetricsHandler(BaseHandler):
+    def prepare(self):
+        pass
+
+    def get(self):
+        self.set_header("Content-Type", metrics.CONTENT_TYPE)
+        self.finish(metrics.render())
+
+class WorkerHandler(BaseHandler):
+    """Base for the render worker endpoints; the body must name the worker."""
+
+    def get_worker_body(self):
+        body = self.get_body()
+        if body is None:
+            return None
+        if not isinstance(body.get("worker"), str) or not body["worker"]:
+            self.send_json(400, {"error": "worker is required"})
+            return None
+        events = body.get("events") or []
+        if not isinstance(events, list) or not all(
+            isinstance(event, dict) and isinstance(event.get("kind"), str) and isinstance(event.get("message"), str)
+            for event in events
+        ):
+            self.send_json(400, {"error": "events must be a list of {kind, message} objects"})
+            return None
+        body["events"] = events
+        return body
+
+class LeaseHandler(WorkerHandler):
+    def post(self):
+        body = self.get_worker_body()
+        if body is None:
+            return
+        try:
+            lease_seconds = float(body.get("lease_seconds") or LEASE_SECONDS)
+        except (TypeError, ValueError):
+            lease_seconds = None
+        if lease_seconds is None or not 0 < lease_seconds < float("inf"):
+            return self.send_json(400, {"error": "lease_seconds must be a positive number"})
+        task = self.manager.queue.lease(body["worker"], lease_seconds)
+        if task is None:
+            self.set_status(204)
+            return self.finish()
+        self.send_json(200, task)
+
+class HeartbeatHandler(WorkerHandler):
+    def post(self, task_id):
+        body = self.get_worker_body()
+        if body is None:
+            return
+        success, error, cancel = self.manager.queue.heartbeat(task_id, body["worker"], body["events"])
+        if not success:
+            return self.send_json(409, {"error": error})
+        self.send_json(200, {"cancel": cancel})
+
+class CompleteHandler(WorkerHandler):
+    def post(self, task_id):
+        body = self.get_worker_body()
+        if body is None:
+            return
+        if not isinstance(body.get("result"), dict):
+            return self.send_json(400, {"error": "result is required"})
+        success, error = self.manager.queue.complete(task_id, body["worker"], body.get("status"), body["result"], body["events"])
+        if not success:
+            return self.send_json(409 if error == LEASE_LOST else 400, {"error": error})
+        self.send_json(200, {"job_id": task_id, "status": body["status"]})
+
+def make_app(manager):
+    def collect_jobs():
+        report = manager.stats()
+        families = [(
+            "antigravity_jobs", "gauge", "Jobs by state; queued is the queue depth",
+            [({"state": state}, count) for state, count in report.items() if state != "workers"],
+        )]
+        if "workers" in report:
+            families.append(("antigravity_render_workers", "gauge", "Render workers holding leases", [({}, len(report["workers"]))]))
+        return families
+
+    metrics.register_collector(collect_jobs)
+    options = {"manager": manager}
+    routes = [
+        (r"/jobs", JobsHandler, options),
+        (r"/jobs/([0-9a-f]+)", JobHandler, options),
+        (r"/jobs/([0-9a-f]+)/cancel", CancelHandler, options),
+        (r"/jobs/([0-9a-f]+)/events", EventsHandler, options),
+        (r"/jobs/([0-9a-f]+)/stream\.m3u8", StreamHandler, options),
+        (r"/healthz", HealthHandler, options),
+        (r"/metrics", MetricsHandler, options),
+    ]
+    if isinstance(manager, QueueJobManager):
+        routes += [
+            (r"/queue/lease", LeaseHandler, options),
+            (r"/queue/([0-9a-f]+)/heartbeat", HeartbeatHandler, options),
+            (r"/queue/([0-9a-f]+)/complete", CompleteHandler, options),
+        ]
+    return tornado.web.Application(routes)
+
+def is_loopback(address):
+    """Whether a listen address only accepts connections from this host."""
+    if address == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(address).is_loopback
+    except ValueError:
+        # "" (all interfaces) and host names that may resolve elsewhere
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP job API for lesson generation.")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--address", default=API_ADDRESS, help="Listen address; non-loopback addresses need API_TOKEN")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Lessons rendered at the same time")
+    parser.add_argument("--queue", nargs="?", const=QUEUE_PATH,
+                        help="Queue jobs for render_worker.py in this database (default render_queue.db) instead of rendering here")
+    args = parser.parse_args()
+
+    if not API_TOKEN and not is_loopback(args.address):
+        # Anyone who can reach the port could submit renders and lease queue jobs
+        print(f"Refusing to listen on {args.address} without API_TOKEN; set API_TOKEN or use --address 127.0.0.1")
+        return 2
+
+    if args.queue:
+        manager = QueueJobManager(RenderQueue(args.queue))
+        mode = f"queue {args.queue}"
+    else:
+        start_janitor()
+        manager = JobManager(workers=args.workers)
+        mode = f"{args.workers} workers"
+    app = make_app(manager)
+    app.listen(args.port, address=args.address)
+    print(f"Lesson job API listening on {args.address}:{args.port} ({mode})")
+    if not args.queue:
+        start_warmup()
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    except KeyboardInterrupt:
+        print("\nShutting down; cancelling running jobs.")
+        manager.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,23 @@
 import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
-from backend import Studio, Editor
-from voiceover_backend import VoiceoverArtist
+import threading
+from backend import Editor
+from pipeline import generate_lesson_shared, MAX_RETRIES
+from janitor import start_janitor
+from warmup import start_warmup
+from metrics import start_metrics_server
+from narration import LANGUAGES, PRIMARY_LANGUAGE, NARRATION_LANGUAGES, parse_languages
+from streaming import STREAMS_DIR, parse_segment, write_playlist, player_html
 
 st.set_page_config(page_title="OnlyStudies", page_icon="🎓", layout="wide")
 
+# Keep media/, the text SVG cache and job workspaces within disk quotas
+start_janitor()
+# Prometheus metrics on METRICS_PORT, when set
+start_metrics_server()
+
 st.title("OnlyStudies 🎓✨")
 st.subheader("Turn Text into Educational Animations in Minutes.")
 
@@ -36,6 +49,15 @@ with st.sidebar:
         help="Choose the voice character for narration."
     )
 
+    # The visuals are rendered once; each language gets its own narration (see narration.py)
+    languages = st.multiselect(
+        "More Narration Languages",
+        [code for code in LANGUAGES if code != PRIMARY_LANGUAGE],
+        default=parse_languages(NARRATION_LANGUAGES)[2] or [],
+        format_func=lambda code: LANGUAGES[code]["name"],
+        help="Also narrate the lesson in these languages, from the same render."
+    )
+
 # Initialize Session State
 if "generated_code" not in st.session_state:
     st.session_state.generated_code = None
@@ -47,79 +69,85 @@ if "video_path" not in st.session_state:
     st.session_state.video_path = None
 if "feedback_mode" not in st.session_state:
     st.session_state.feedback_mode = False
+if "lineage_id" not in st.session_state:
+    st.session_state.lineage_id = None
+if "narration_urls" not in st.session_state:
+    st.session_state.narration_urls = None
 
 topic = st.text_input("Enter a topic to explain:", placeholder="e.g., Newton's Third Law, Bubble Sort, Photosynthesis")
 
-def generate_video(topic_text, subject_text, quality_setting, voice_preset_setting, existing_code=None, feedback=None):
+def generate_video(topic_text, subject_text, quality_setting, voice_preset_setting, existing_code=None, feedback=None, lineage_id=None, languages=None):
     status_container = st.container()
     
     with status_container:
-        if existing_code and feedback:
-            st.info(f"🔄 Regenerating '{topic_text}' with feedback: {feedback}...")
-            current_code = VoiceoverArtist.regenerate_video_code(
-                original_code=existing_code,
-                feedback=feedback,
-                topic=topic_text,
-                subject=subject_text,
-                quality=quality_setting
-            )
-        else:
-            st.info(f"🎬 Planning and animating '{topic_text}' ({subject_text})...")
-            current_code = VoiceoverArtist.generate_voiceover_scene(
-                topic=topic_text,
-                subject=subject_text,
-                quality=quality_setting,
-                voice_preset=voice_preset_setting,
-                use_sox=True
-            )
-        
-        max_retries = 3
-        success = False
-        new_video_path = None
-        error_msg = ""
-
-        for attempt in range(max_retries):
-            if current_code.startswith("# Error"):
-                st.error(f"Failed to generate animation code: {current_code}")
-                break
-            
-            st.write(f"🎥 Rendering video (Attempt {attempt + 1}/{max_retries})...")
-            output_filename = "lesson.mp4"
-            
-            # Try to render
-            render_success, render_error, rendered_path = Studio.render_video(current_code, output_filename, quality=quality_setting)
-            
-            if render_success and rendered_path:
-                success = True
-                new_video_path = rendered_path
-                break
-            else:
-                if attempt < max_retries - 1:
-                    st.warning(f"Render failed on attempt {attempt + 1}. Retrying with self-correction...")
-                    error_msg = render_error
-                    # Self-correct
-                    current_code = VoiceoverArtist.fix_code(current_code, error_msg, topic_text, quality_setting)
-                else:
-                    error_msg = render_error
+        # Streamed renders play here while they render (STREAM_OUTPUT=1)
+        player = st.empty()
+        stream = {"id": None, "messages": []}
+
+        def show_segment(message):
+            segment = parse_segment(message)
+            if segment["stream"] != stream["id"]:
+                # A new render attempt starts a new stream
+                stream["id"] = segment["stream"]
+                stream["messages"] = []
+            stream["messages"].append(message)
+            write_playlist(os.path.join(STREAMS_DIR, f"{segment['stream']}.m3u8"), stream["messages"])
+            if len(stream["messages"]) == 1:
+                with player.container():
+                    st.caption("▶️ Watch the lesson while the rest renders:")
+                    components.html(player_html(f"/app/static/streams/{segment['stream']}.m3u8"), height=420)
+
+        report = {
+            "info": st.info,
+            "progress": st.write,
+            "warning": st.warning,
+            "error": st.error,
+            "segment": show_segment,
+        }
+        script_context = get_script_run_ctx()
+
+        def on_event(kind, message):
+            # Stream segments are reported from the render's publisher thread
+            add_script_run_ctx(threading.current_thread(), script_context)
+            report[kind](message)
+
+        result = generate_lesson_shared(
+            topic_text,
+            subject_text,
+            quality=quality_setting,
+            voice_preset=voice_preset_setting,
+            existing_code=existing_code,
+            feedback=feedback,
+            lineage_id=lineage_id,
+            on_event=on_event,
+            languages=languages
+        )
+        # The finished video replaces the stream
+        player.empty()
         
-        if success and new_video_path:
-            st.session_state.generated_code = current_code
+        if result["shared"]:
+            st.info("👥 Joined an identical lesson that was already being generated.")
+
+        if result["success"]:
+            st.session_state.generated_code = result["code"]
             st.session_state.current_topic = topic_text
             st.session_state.current_subject = subject_text
-            st.session_state.video_path = new_video_path
+            st.session_state.video_path = result["video_url"]
+            st.session_state.lineage_id = result["lineage_id"]
+            st.session_state.narration_urls = result.get("narration_urls")
             st.session_state.feedback_mode = False # Reset feedback mode on new success
             return True
         else:
-            st.error(f"Failed to render video after {max_retries} attempts.")
+            st.error(f"Failed to render video after {MAX_RETRIES} attempts.")
             with st.expander("Show Error Details"):
-                st.code(error_msg)
+                st.code(result["error"])
             return False
 
 if st.button("Generate Lesson"):
     if not topic:
         st.error("Please enter a topic.")
     else:
-        generate_video(topic, subject, quality, voice_preset)
+        generate_video(topic, subject, quality, voice_preset, languages=languages)
 
 # Display Video and Feedback if available
 if st.session_state.video_path:
@@ -129,6 +157,17 @@ if st.session_state.video_path:
     if is_url or os.path.exists(st.session_state.video_path):
         st.success("🎉 Video Ready!")
         st.video(st.session_state.video_path)
+
+        narration_urls = st.session_state.narration_urls or {}
+        other_videos = {code: url for code, url in narration_urls.items() if url != st.session_state.video_path}
+        if other_videos:
+            # NARRATION_OUTPUT=files: one video per language
+            for tab, url in zip(st.tabs([LANGUAGES[code]["name"] for code in other_videos]), other_videos.values()):
+                with tab:
+                    st.video(url)
+        elif len(narration_urls) > 1:
+            names = ", ".join(LANGUAGES[code]["name"] for code in narration_urls)
+            st.caption(f"🌐 Narrated in {names}; choose the audio track in your video player.")
         
         # Download button logic
         if is_url:
@@ -181,7 +220,9 @@ if st.session_state.video_path:
                     quality,
                     voice_preset,
                     existing_code=st.session_state.generated_code,
-                    feedback=feedback_text
+                    feedback=feedback_text,
+                    lineage_id=st.session_state.lineage_id,
+                    languages=languages
                 )
                 if success:
                     st.rerun()
@@ -189,3 +230,6 @@ if st.session_state.video_path:
 if st.button("Clear Workspace"):
     Editor.cleanup()
     st.success("Workspace cleared.")
+
+# The page is on screen by now; prime the LLM client, manim and font caches for the first lesson
+start_warmup()
@@ -6,6 +6,9 @@ This example demonstrates how to create a VoiceoverScene with:
 2. SoX integration for audio post-processing (pitch/tempo/tone)
 3. Error detection for missing SoX installation
 4. Voice character configuration for a friendly Teaching Assistant
+
+AssistantIntro and AssistantOutro double as the branding clips that
+clips.py pre-renders once and splices onto lessons.
 """
 
 from manim import *
@@ -19,12 +22,21 @@ class AssistantIntro(VoiceoverScene):
     Example scene where the Teaching Assistant introduces itself.
     Uses SoX to modify the voice for a friendly, engaging character.
     """
+
+    # SoX arguments for the Teaching Assistant voice character
+    # Format: ["effect1", "param1", "param2", "effect2", ...]
+    # clips.py overrides them with each voice preset's effects
+    sox_effects = [
+        "pitch", "100",          # Pitch shift: +100 cents (lighter voice)
+        "tempo", "1.1",          # Speed: 10% faster (more energetic)
+        "treble", "3"            # Treble boost: +3dB (clearer)
+    ]
     
     def construct(self):
         # ===== SoX Detection & Configuration =====
         sox_available = self.check_sox_installation()
         
-        if sox_available:
+        if sox_available and self.sox_effects:
             # SoX is available - configure voice processing
             self.configure_voice_service_with_sox()
         else:
@@ -107,13 +119,7 @@ class AssistantIntro(VoiceoverScene):
         """
         print("🎙 Configuring voice with SoX effects...")
         
-        # SoX arguments for Teaching Assistant voice character
-        # Format: ["effect1", "param1", "param2", "effect2", ...]
-        sox_effects = [
-            "pitch", "100",          # Pitch shift: +100 cents (lighter voice)
-            "tempo", "1.1",          # Speed: 10% faster (more energetic)
-            "treble", "3"            # Treble boost: +3dB (clearer)
-        ]
+        sox_effects = self.sox_effects
         
         # Alternative SoX configurations you can try:
         # 
@@ -152,6 +158,29 @@ class AssistantIntro(VoiceoverScene):
         print("✓ Basic voice service configured")
 
 
+class AssistantOutro(AssistantIntro):
+    """
+    Closing card appended to lessons, in the same voice as the intro.
+    """
+
+    def construct(self):
+        if self.check_sox_installation() and self.sox_effects:
+            self.configure_voice_service_with_sox()
+        else:
+            self.configure_voice_service_basic()
+
+        title = Text("Anti Gravity", font_size=60, color=BLUE)
+        subtitle = Text("Keep exploring!", font_size=30, color=WHITE)
+        subtitle.next_to(title, DOWN)
+
+        with self.voiceover(text="Thanks for learning with Anti Gravity. See you in the next lesson!"):
+            self.play(Write(title), run_time=1.5)
+            self.play(FadeIn(subtitle), run_time=1)
+
+        self.wait(1)
+        self.play(FadeOut(title, subtitle), run_time=1)
+
+
 # ===== Alternative: Azure Service with SoX =====
 # 
 # For higher quality voice, you can use AzureService:
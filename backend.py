@@ -1,30 +1,132 @@
 import os
-import subprocess
-import google.generativeai as genai
+import re
+import sys
+import signal
 from dotenv import load_dotenv
 import time
-from google.api_core import exceptions
-import requests
 import base64
 import uuid
 from datetime import datetime
+from janitor import active_job, register_job, release_job
+from process_utils import run_measured, add_usage
+from encoding import get_profile, apply_profile, apply_profile_segmented
+import catalog
+import llm
+from model_router import get_router, FALLBACK_MODEL
+from manim_runner import NETWORK_BLOCKED_MESSAGE, FRAMES_MARKER
+from streaming import SegmentPublisher
+from clips import splice_clips
+from metrics import counter, cache_lookup, CACHE_LOOKUPS
+from narration import write_narration, read_tracks, mux_tracks, PRIMARY_LANGUAGE
 
 load_dotenv()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def get_model(quality):
-    if quality == "High":
-        return genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
-    elif quality == "Medium":
-        return genai.GenerativeModel('gemini-2.0-flash')
-    else:
-        # Low
-        return genai.GenerativeModel('gemini-2.0-flash-lite')
+# Manim quality flag and output folder for each quality tier
+QUALITY_FLAGS = {"Low": "-ql", "Medium": "-qm", "High": "-qh"}
+QUALITY_DIRS = {"Low": "480p15", "Medium": "720p30", "High": "1080p60"}
+
+# Wraps the manim command line, see manim_runner.py
+MANIM_RUNNER = os.path.join(REPO_DIR, "manim_runner.py")
+
+# Per-lesson working directories (script + Manim media dir), see Studio.create_workspace
+WORKSPACES_DIR = "workspaces"
+
+# Render sandbox limits (see process_utils.run_measured). Generated code can
+# loop forever or build huge scenes; a breach fails only that render.
+RENDER_TIMEOUTS = {"Low": 360, "Medium": 840, "High": 1800}
+RENDER_TIMEOUT = os.getenv("RENDER_TIMEOUT")  # seconds, overrides every tier
+# CPU seconds per wall-clock second the render may use (manim + ffmpeg threads)
+RENDER_CPU_FACTOR = 4
+RENDER_MEMORY_MB = int(os.getenv("RENDER_MEMORY_MB", "6144"))
+RENDER_OUTPUT_MB = int(os.getenv("RENDER_OUTPUT_MB", "1024"))
+
+# Failure kinds caused by a sandbox limit rather than by a bug in the scene
+LIMIT_FAILURES = ("timeout", "cpu_limit", "memory_limit", "output_limit")
+
+UPLOAD_FAILURES = counter("antigravity_upload_failures_total", "Failed uploads to GitHub storage", ["kind"])
+
+class RenderError(str):
+    """
+    Error text of a failed render, classified by kind:
+    timeout, cpu_limit, memory_limit, output_limit, network_blocked,
+    cancelled, scene_error, missing_output, config or upload_failed.
+    """
+
+    def __new__(cls, message, kind="scene_error"):
+        error = super().__new__(cls, message)
+        error.kind = kind
+        return error
+
+def frames_rendered(stderr):
+    """Frame count manim_runner reports at exit, or None if it did not get that far."""
+    matches = re.findall(rf"^{FRAMES_MARKER}=(\d+)\s*$", stderr or "", re.MULTILINE)
+    return int(matches[-1]) if matches else None
+
+def classify_failure(returncode, stderr, stats, limits):
+    """Kind of failure for a non-zero manim exit (see RenderError)."""
+    if stats["cancelled"]:
+        return "cancelled"
+    if stats["timed_out"]:
+        return "timeout"
+    if NETWORK_BLOCKED_MESSAGE in stderr:
+        return "network_blocked"
+    if "MemoryError" in stderr or "std::bad_alloc" in stderr or "Cannot allocate memory" in stderr:
+        return "memory_limit"
+    # rlimit signals only exist on POSIX
+    xfsz = getattr(signal, "SIGXFSZ", None)
+    xcpu = getattr(signal, "SIGXCPU", None)
+    if (xfsz and returncode in (-xfsz, 128 + xfsz)) or "File too large" in stderr:
+        return "output_limit"
+    cpu_time = (stats["cpu_user"] or 0) + (stats["cpu_system"] or 0)
+    if (xcpu and returncode in (-xcpu, 128 + xcpu)) or (
+        limits.get("cpu_seconds") and returncode == -9 and cpu_time >= limits["cpu_seconds"]
+    ):
+        return "cpu_limit"
+    return "scene_error"
+
+def render_limits(quality):
+    """Wall-clock timeout and rlimits for a render at this quality."""
+    timeout = float(RENDER_TIMEOUT) if RENDER_TIMEOUT else RENDER_TIMEOUTS.get(quality, RENDER_TIMEOUTS["High"])
+    limits = {"cpu_seconds": timeout * RENDER_CPU_FACTOR, "file_mb": RENDER_OUTPUT_MB}
+    if RENDER_MEMORY_MB > 0:
+        limits["memory_mb"] = RENDER_MEMORY_MB
+    return timeout, limits
+
+# Manim evicts partial movie files beyond this count. A lesson lineage keeps
+# several versions of a scene, so allow more than Manim's default of 100.
+MAX_FILES_CACHED = 1000
+
+def record_usage(lesson, quality, stats):
+    """Record one render's resource usage (render_scene stats) in the lesson catalog, tagged with the lesson."""
+    usage = stats.get("usage") or {}
+    catalog.record_render(
+        lineage_id=lesson.get("lineage_id"),
+        topic=lesson.get("topic"),
+        subject=lesson.get("subject"),
+        model=lesson.get("model"),
+        attempt=lesson.get("attempts"),
+        quality=quality,
+        encoding_profile=stats.get("encoding_profile"),
+        success=stats.get("failure") is None,
+        failure=stats.get("failure"),
+        wall_seconds=usage.get("wall_time"),
+        cpu_user=usage.get("cpu_user"),
+        cpu_system=usage.get("cpu_system"),
+        peak_rss_kb=usage.get("peak_rss_kb"),
+        disk_write_bytes=usage.get("disk_write_bytes"),
+        frames=stats.get("frames"),
+        output_bytes=stats.get("output_bytes"),
+    )
+
+# Gemini is imported and configured on first use, see llm.py; the model for
+# a tier is picked by model_router
+def get_model(quality, subject=None):
+    return get_router().choose(quality, subject)
 
 def get_fallback_model():
-    return genai.GenerativeModel('gemini-2.0-flash-lite')
+    return FALLBACK_MODEL
 
 def upload_to_github(file_path, repo_name, token, commit_message="Upload generated video"):
     """
@@ -34,6 +136,8 @@ def upload_to_github(file_path, repo_name, token, commit_message="Upload generat
     if not os.path.exists(file_path):
         return None, "File not found"
 
+    import requests
+
     with open(file_path, "rb") as f:
         content = f.read()
     
@@ -77,7 +181,7 @@ class Artist:
             except Exception:
                 pass  # Ignore if file is locked
         
-        model = get_model(quality)
+        model_name = get_model(quality, subject)
         prompt = f"""
         CONTEXT: This is a FRESH REQUEST. Ignore any previous topics or examples.
         
@@ -147,17 +251,18 @@ class Artist:
         """
         for attempt in range(3):
             try:
-                response = model.generate_content(prompt)
-                code = response.text.replace("```python", "").replace("```", "").strip()
+                text = llm.generate(model_name, prompt, subject=subject)
+                code = text.replace("```python", "").replace("```", "").strip()
                 # Ensure essential imports are present
                 if "import math" not in code:
                     code = "import math\n" + code
                 if "import random" not in code:
                     code = "import random\n" + code
                 return code
-            except exceptions.ResourceExhausted:
+            except llm.ResourceExhausted:
                 print(f"Quota exceeded on attempt {attempt + 1}. Switching to fallback model...")
-                model = get_fallback_model()
+                llm.QUOTA_FALLBACKS.inc(model=model_name)
+                model_name = get_fallback_model()
                 time.sleep(2)
             except Exception as e:
                 return f"# Error: {e}"
@@ -165,18 +270,82 @@ class Artist:
 
 class Studio:
     @staticmethod
-    def render_video(code, output_filename, quality="Medium"):
+    def create_workspace(lineage_id=None):
+        """
+        Create (or reopen) the working directory for a lesson lineage.
+
+        A lineage is one lesson and all of its fix and feedback versions.
+        Reusing its workspace keeps Manim's partial movie files, so a new
+        version only re-renders the animations that actually changed. The
+        janitor expires lineage workspaces after LINEAGE_TTL_HOURS.
+
+        The workspace is registered as in use (see janitor.register_job)
+        before it is touched, so the janitor cannot evict an expired lineage
+        while it is being reopened; callers release it with release_job.
+        """
+        workdir = os.path.join(WORKSPACES_DIR, lineage_id or uuid.uuid4().hex[:12])
+        root = os.path.realpath(WORKSPACES_DIR)
+        if os.path.dirname(os.path.realpath(workdir)) != root:
+            raise ValueError(f"Lineage ID {lineage_id!r} does not name a workspace under {WORKSPACES_DIR}")
+        register_job(workdir)
+        try:
+            os.makedirs(workdir, exist_ok=True)
+            # Mark the lineage as recently used for the janitor's LRU eviction
+            os.utime(workdir)
+        except OSError:
+            release_job(workdir)
+            raise
+        return workdir
+
+    @staticmethod
+    def render_scene(code, output_filename, quality="Medium", workdir=".", encoding_profile=None, cancel_event=None, pause_event=None, stream=None, narration=None):
+        """
+        Render a scene with Manim without uploading it.
+
+        The script and Manim's media directory live under workdir, so renders
+        in separate workspaces can run concurrently. The output is encoded
+        with the tier's encoding profile (see encoding.py) unless another
+        profile is named. Setting cancel_event (a threading.Event) kills the
+        render; while pause_event is set it is paused (see render_scheduler).
+        With stream (a streaming.SegmentPublisher), finished animations are
+        published as stream segments while Manim is still rendering. With
+        narration ({"languages": [...], "translations": {...}}, see
+        narration.py), the scene is also narrated in those languages and
+        their tracks are muxed onto the video.
+
+        Manim runs in its own process group under the limits from
+        render_limits (wall clock, CPU seconds, address space, file size)
+        and the runner's network guard; errors are RenderError strings
+        classified by kind.
+
+        Returns:
+            tuple: (success, error, found_path, stats) where stats is the
+            measurement dict from run_measured plus output_bytes,
+            encoding_profile, encode_time, failure (the RenderError kind, or
+            None), frames (rendered, not served from Manim's cache), usage
+            (run_measured's usage fields summed over Manim, its SoX
+            children and every ffmpeg encode) and (for per-animation
+            encoding) segments and, for narrated renders that got their
+            tracks, narration (outputs: language -> video path, and
+            untranslated: language -> blocks left in the scene's own
+            language).
+        """
         # Save code to file with UTF-8 encoding
-        script_path = f"temp_topic.py"
+        script_path = os.path.join(workdir, "temp_topic.py")
+        media_dir = os.path.join(workdir, "media")
         with open(script_path, "w", encoding="utf-8") as f:
             f.write(code)
         
         # Determine Manim quality flag
-        quality_flag = "-ql" # Default Low
-        if quality == "Medium":
-            quality_flag = "-qm"
-        elif quality == "High":
-            quality_flag = "-qh"
+        quality_flag = QUALITY_FLAGS.get(quality, "-ql") # Default Low
+        profile_name, profile = get_profile(quality, encoding_profile)
+        quality_dir = QUALITY_DIRS.get(quality, "480p15")
+
+        # Render only as many frames as the profile will keep
+        frame_rate_args = []
+        if profile.get("frame_rate"):
+            frame_rate_args = ["--frame_rate", str(profile["frame_rate"])]
+            quality_dir = f"{quality_dir.split('p')[0]}p{profile['frame_rate']}"
 
         # Ensure LaTeX is in the PATH (Windows MiKTeX)
         tex_path = r"C:\Users\Siddhant\AppData\Local\Programs\MiKTeX\miktex\bin\x64"
@@ -184,18 +353,53 @@ class Studio:
         if tex_path not in env["PATH"]:
             env["PATH"] += f";{tex_path}"
 
-        # Run Manim
-        # We use a fixed scene name 'SceneTopic' as requested in the prompt
-        command = f"manim {quality_flag} -o {output_filename} {script_path} SceneTopic"
-        
-        process = subprocess.Popen(
-            command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env
-        )
-        
-        stdout, stderr = process.communicate()
-        
-        if process.returncode != 0:
-            return False, stderr, None
+        # Let scenes import helpers from this repo (e.g. the offline stubs)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, env.get("PYTHONPATH")]))
+
+        # Run Manim through manim_runner (shared text cache, network guard)
+        # under the sandbox limits. We use a fixed scene name 'SceneTopic' as
+        # requested in the prompt
+        command = [sys.executable, MANIM_RUNNER, quality_flag] + frame_rate_args + [
+            "--media_dir", media_dir, "--max_files_cached", str(MAX_FILES_CACHED),
+            "-o", output_filename, script_path, "SceneTopic",
+        ]
+        timeout, limits = render_limits(quality)
+        narration_dir = os.path.join(workdir, "narration")
+        if narration:
+            env["NARRATION_FILE"] = os.path.abspath(
+                write_narration(narration_dir, narration["languages"], narration["translations"])
+            )
+        if stream is not None:
+            env["STREAM_DIR"] = os.path.abspath(stream.stream_dir)
+            stream.start()
+
+        # Keep the janitor away from the media dir while Manim writes to it
+        with active_job(media_dir):
+            returncode, stdout, stderr, stats = run_measured(
+                command, env=env, shell=False, cancel_event=cancel_event, timeout=timeout, limits=limits,
+                pause_event=pause_event
+            )
+        stats["returncode"] = returncode
+        stats["output_bytes"] = 0
+        stats["encoding_profile"] = profile_name
+        stats["encode_time"] = 0.0
+        stats["failure"] = None
+        stats["frames"] = frames_rendered(stderr)
+        # wait4 already covers the SoX and ffmpeg processes Manim waited for
+        stats["usage"] = add_usage({}, stats)
+        if stream is not None:
+            # Publish the last segments of a finished render before encoding the video
+            stream.finish(publish_rest=returncode == 0 and not stats["cancelled"] and not stats["timed_out"])
+            add_usage(stats["usage"], stream.usage)
+
+        if stats["cancelled"] or stats["timed_out"] or returncode != 0:
+            stats["failure"] = classify_failure(returncode, stderr, stats, limits)
+            if stats["failure"] == "cancelled":
+                return False, RenderError("Render cancelled.", "cancelled"), None, stats
+            if stats["failure"] == "timeout":
+                message = f"Render exceeded the {timeout:.0f}s time limit and was stopped."
+                return False, RenderError(message + "\n" + stderr[-2000:], "timeout"), None, stats
+            return False, RenderError(stderr, stats["failure"]), None, stats
             
         # Robustly find the output file
         # Manim output structure can vary, so we search for the file
@@ -203,47 +407,202 @@ class Studio:
         if not expected_name.endswith(".mp4"):
             expected_name += ".mp4"
             
-        search_dir = "media"
+        search_dir = media_dir
         found_path = None
         
         for root, dirs, files in os.walk(search_dir):
             if expected_name in files:
                 found_path = os.path.join(root, expected_name)
                 # Prefer the one in the quality folder if multiple exist (heuristic)
-                if quality == "Low" and "480p15" in root:
-                    break
-                if quality == "Medium" and "720p30" in root:
-                    break
-                if quality == "High" and "1080p60" in root:
+                if quality_dir in root:
                     break
         
-        if found_path:
-            # Upload to GitHub
-            github_token = os.getenv("GITHUB_TOKEN")
-            github_repo = os.getenv("GITHUB_REPO")
-            
-            if not github_token or not github_repo:
-                 # Fallback to local if no credentials (though user asked for GitHub storage)
-                 # But we should probably warn or error. For now, let's assume they exist as per plan.
-                 return False, "GITHUB_TOKEN or GITHUB_REPO not set in environment variables.", None
+        if not found_path:
+            stats["failure"] = "missing_output"
+            return False, RenderError("Rendered successfully but could not locate output file.", "missing_output"), None, stats
 
-            url, upload_error = upload_to_github(found_path, github_repo, github_token)
-            
-            if url:
-                # Cleanup local file
-                try:
-                    os.remove(found_path)
-                except Exception as e:
-                    print(f"Error removing local file: {e}")
-                
-                Editor.remove_partial_files()
-                return True, "", url
+        # Encode per animation when Manim's partial movies are at hand, so
+        # animations reused from its cache are not encoded again either
+        partial_dir = os.path.join(os.path.dirname(found_path), "partial_movie_files", "SceneTopic")
+        partial_list = os.path.join(partial_dir, "partial_movie_file_list.txt")
+        encoded = False
+        if os.path.exists(partial_list):
+            encoded, encode_error, stats["encode_time"], stats["segments"] = apply_profile_segmented(
+                found_path, partial_list, os.path.join(f"{partial_dir}.encoded", profile_name), profile,
+                usage=stats["usage"]
+            )
+            if encoded:
+                # Segments encoded before are Manim's cached animations
+                segments = stats["segments"]
+                CACHE_LOOKUPS.inc(segments["reused"], cache="encoded_segments", result="hit")
+                CACHE_LOOKUPS.inc(segments["encoded"], cache="encoded_segments", result="miss")
             else:
-                Editor.remove_partial_files()
-                return False, f"Rendered but upload failed: {upload_error}", None
+                print(f"Segmented encoding failed, encoding the whole video: {encode_error}")
+        if not encoded:
+            encoded, encode_error, whole_time = apply_profile(found_path, profile, usage=stats["usage"])
+            stats["encode_time"] += whole_time
+        if not encoded:
+            # Keep Manim's own encode rather than failing a finished render
+            print(f"Encoding profile '{profile_name}' failed, keeping Manim output: {encode_error}")
+            stats["encoding_profile"] = "manim_default"
+
+        tracks = read_tracks(narration_dir) if narration else None
+        if tracks:
+            # The video stream is copied; only the narration tracks are encoded
+            muxed, mux_error, outputs, mux_stats = mux_tracks(
+                found_path, {language: track["path"] for language, track in tracks["tracks"].items()}, profile
+            )
+            add_usage(stats["usage"], mux_stats)
+            stats["encode_time"] += mux_stats.get("wall_time", 0.0)
+            if muxed:
+                untranslated = {language: track["untranslated"] for language, track in tracks["tracks"].items()}
+                stats["narration"] = {"outputs": outputs, "untranslated": untranslated}
+            else:
+                print(f"Could not add the narration tracks, keeping {PRIMARY_LANGUAGE} only: {mux_error}")
+        elif narration:
+            print("The render wrote no narration tracks (no voiceover blocks?)")
+
+        stats["output_bytes"] = os.path.getsize(found_path)
+        return True, "", found_path, stats
+
+    @staticmethod
+    def render_video(code, output_filename, quality="Medium", workdir=".", keep_partial_files=False, cancel_event=None, lesson=None, reuse=True, pause_event=None, on_segment=None, narration=None):
+        """
+        Render a scene and upload the result to GitHub.
+
+        Args:
+            keep_partial_files: Keep Manim's per-animation cache in workdir so
+                the next render of a similar scene can reuse it
+            cancel_event: threading.Event that kills the render when set
+            pause_event: threading.Event that pauses the render while set
+            lesson: Lesson details (topic, subject, voice_preset, ...; see
+                catalog.COLUMNS). When given, the render's resource usage
+                and the uploaded lesson are recorded in the lesson catalog.
+            reuse: Serve identical code already in the lesson catalog
+                without rendering (only with lesson)
+            on_segment: Optional callback(segment); when given, the render is
+                streamed and every segment uploaded while it runs is passed
+                to it (see streaming.SegmentPublisher)
+
+            narration: Narrate the scene in more languages (see
+                render_scene); the catalog is not consulted for such renders
+
+        Lessons get the LESSON_INTRO and LESSON_OUTRO clips spliced on
+        (see clips.py); stats["clips"] lists the clips added. Narrated
+        lessons get none, and stats["narration_urls"] maps each language to
+        the video narrated in it (the same URL for every language with
+        NARRATION_OUTPUT=tracks).
+
+        Returns:
+            tuple: (success, error, url, stats), error being a RenderError
+            and stats render_scene's (None when nothing was rendered)
+        """
+        code_hash = catalog.code_hash(code)
+        profile_name, _ = get_profile(quality)
+        if lesson is not None and reuse and not narration:
+            cached = catalog.find_by_code_hash(code_hash, quality=quality, encoding_profile=profile_name)
+            cache_lookup("scene_catalog", cached is not None)
+            if cached:
+                print(f"Identical scene already rendered as lesson #{cached['id']}, reusing {cached['video_url']}")
+                return True, "", cached["video_url"], None
+
+        github_token = os.getenv("GITHUB_TOKEN")
+        github_repo = os.getenv("GITHUB_REPO")
+
+        def upload_segment(path):
+            url, upload_error = upload_to_github(path, github_repo, github_token, "Upload lesson stream segment")
+            if not url:
+                UPLOAD_FAILURES.inc(kind="segment")
+            return url, upload_error
+
+        stream = None
+        if on_segment is not None and github_token and github_repo:
+            stream = SegmentPublisher(os.path.join(workdir, "stream"), upload=upload_segment, on_segment=on_segment)
+
+        success, error, found_path, stats = Studio.render_scene(
+            code, output_filename, quality=quality, workdir=workdir, cancel_event=cancel_event,
+            pause_event=pause_event, stream=stream, narration=narration
+        )
+        # Clips have a single audio track and would not match the narrated ones
+        if success and lesson is not None and not narration:
+            stats["clips"], splice_stats = splice_clips(
+                found_path, quality, lesson.get("voice_preset"), stats["encoding_profile"]
+            )
+            if splice_stats:
+                add_usage(stats["usage"], splice_stats)
+                stats["encode_time"] += splice_stats["wall_time"]
+                stats["output_bytes"] = os.path.getsize(found_path)
+        media_dir = os.path.join(workdir, "media")
+        if lesson is not None:
+            record_usage(lesson, quality, stats)
+
+        if not success:
+            if stats["returncode"] == 0 and not keep_partial_files:
+                # Manim finished but the output file could not be located
+                Editor.remove_partial_files(media_dir)
+            return False, error, None, stats
+
+        # Upload to GitHub
+        if not github_token or not github_repo:
+             # Fallback to local if no credentials (though user asked for GitHub storage)
+             # But we should probably warn or error. For now, let's assume they exist as per plan.
+             return False, RenderError("GITHUB_TOKEN or GITHUB_REPO not set in environment variables.", "config"), None, stats
+
+        url, upload_error = upload_to_github(found_path, github_repo, github_token)
+        
+        if url:
+            if stats.get("narration"):
+                stats["narration_urls"] = Studio._upload_narrations(
+                    url, found_path, stats["narration"]["outputs"], github_repo, github_token
+                )
+            # Cleanup local file
+            try:
+                os.remove(found_path)
+            except Exception as e:
+                print(f"Error removing local file: {e}")
+            
+            if not keep_partial_files:
+                Editor.remove_partial_files(media_dir)
+            if lesson is not None:
+                catalog.record_lesson(
+                    **lesson,
+                    video_url=url,
+                    quality=quality,
+                    code=code,
+                    code_hash=code_hash,
+                    encoding_profile=stats["encoding_profile"],
+                    render_seconds=round(stats["wall_time"] + stats["encode_time"], 2),
+                    file_bytes=stats["output_bytes"],
+                )
+            return True, "", url, stats
         else:
-            Editor.remove_partial_files()
-            return False, "Rendered successfully but could not locate output file.", None
+            UPLOAD_FAILURES.inc(kind="video")
+            if not keep_partial_files:
+                Editor.remove_partial_files(media_dir)
+            return False, RenderError(f"Rendered but upload failed: {upload_error}", "upload_failed"), None, stats
+
+    @staticmethod
+    def _upload_narrations(url, video_path, outputs, github_repo, github_token):
+        """
+        URL of the video narrated in each language.
+
+        Per-language videos (NARRATION_OUTPUT=files) are uploaded and
+        removed; a language whose upload fails is left out.
+        """
+        urls = {}
+        for language, path in outputs.items():
+            if path == video_path:
+                urls[language] = url
+                continue
+            language_url, upload_error = upload_to_github(path, github_repo, github_token, f"Upload {language} narration")
+            if language_url:
+                urls[language] = language_url
+            else:
+                UPLOAD_FAILURES.inc(kind="narration")
+                print(f"Could not upload the {language} narration: {upload_error}")
+            if os.path.exists(path):
+                os.remove(path)
+        return urls
 
 class Editor:
     @staticmethod
@@ -265,9 +624,8 @@ class Editor:
                 print(f"Could not remove __pycache__: {e}")
 
     @staticmethod
-    def remove_partial_files():
-        """Recursively finds and deletes 'partial_movie_files' directories within 'media'."""
-        search_dir = "media"
+    def remove_partial_files(search_dir="media"):
+        """Recursively finds and deletes 'partial_movie_files' directories within search_dir."""
         if not os.path.exists(search_dir):
             return
 
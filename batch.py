@@ -0,0 +1,260 @@
+"""
+Anti Gravity - Batch Lesson Generation
+
+Produces whole syllabi without the Streamlit UI. Reads a JSONL manifest with
+one lesson per line, runs each through the lesson pipeline
+(generate -> validate -> render -> upload) with configurable parallelism,
+and checkpoints every finished lesson so an interrupted run resumes where it
+stopped. Ctrl-C cancels lessons that are still rendering; they rerun on resume.
+
+Manifest records:
+    {"id": "phys-01", "topic": "Newton's Third Law", "subject": "Physics", "quality": "Medium", "voice_preset": "professor"}
+
+Only "topic" is required ("title" is accepted as well); "id" (or
+"request_id") defaults to a hash of the lesson parameters. "languages"
+(e.g. ["hi", "es"]) narrates the lesson in more languages (see narration.py).
+
+Usage:
+    python batch.py syllabus.jsonl --parallel 2 --results results.json
+    python batch.py syllabus.jsonl --retry-failed   # resume, re-running failures
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipeline import generate_lesson
+from render_scheduler import BULK
+from backend import QUALITY_FLAGS
+from voiceover_backend import VOICE_PRESETS
+from narration import parse_languages
+
+DEFAULT_SUBJECT = "General"
+DEFAULT_QUALITY = "Medium"
+DEFAULT_VOICE = "teaching_assistant"
+
+def load_manifest(path):
+    """
+    Read and normalize lesson records from a JSONL manifest. Lines that are
+    not valid JSON or ask for an unknown quality, voice or language are
+    skipped with a message.
+
+    Returns:
+        list: dicts with id, topic, subject, quality, voice_preset and, when
+        given, languages
+    """
+    lessons = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_number}: invalid JSON ({e})")
+                continue
+            if not isinstance(record, dict):
+                print(f"Skipping line {line_number}: not a JSON object")
+                continue
+            topic = record.get("topic") or record.get("title")
+            if not topic or not isinstance(topic, str):
+                print(f"Skipping line {line_number}: no topic")
+                continue
+            lesson = {
+                "topic": topic,
+                "subject": record.get("subject", DEFAULT_SUBJECT),
+                "quality": record.get("quality", DEFAULT_QUALITY),
+                "voice_preset": record.get("voice_preset", DEFAULT_VOICE),
+            }
+            if not isinstance(lesson["subject"], str):
+                print(f"Skipping line {line_number}: subject must be a string")
+                continue
+            if lesson["quality"] not in QUALITY_FLAGS:
+                print(f"Skipping line {line_number}: quality must be one of {', '.join(QUALITY_FLAGS)}")
+                continue
+            if lesson["voice_preset"] not in VOICE_PRESETS:
+                print(f"Skipping line {line_number}: voice_preset must be one of {', '.join(VOICE_PRESETS)}")
+                continue
+            if record.get("languages"):
+                valid, error, _ = parse_languages(record["languages"])
+                if not valid:
+                    print(f"Skipping line {line_number}: {error}")
+                    continue
+                lesson["languages"] = record["languages"]
+            key = json.dumps(lesson, sort_keys=True)
+            lesson["id"] = str(record.get("id") or record.get("request_id") or hashlib.sha1(key.encode()).hexdigest()[:12])
+            if lesson["id"] in seen:
+                print(f"Skipping line {line_number}: duplicate id {lesson['id']}")
+                continue
+            seen.add(lesson["id"])
+            lessons.append(lesson)
+    return lessons
+
+class Checkpoint:
+    """Append-only JSONL log of finished lessons, fsynced after every write."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a torn last line; that lesson simply reruns
+                        continue
+                    self.entries[entry["id"]] = entry
+
+    def record(self, entry):
+        with self.lock:
+            self.entries[entry["id"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+def run_lesson(lesson, use_index=True, cancel_event=None):
+    """
+    Run one lesson through the pipeline and return its results entry.
+
+    Returns:
+        dict or None: the results entry, or None when cancel_event stopped
+        the lesson (it is left unrecorded so the next run redoes it)
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    started = datetime.now().isoformat(timespec="seconds")
+
+    def log(kind, message):
+        if kind in ("warning", "error"):
+            print(f"[{lesson['id']}] {message}")
+
+    try:
+        result = generate_lesson(
+            lesson["topic"],
+            lesson["subject"],
+            quality=lesson["quality"],
+            voice_preset=lesson["voice_preset"],
+            languages=lesson.get("languages"),
+            on_event=log,
+            cancel_event=cancel_event,
+            use_index=use_index,
+            priority=BULK
+        )
+    except Exception as e:
+        result = {"success": False, "video_url": None, "error": f"{type(e).__name__}: {e}", "attempts": 0, "timings": {}}
+    if result.get("cancelled"):
+        return None
+
+    timings = result.get("timings", {})
+    return {
+        **lesson,
+        "success": result["success"],
+        "video_url": result.get("video_url"),
+        "error": "" if result["success"] else str(result.get("error", ""))[-2000:],
+        "attempts": result.get("attempts", 0),
+        "lineage_id": result.get("lineage_id"),
+        "reused_from": (result.get("reused") or {}).get("topic"),
+        "narration_urls": result.get("narration_urls"),
+        "generate_seconds": round(timings.get("generate", 0.0), 2),
+        "render_seconds": round(sum(timings.get("render", [])), 2),
+        "total_seconds": round(timings.get("total", 0.0), 2),
+        "usage": result.get("usage"),
+        "started_at": started,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def write_results(path, lessons, checkpoint):
+    """Write the results manifest in manifest order, atomically."""
+    entries = [checkpoint.entries[lesson["id"]] for lesson in lessons if lesson["id"] in checkpoint.entries]
+    summary = {
+        "total": len(lessons),
+        "succeeded": sum(1 for e in entries if e["success"]),
+        "failed": sum(1 for e in entries if not e["success"]),
+        "pending": len(lessons) - len(entries),
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "lessons": entries}, f, indent=4)
+    os.replace(temp_path, path)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate lessons in bulk from a JSONL manifest.")
+    parser.add_argument("manifest", help="JSONL file with one lesson per line")
+    parser.add_argument("--parallel", type=int, default=1, help="Lessons rendered at the same time")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <manifest>.checkpoint.jsonl)")
+    parser.add_argument("--results", help="Results manifest (default: <manifest>.results.json)")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run lessons that failed in a previous run")
+    parser.add_argument("--fresh", action="store_true", help="Always generate; do not serve near-duplicate lessons from the topic index")
+    args = parser.parse_args()
+
+    base = os.path.splitext(args.manifest)[0]
+    checkpoint = Checkpoint(args.checkpoint or f"{base}.checkpoint.jsonl")
+    results_path = args.results or f"{base}.results.json"
+
+    lessons = load_manifest(args.manifest)
+    pending = []
+    for lesson in lessons:
+        done = checkpoint.entries.get(lesson["id"])
+        if done and (done["success"] or not args.retry_failed):
+            continue
+        pending.append(lesson)
+
+    print("=" * 60)
+    print("Batch Lesson Generation")
+    print("=" * 60)
+    print(f"{len(lessons)} lessons in manifest, {len(lessons) - len(pending)} already done, {len(pending)} to run")
+
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=max(1, args.parallel))
+    cancel_event = threading.Event()
+    futures = {}
+    finished = 0
+
+    def record(future):
+        nonlocal finished
+        entry = future.result()
+        if entry is None:
+            return
+        checkpoint.record(entry)
+        finished += 1
+        status = "✓" if entry["success"] else "✗"
+        print(f"[{finished}/{len(pending)}] {status} {entry['id']} {entry['topic']} ({entry['total_seconds']}s)")
+
+    try:
+        futures = {pool.submit(run_lesson, lesson, not args.fresh, cancel_event): lesson for lesson in pending}
+        for future in as_completed(futures):
+            record(future)
+            futures.pop(future)
+        pool.shutdown()
+    except KeyboardInterrupt:
+        # Stop rendering lessons at their next checkpoint, drop queued ones,
+        # and keep any that finished while we were unwinding
+        print("\nInterrupted; stopping running lessons...")
+        cancel_event.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future.done() and not future.cancelled():
+                record(future)
+        print("Finished lessons are checkpointed. Re-run the same command to resume.")
+
+    summary = write_results(results_path, lessons, checkpoint)
+    print(f"\nDone in {time.perf_counter() - started:.0f}s: {summary['succeeded']} succeeded, "
+          f"{summary['failed']} failed, {summary['pending']} pending")
+    print(f"Results written to {results_path}")
+    return 0 if summary["failed"] == 0 and summary["pending"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Anti Gravity - Encoding Profile Benchmark
+
+Renders the recorded scene corpus once per quality tier with Manim's own
+encoder, then re-encodes each output with every encoding profile
+(encoding.py) and reports encode time, CPU time, file size and SSIM against
+the Manim encode. Use it to pick the fastest profile whose quality is still
+acceptable for a tier.
+
+Profiles with a lower frame rate also save render time, because Manim is
+asked for fewer frames; measure that with bench_render.py --profile NAME.
+
+Usage:
+    python bench_encoding.py
+    python bench_encoding.py --tiers Medium --profiles compact balanced --min-ssim 0.97
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import tempfile
+
+import stubs
+from backend import Studio, Editor, QUALITY_FLAGS, REPO_DIR
+from encoding import ENCODING_PROFILES, transcode
+
+def measure_ssim(encoded_path, reference_path, frame_rate=None):
+    """SSIM of an encode against the reference, resampled to the encode's frame rate."""
+    graph = "[0:v][1:v]ssim"
+    if frame_rate:
+        graph = f"[1:v]fps={frame_rate}[ref];[0:v][ref]ssim"
+    result = subprocess.run(
+        ["ffmpeg", "-i", encoded_path, "-i", reference_path, "-lavfi", graph, "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    match = re.search(r"All:([0-9.]+)", result.stderr)
+    return float(match.group(1)) if match else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark encoding profiles on the scene corpus.")
+    parser.add_argument("--tiers", nargs="+", default=list(QUALITY_FLAGS), choices=list(QUALITY_FLAGS))
+    parser.add_argument("--scenes", nargs="+", help="Corpus entry names (default: all)")
+    parser.add_argument("--profiles", nargs="+", default=[p for p in ENCODING_PROFILES if p != "manim_default"])
+    parser.add_argument("--min-ssim", type=float, default=0.95, help="Lowest SSIM counted as acceptable")
+    parser.add_argument("--output", help="Also write raw results to this JSON file")
+    args = parser.parse_args()
+
+    os.chdir(REPO_DIR)
+    corpus = stubs.load_corpus(offline=True)
+    if args.scenes:
+        corpus = [entry for entry in corpus if entry["name"] in args.scenes]
+
+    print("=" * 60)
+    print("Encoding Profile Benchmark")
+    print("=" * 60)
+
+    results = {}
+    scratch = tempfile.mkdtemp(prefix="bench_encoding_")
+    try:
+        for quality in args.tiers:
+            totals = {name: {"encode_time": 0.0, "cpu_time": 0.0, "bytes": 0, "ssim": []} for name in args.profiles}
+            source_bytes = 0
+
+            for entry in corpus:
+                print(f"\nRendering {entry['name']} [{quality}] with Manim's encoder...")
+                Editor.remove_partial_files()
+                success, error, found_path, _ = Studio.render_scene(
+                    entry["code"], f"bench_{entry['name']}", quality=quality, encoding_profile="manim_default"
+                )
+                if not success:
+                    print(f"   ✗ Render failed: {error[-300:]}")
+                    continue
+                source = os.path.join(scratch, f"{entry['name']}_{quality}.mp4")
+                shutil.move(found_path, source)
+                source_bytes += os.path.getsize(source)
+
+                for name in args.profiles:
+                    profile = ENCODING_PROFILES[name]
+                    output = os.path.join(scratch, f"{entry['name']}_{quality}_{name}.mp4")
+                    ok, error, stats = transcode(source, output, profile)
+                    if not ok:
+                        print(f"   ✗ {name}: {error.strip()[-200:]}")
+                        continue
+                    totals[name]["encode_time"] += stats["wall_time"]
+                    totals[name]["cpu_time"] += (stats["cpu_user"] or 0) + (stats["cpu_system"] or 0)
+                    totals[name]["bytes"] += os.path.getsize(output)
+                    ssim = measure_ssim(output, source, profile.get("frame_rate"))
+                    if ssim is not None:
+                        totals[name]["ssim"].append(ssim)
+                    os.remove(output)
+            Editor.remove_partial_files()
+
+            print(f"\n--- {quality} ({QUALITY_FLAGS[quality]}) | Manim encode: {source_bytes / 1024:.0f} KB ---")
+            print(f"{'profile':<15}{'encode s':>10}{'cpu s':>10}{'size KB':>10}{'vs manim':>10}{'ssim':>8}")
+            tier_results = {}
+            for name, data in totals.items():
+                ssim = round(min(data["ssim"]), 4) if data["ssim"] else None
+                ratio = data["bytes"] / source_bytes if source_bytes else None
+                tier_results[name] = {
+                    "encode_time": round(data["encode_time"], 2),
+                    "cpu_time": round(data["cpu_time"], 2),
+                    "bytes": data["bytes"],
+                    "size_ratio": round(ratio, 3) if ratio else None,
+                    "min_ssim": ssim,
+                }
+                print(
+                    f"{name:<15}{data['encode_time']:>10.2f}{data['cpu_time']:>10.2f}"
+                    f"{data['bytes'] / 1024:>10.0f}{(ratio or 0):>10.2f}{(ssim or 0):>8.3f}"
+                )
+
+            acceptable = [n for n, r in tier_results.items() if r["min_ssim"] and r["min_ssim"] >= args.min_ssim and r["bytes"]]
+            if acceptable:
+                fastest = min(acceptable, key=lambda n: tier_results[n]["encode_time"])
+                smallest = min(acceptable, key=lambda n: tier_results[n]["bytes"])
+                print(f"Fastest acceptable (SSIM >= {args.min_ssim}): {fastest} | Smallest acceptable: {smallest}")
+            else:
+                print(f"No profile reached SSIM {args.min_ssim}")
+            results[quality] = {"manim_bytes": source_bytes, "profiles": tier_results}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
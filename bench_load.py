@@ -0,0 +1,276 @@
+"""
+Anti Gravity - Concurrent Load Test
+
+Simulates many users generating lessons at once by driving the lesson
+pipeline (pipeline.generate_lesson, the same code behind app.py's
+"Generate Lesson" button) from concurrent threads, bypassing the Streamlit
+UI. Gemini, gTTS and the GitHub upload are replaced by stubs with injectable
+latency and error rates; manim renders for real.
+
+Usage:
+    python bench_load.py --users 5 10 20
+    python bench_load.py --users 10 --qualities Low=0.8,Medium=0.2 --llm-latency 4 --llm-error-rate 0.05
+    python bench_load.py --users 20 --max-active 4   # cap concurrent pipelines, measure queueing
+    python bench_load.py --users 10 --bulk-users 4    # interactive latency under batch load
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import stubs
+from backend import REPO_DIR
+
+def parse_mix(text):
+    """Parse 'a=0.7,b=0.3' into a {name: weight} dict."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class HostSampler(threading.Thread):
+    """Samples host CPU and memory utilization from /proc while the test runs."""
+
+    def __init__(self, interval=1.0):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.cpu = []
+        self.memory = []
+        self.load = []
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _cpu_times():
+        with open("/proc/stat", "r") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        idle = fields[3] + fields[4]  # idle + iowait
+        return sum(fields), idle
+
+    @staticmethod
+    def _memory_used():
+        info = {}
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0])
+        return 1 - info["MemAvailable"] / info["MemTotal"]
+
+    def run(self):
+        if not os.path.exists("/proc/stat"):
+            return
+        total, idle = self._cpu_times()
+        while not self._stop_event.wait(self.interval):
+            new_total, new_idle = self._cpu_times()
+            if new_total > total:
+                self.cpu.append(1 - (new_idle - idle) / (new_total - total))
+            total, idle = new_total, new_idle
+            self.memory.append(self._memory_used())
+            self.load.append(os.getloadavg()[0])
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def summary(self):
+        def stats(values):
+            if not values:
+                return {"mean": None, "max": None}
+            return {"mean": round(sum(values) / len(values), 3), "max": round(max(values), 3)}
+        return {
+            "cpu_utilization": stats(self.cpu),
+            "memory_utilization": stats(self.memory),
+            "load_average_1m": stats(self.load),
+            "cpu_count": os.cpu_count(),
+        }
+
+def run_stage(users, args, corpus, topic_mix, quality_mix):
+    """Run one load stage with the given number of simultaneous users (plus args.bulk_users batch users)."""
+    from pipeline import generate_lesson
+    from render_scheduler import priority_for, BULK, PRIORITIES
+
+    entries = [entry for entry in corpus if entry["name"] in topic_mix]
+    topic_weights = [topic_mix[entry["name"]] for entry in entries]
+    qualities = list(quality_mix)
+    quality_weights = [quality_mix[q] for q in qualities]
+
+    # Optional cap on concurrently running pipelines, to measure queueing
+    slots = threading.BoundedSemaphore(args.max_active) if args.max_active else None
+    records = []
+    records_lock = threading.Lock()
+
+    def user(user_id):
+        rng = random.Random(args.seed + user_id)
+        bulk = user_id >= users
+        for _ in range(args.requests_per_user):
+            entry = rng.choices(entries, weights=topic_weights)[0]
+            quality = args.bulk_quality if bulk else rng.choices(qualities, weights=quality_weights)[0]
+            priority = BULK if bulk else priority_for(quality)
+
+            submitted = time.perf_counter()
+            if slots:
+                slots.acquire()
+            started = time.perf_counter()
+            try:
+                result = generate_lesson(entry["topic"], entry["subject"], quality=quality, voice_preset="neutral", priority=priority)
+            except Exception as e:
+                result = {"success": False, "error": f"{type(e).__name__}: {e}", "attempts": 0, "timings": {}}
+            finally:
+                if slots:
+                    slots.release()
+            finished = time.perf_counter()
+
+            with records_lock:
+                records.append({
+                    "topic": entry["name"],
+                    "quality": quality,
+                    "priority": priority,
+                    "success": result["success"],
+                    "error": "" if result["success"] else str(result.get("error", ""))[-200:],
+                    "attempts": result.get("attempts", 0),
+                    "queue_delay": started - submitted,
+                    "latency": finished - submitted,
+                    "generate_time": result.get("timings", {}).get("generate"),
+                    "render_time": sum(result.get("timings", {}).get("render", [])),
+                    "render_queue_time": result.get("timings", {}).get("queue"),
+                })
+            if args.think_time:
+                time.sleep(rng.uniform(0, 2 * args.think_time))
+
+    sampler = HostSampler(args.sample_interval)
+    sampler.start()
+    stage_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users + args.bulk_users) as pool:
+        list(pool.map(user, range(users + args.bulk_users)))
+    elapsed = time.perf_counter() - stage_started
+    sampler.stop()
+
+    completed = [r for r in records if r["success"]]
+    latencies = [r["latency"] for r in records]
+    delays = [r["queue_delay"] for r in records]
+
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+
+    def mean(values):
+        values = [v for v in values if v is not None]
+        return round(sum(values) / len(values), 2) if values else None
+
+    # Interactive latency should stay flat however many bulk users there are
+    by_priority = {}
+    for priority in PRIORITIES:
+        of_class = [r for r in records if r["priority"] == priority]
+        if not of_class:
+            continue
+        class_latencies = [r["latency"] for r in of_class]
+        by_priority[priority] = {
+            "requests": len(of_class),
+            **{f"p{p}": rounded(percentile(class_latencies, p)) for p in (50, 95)},
+            "render_queue_p95": rounded(percentile([r["render_queue_time"] for r in of_class if r["render_queue_time"] is not None], 95)),
+        }
+
+    return {
+        "users": users,
+        "requests": len(records),
+        "completed": len(completed),
+        "failure_rate": round(1 - len(completed) / len(records), 3) if records else None,
+        "elapsed": round(elapsed, 2),
+        "throughput_per_min": round(len(completed) / elapsed * 60, 2) if elapsed else None,
+        "latency": {f"p{p}": rounded(percentile(latencies, p)) for p in (50, 90, 95, 99)},
+        "queue_delay": {f"p{p}": rounded(percentile(delays, p)) for p in (50, 95)},
+        "latency_by_priority": by_priority,
+        "mean_generate_time": mean(r["generate_time"] for r in records),
+        "mean_render_time": mean(r["render_time"] for r in records),
+        "mean_attempts": mean(r["attempts"] for r in records),
+        "errors": sorted({r["error"] for r in records if r["error"]})[:10],
+        "host": sampler.summary(),
+    }
+
+def print_stage(report):
+    print(f"\n--- {report['users']} users ---")
+    print(f"Requests: {report['requests']} | Completed: {report['completed']} | Failure rate: {report['failure_rate']}")
+    print(f"Elapsed: {report['elapsed']}s | Throughput: {report['throughput_per_min']} lessons/min")
+    print(f"Latency (s): {report['latency']}")
+    print(f"Queue delay (s): {report['queue_delay']}")
+    for priority, latency in report["latency_by_priority"].items():
+        print(f"  {priority:<9} {latency}")
+    print(f"Mean generate: {report['mean_generate_time']}s | Mean render: {report['mean_render_time']}s | Mean attempts: {report['mean_attempts']}")
+    host = report["host"]
+    print(f"Host CPU: {host['cpu_utilization']} | Memory: {host['memory_utilization']} | Load: {host['load_average_1m']} ({host['cpu_count']} CPUs)")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the lesson pipeline.")
+    parser.add_argument("--users", type=int, nargs="+", default=[5, 10, 20], help="Simultaneous users per stage")
+    parser.add_argument("--requests-per-user", type=int, default=1)
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests (s)")
+    parser.add_argument("--max-active", type=int, help="Cap on concurrently running pipelines (default: no cap, like Streamlit)")
+    parser.add_argument("--topics", help="Topic mix over corpus names, e.g. selection_sort=2,photosynthesis=1 (default: uniform)")
+    parser.add_argument("--qualities", default="Low=1", help="Quality mix, e.g. Low=0.7,Medium=0.3")
+    parser.add_argument("--bulk-users", type=int, default=0, help="Extra batch users rendering at bulk priority")
+    parser.add_argument("--bulk-quality", default="High", help="Quality of the batch users' lessons")
+    parser.add_argument("--llm-latency", type=float, default=3.0, help="Stub LLM base latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=2.0, help="Stub LLM extra random latency (s)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-quota-rate", type=float, default=0.0, help="Rate of ResourceExhausted errors")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Stub TTS latency per voiceover block (s)")
+    parser.add_argument("--tts-error-rate", type=float, default=0.0)
+    parser.add_argument("--upload-latency", type=float, default=1.0)
+    parser.add_argument("--upload-error-rate", type=float, default=0.0)
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    # The pipeline works relative to the repo (workspaces/, media/)
+    os.chdir(REPO_DIR)
+
+    # Renders run in subprocesses, so the TTS stub is configured via environment
+    os.environ["STUB_TTS_LATENCY"] = str(args.tts_latency)
+    os.environ["STUB_TTS_ERROR_RATE"] = str(args.tts_error_rate)
+
+    corpus = stubs.load_corpus(offline=True)
+    topic_mix = parse_mix(args.topics) if args.topics else {entry["name"]: 1.0 for entry in corpus}
+    quality_mix = parse_mix(args.qualities)
+
+    stubs.install_stub_llm(
+        corpus,
+        latency=args.llm_latency,
+        latency_jitter=args.llm_jitter,
+        error_rate=args.llm_error_rate,
+        quota_rate=args.llm_quota_rate,
+    )
+    stubs.install_stub_upload(latency=args.upload_latency, error_rate=args.upload_error_rate)
+
+    print("=" * 60)
+    print("Lesson Pipeline Load Test")
+    print("=" * 60)
+    print(f"Topics: {topic_mix} | Qualities: {quality_mix} | Max active: {args.max_active or 'unbounded'} | Bulk users: {args.bulk_users}")
+
+    reports = []
+    for users in args.users:
+        report = run_stage(users, args, corpus, topic_mix, quality_mix)
+        print_stage(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=4)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Anti Gravity - Offline Render Benchmark
+
+Replays the recorded scene corpus (benchmarks/corpus) through the
+generate -> render pipeline with stubbed Gemini and gTTS backends, and
+measures render wall time, CPU time, peak RSS and output size per quality
+tier. Results are compared against benchmarks/baseline.json; a scene and
+tier without baseline numbers fails the run until they are recorded with
+--update-baseline on the reference machine.
+
+Usage:
+    python bench_render.py                      # all scenes, all tiers
+    python bench_render.py --tiers Low --repeat 3
+    python bench_render.py --update-baseline    # record new baseline numbers
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+from datetime import datetime
+
+import stubs
+from backend import Studio, Editor, QUALITY_FLAGS, REPO_DIR
+from voiceover_backend import VoiceoverArtist
+
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+
+# Allowed relative slowdown/growth before a metric counts as a regression
+DEFAULT_THRESHOLDS = {
+    "wall_time": 0.15,
+    "cpu_time": 0.15,
+    "peak_rss_mb": 0.10,
+    "output_bytes": 0.10,
+}
+
+def bench_scene(entry, quality, repeat, encoding_profile=None):
+    """Generate (stubbed) and render one corpus scene, returning median metrics."""
+    code = VoiceoverArtist.generate_voiceover_scene(
+        entry["topic"], entry["subject"], quality=quality, use_sox=False
+    )
+    if code.startswith("# Error"):
+        return None, code
+
+    samples = []
+    for _ in range(repeat):
+        # Start every run cold so manim's animation cache does not skew results
+        Editor.remove_partial_files()
+        success, error, found_path, stats = Studio.render_scene(
+            code, f"bench_{entry['name']}", quality=quality, encoding_profile=encoding_profile
+        )
+        if not success:
+            return None, error
+        os.remove(found_path)
+
+        cpu_time = None
+        if stats["cpu_user"] is not None:
+            cpu_time = stats["cpu_user"] + stats["cpu_system"]
+        peak_rss_mb = None
+        if stats["peak_rss_kb"] is not None:
+            peak_rss_mb = stats["peak_rss_kb"] / 1024
+        samples.append({
+            "wall_time": stats["wall_time"] + stats["encode_time"],
+            "cpu_time": cpu_time,
+            "peak_rss_mb": peak_rss_mb,
+            "output_bytes": stats["output_bytes"],
+        })
+
+    Editor.remove_partial_files()
+    result = {}
+    for metric in DEFAULT_THRESHOLDS:
+        values = [s[metric] for s in samples if s[metric] is not None]
+        result[metric] = round(statistics.median(values), 3) if values else None
+    return result, ""
+
+def compare(results, baseline):
+    """
+    Compare results against the baseline.
+
+    Returns:
+        tuple: (regressions, missing) as human-readable lines; missing lists
+        the scenes and tiers the baseline has no numbers for
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    regressions = []
+    missing = []
+    for scene, tiers in results.items():
+        for quality, metrics in tiers.items():
+            expected = baseline.get("results", {}).get(scene, {}).get(quality)
+            if not expected:
+                missing.append(f"{scene} [{quality}]")
+                continue
+            for metric, value in metrics.items():
+                reference = expected.get(metric)
+                if value is None or not reference:
+                    continue
+                change = (value - reference) / reference
+                if change > thresholds[metric]:
+                    regressions.append(
+                        f"{scene} [{quality}] {metric}: {reference} -> {value} "
+                        f"(+{change:.0%}, limit +{thresholds[metric]:.0%})"
+                    )
+    return regressions, missing
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline render benchmark for Studio.")
+    parser.add_argument("--tiers", nargs="+", default=list(QUALITY_FLAGS), choices=list(QUALITY_FLAGS))
+    parser.add_argument("--scenes", nargs="+", help="Corpus entry names (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scene and tier (median is kept)")
+    parser.add_argument("--profile", help="Encoding profile for every tier (default: each tier's profile)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--output", help="Also write raw results to this JSON file")
+    args = parser.parse_args()
+
+    # Studio works relative to the repo (temp_topic.py, media/)
+    os.chdir(REPO_DIR)
+
+    corpus = stubs.load_corpus(offline=True)
+    if args.scenes:
+        corpus = [entry for entry in corpus if entry["name"] in args.scenes]
+    stubs.install_stub_llm(corpus)
+
+    print("=" * 60)
+    print("Offline Render Benchmark")
+    print("=" * 60)
+
+    results = {}
+    failures = []
+    for entry in corpus:
+        for quality in args.tiers:
+            print(f"\n{entry['name']} [{quality} {QUALITY_FLAGS[quality]}] ({entry['category']})...")
+            metrics, error = bench_scene(entry, quality, args.repeat, args.profile)
+            if metrics is None:
+                print(f"   ✗ Render failed: {error[-300:]}")
+                failures.append(f"{entry['name']} [{quality}]")
+                continue
+            results.setdefault(entry["name"], {})[quality] = metrics
+            print(
+                f"   wall {metrics['wall_time']}s | cpu {metrics['cpu_time']}s | "
+                f"rss {metrics['peak_rss_mb']} MB | {metrics['output_bytes']} bytes"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print("\n" + "=" * 60)
+    if args.update_baseline:
+        baseline.setdefault("thresholds", DEFAULT_THRESHOLDS)
+        baseline.setdefault("results", {})
+        for scene, tiers in results.items():
+            baseline["results"].setdefault(scene, {}).update(tiers)
+        baseline["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline updated: {args.baseline}")
+        return 1 if failures else 0
+
+    regressions, missing = compare(results, baseline)
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    # Nothing to compare against is not a pass
+    for line in missing:
+        print(f"NO BASELINE: {line} (record it with --update-baseline)")
+    for line in failures:
+        print(f"FAILED: {line}")
+    if not regressions and not missing and not failures:
+        print("No regressions against baseline.")
+    return 1 if regressions or missing or failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
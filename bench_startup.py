@@ -0,0 +1,109 @@
+"""
+Anti Gravity - Start-up Benchmark
+
+Measures what a cold start costs: the import time of the app's own modules
+and of the heavy third-party packages behind them (each in a fresh
+interpreter, via python -X importtime), and optionally how long each
+warm-up step (warmup.py) takes.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --repeat 5 --warmup --output startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# What `streamlit run app.py` imports before the first page is drawn
+APP_MODULES = ["backend", "voiceover_backend", "pipeline", "jobs"]
+# Heavy dependencies that should only load on first use
+HEAVY_MODULES = ["streamlit", "google.generativeai", "requests", "manim", "numpy"]
+
+def import_time(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative seconds, {heavy module: cumulative seconds} for
+        every heavy module it pulled in), or (None, error)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"
+
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2].strip()
+        cumulative[name] = max(cumulative.get(name, 0), int(parts[1]) / 1e6)
+    pulled_in = {name: cumulative[name] for name in HEAVY_MODULES if name in cumulative and name != module}
+    return cumulative.get(module), pulled_in
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure module import and warm-up times.")
+    parser.add_argument("--modules", nargs="+", default=APP_MODULES + HEAVY_MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module (median is kept)")
+    parser.add_argument("--warmup", action="store_true", help="Also time each warm-up step")
+    parser.add_argument("--output", help="Also write raw results to this JSON file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Start-up Benchmark")
+    print("=" * 60)
+    print(f"{'module':<22}{'import s':>10}  heavy modules pulled in")
+
+    results = {"imports": {}, "warmup": None}
+    for module in args.modules:
+        samples = []
+        pulled_in = {}
+        error = ""
+        for _ in range(args.repeat):
+            seconds, detail = import_time(module)
+            if seconds is None:
+                error = detail
+                break
+            samples.append(seconds)
+            pulled_in = detail
+        if error:
+            print(f"{module:<22}{'-':>10}  ✗ {error}")
+            results["imports"][module] = {"error": error}
+            continue
+        median = statistics.median(samples)
+        heavy = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in pulled_in.items()) or "none"
+        print(f"{module:<22}{median:>10.3f}  {heavy}")
+        results["imports"][module] = {"seconds": round(median, 4), "heavy": pulled_in}
+
+    if args.warmup:
+        print("\nWarm-up steps (cold, then again warm):")
+        sys.path.insert(0, REPO_DIR)
+        from warmup import run_warmup
+        cold = run_warmup()
+        warm = run_warmup()
+        for name, step in cold.items():
+            status = f"✗ {step['error']}" if step["error"] else ""
+            print(f"   {name:<14} {step['seconds']:>7.2f}s -> {warm[name]['seconds']:>6.2f}s {status}")
+        results["warmup"] = {"cold": cold, "warm": warm}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+from manim import *
+from manim_voiceover import VoiceoverScene
+from manim_voiceover.services.gtts import GTTSService
+
+class SceneTopic(VoiceoverScene):
+    def construct(self):
+        self.set_speech_service(
+            GTTSService(
+                lang="en",
+                tld="com",
+
+            )
+        )
+        self.camera.background_color = "#0b1d3a"
+
+        with self.voiceover(text="Have you ever wondered how plants make their own food? The answer is photosynthesis."):
+            title = Text("Photosynthesis", font_size=60, color=GREEN).to_edge(UP)
+            self.play(Write(title))
+            self.wait(2)
+            self.play(FadeOut(title))
+
+        with self.voiceover(text="Photosynthesis happens inside the leaf, in tiny structures called chloroplasts."):
+            leaf = Ellipse(width=5, height=2.5, color=GREEN, fill_opacity=0.6)
+            vein = Line(leaf.get_left(), leaf.get_right(), color=DARK_BROWN)
+            chloroplasts = VGroup(*[
+                Ellipse(width=0.6, height=0.3, color=YELLOW_E, fill_opacity=0.9).move_to([x, y, 0])
+                for x, y in [(-1.5, 0.5), (-0.5, -0.5), (0.5, 0.5), (1.5, -0.4)]
+            ])
+            self.play(Create(leaf), Create(vein))
+            self.play(FadeIn(chloroplasts))
+            self.wait(1)
+
+        with self.voiceover(text="The plant needs three ingredients: sunlight, water from the roots, and carbon dioxide from the air."):
+            plant = VGroup(leaf, vein, chloroplasts)
+            self.play(plant.animate.scale(0.6))
+            sun = Circle(radius=0.7, color=YELLOW, fill_opacity=1).to_corner(UL)
+            water = Text("H₂O", font_size=36, color=BLUE).next_to(plant, DOWN, buff=1.0)
+            co2 = Text("CO₂", font_size=36, color=GREY_B).next_to(plant, LEFT, buff=1.5)
+            self.play(FadeIn(sun))
+            self.play(FadeIn(water), FadeIn(co2))
+
+        with self.voiceover(text="Sunlight provides the energy. Water and carbon dioxide flow into the leaf."):
+            rays = VGroup(*[
+                Arrow(sun.get_center(), plant.get_top() + RIGHT * dx, color=YELLOW, buff=0.8)
+                for dx in [-0.8, 0, 0.8]
+            ])
+            self.play(Create(rays), run_time=1.5)
+            self.play(water.animate.move_to(plant.get_center()), run_time=1.5)
+            self.play(co2.animate.move_to(plant.get_center()), run_time=1.5)
+            self.play(FadeOut(water), FadeOut(co2))
+
+        with self.voiceover(text="Inside the chloroplasts, these ingredients are turned into glucose, a sugar the plant uses for energy."):
+            glucose = Text("Glucose", font_size=36, color=ORANGE).next_to(plant, RIGHT, buff=1.5)
+            arrow_out = Arrow(plant.get_right(), glucose.get_left(), color=ORANGE)
+            self.play(Indicate(chloroplasts, color=WHITE))
+            self.play(GrowArrow(arrow_out), Write(glucose))
+            self.wait(1)
+
+        with self.voiceover(text="Oxygen is released as a by-product, and that is the oxygen we breathe."):
+            oxygen = Text("O₂", font_size=36, color=TEAL).next_to(plant, UP, buff=1.0)
+            self.play(FadeIn(oxygen, shift=UP))
+            self.play(oxygen.animate.shift(UP * 0.8), run_time=2)
+            self.wait(1)
+
+        with self.voiceover(text="We can write the whole process as one equation."):
+            self.play(FadeOut(VGroup(plant, sun, rays, glucose, arrow_out, oxygen)))
+            equation = Text("6CO₂ + 6H₂O + light → C₆H₁₂O₆ + 6O₂", font_size=34)
+            self.play(Write(equation), run_time=2)
+            self.wait(2)
+
+        with self.voiceover(text="In summary, plants use light to turn carbon dioxide and water into sugar and oxygen."):
+            self.play(equation.animate.to_edge(UP))
+            summary = Text("Light + CO₂ + H₂O → Sugar + O₂", font_size=40, color=GREEN)
+            self.play(Write(summary))
+            self.wait(2)
+            self.play(FadeOut(equation), FadeOut(summary))
@@ -0,0 +1,78 @@
+from manim import *
+from manim_voiceover import VoiceoverScene
+from manim_voiceover.services.gtts import GTTSService
+
+class SceneTopic(VoiceoverScene):
+    def construct(self):
+        self.set_speech_service(
+            GTTSService(
+                lang="en",
+                tld="com",
+
+            )
+        )
+        self.camera.background_color = "#1e1e2e"
+
+        with self.voiceover(text="Welcome! Today we will explore the Pythagorean theorem, one of the most famous ideas in geometry."):
+            title = Text("Pythagorean Theorem", font_size=56, color=YELLOW).to_edge(UP)
+            self.play(Write(title))
+            self.wait(2)
+            self.play(FadeOut(title))
+
+        with self.voiceover(text="It applies to right triangles, which are triangles with one ninety degree angle."):
+            p1 = [-2, -1.5, 0]
+            p2 = [2, -1.5, 0]
+            p3 = [2, 1.5, 0]
+            triangle = Polygon(p1, p2, p3, color=WHITE)
+            right_angle = Square(side_length=0.3, color=WHITE).move_to([1.85, -1.35, 0])
+            self.play(Create(triangle))
+            self.play(Create(right_angle))
+
+        with self.voiceover(text="We call the two shorter sides a and b. The longest side, opposite the right angle, is the hypotenuse c."):
+            a_label = Text("a", font_size=36, color=BLUE).next_to(Line(p2, p3), RIGHT, buff=0.2)
+            b_label = Text("b", font_size=36, color=GREEN).next_to(Line(p1, p2), DOWN, buff=0.2)
+            c_label = Text("c", font_size=36, color=RED).next_to(Line(p1, p3).get_center(), UP + LEFT, buff=0.2)
+            self.play(Write(a_label), Write(b_label))
+            self.play(Write(c_label))
+            self.wait(1)
+
+        with self.voiceover(text="The theorem says that the square of the hypotenuse equals the sum of the squares of the other two sides."):
+            equation = Text("a² + b² = c²", font_size=48).to_edge(UP)
+            self.play(Write(equation))
+            self.wait(2)
+
+        with self.voiceover(text="We can picture this by building a square on each side of the triangle."):
+            square_a = Square(side_length=3, color=BLUE, fill_opacity=0.3).next_to(Line(p2, p3), RIGHT, buff=0)
+            square_b = Square(side_length=4, color=GREEN, fill_opacity=0.3).next_to(Line(p1, p2), DOWN, buff=0)
+            self.play(FadeOut(a_label), FadeOut(b_label))
+            self.play(Create(square_a), Create(square_b))
+            self.wait(1)
+
+        with self.voiceover(text="The two smaller squares together have exactly the same area as the square on the hypotenuse."):
+            group = VGroup(triangle, right_angle, square_a, square_b, c_label)
+            self.play(group.animate.scale(0.6).shift(LEFT * 2))
+            area_text = Text("9 + 16 = 25", font_size=40, color=YELLOW).shift(RIGHT * 3.5)
+            self.play(Write(area_text))
+            self.wait(2)
+
+        with self.voiceover(text="Let's try an example. If a is three and b is four, then c squared is nine plus sixteen, which is twenty five."):
+            self.play(FadeOut(group), FadeOut(area_text))
+            steps = VGroup(
+                Text("a = 3, b = 4", font_size=36),
+                Text("c² = 3² + 4²", font_size=36),
+                Text("c² = 9 + 16 = 25", font_size=36),
+            ).arrange(DOWN, buff=0.5)
+            for step in steps:
+                self.play(Write(step), run_time=1.0)
+                self.wait(0.5)
+
+        with self.voiceover(text="Taking the square root, the hypotenuse is five."):
+            answer = Text("c = 5", font_size=48, color=GREEN).next_to(steps, DOWN, buff=0.6)
+            self.play(Write(answer))
+            self.wait(2)
+
+        with self.voiceover(text="In summary, for any right triangle, a squared plus b squared equals c squared."):
+            self.play(FadeOut(steps), FadeOut(answer))
+            self.play(equation.animate.move_to(ORIGIN).scale(1.3))
+            self.wait(2)
+            self.play(FadeOut(equation))
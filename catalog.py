@@ -0,0 +1,359 @@
+"""
+Anti Gravity - Lesson Catalog
+
+Embedded SQLite record of every uploaded lesson: topic, subject, quality,
+voice, scene code and its hash, prompt version, model, render time, file
+size, attempts and the video URL. Studio.render_video writes a row after
+each successful upload; caching, reuse (topic_index.py), analytics and
+cleanup read it with indexed queries instead of listing the upload repo or
+walking files.
+
+A second table, renders, holds what every render attempt cost (CPU time,
+peak memory, disk writes, frames, output size), successful or not, tagged
+with the lesson's lineage, topic, quality tier and model. It is the data
+for sizing worker pools and instance types.
+
+The database lives at LESSON_CATALOG (default lessons.db in the repo) and is
+opened in WAL mode, one connection per thread, so the app, the job API and
+batch runs can share it.
+
+Usage:
+    python catalog.py stats
+    python catalog.py recent --limit 20
+    python catalog.py search "photosynthesis" --subject Biology
+    python catalog.py usage --days 7
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.getenv("LESSON_CATALOG", os.path.join(REPO_DIR, "lessons.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lessons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_url TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    topic_norm TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    quality TEXT NOT NULL,
+    voice_preset TEXT,
+    feedback TEXT,
+    lineage_id TEXT,
+    code TEXT,
+    code_hash TEXT,
+    prompt_version TEXT,
+    model TEXT,
+    encoding_profile TEXT,
+    render_seconds REAL,
+    file_bytes INTEGER,
+    attempts INTEGER,
+    topic_signature TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lessons_topic ON lessons (topic_norm, subject, quality);
+CREATE INDEX IF NOT EXISTS idx_lessons_subject ON lessons (subject, created_at);
+CREATE INDEX IF NOT EXISTS idx_lessons_code_hash ON lessons (code_hash, quality);
+CREATE INDEX IF NOT EXISTS idx_lessons_created ON lessons (created_at);
+CREATE TABLE IF NOT EXISTS renders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lineage_id TEXT,
+    topic TEXT,
+    subject TEXT,
+    quality TEXT NOT NULL,
+    model TEXT,
+    encoding_profile TEXT,
+    attempt INTEGER,
+    success INTEGER NOT NULL,
+    failure TEXT,
+    wall_seconds REAL,
+    cpu_user REAL,
+    cpu_system REAL,
+    peak_rss_kb INTEGER,
+    disk_write_bytes INTEGER,
+    frames INTEGER,
+    output_bytes INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_renders_quality ON renders (quality, created_at);
+CREATE INDEX IF NOT EXISTS idx_renders_lineage ON renders (lineage_id);
+"""
+
+# Columns callers may set through record_lesson
+COLUMNS = [
+    "video_url", "topic", "subject", "quality", "voice_preset", "feedback", "lineage_id",
+    "code", "code_hash", "prompt_version", "model", "encoding_profile", "render_seconds",
+    "file_bytes", "attempts",
+]
+
+# Columns returned by listings; code is large and fetched with get_lesson
+SUMMARY_COLUMNS = "id, video_url, topic, subject, quality, voice_preset, feedback, lineage_id, " \
+    "code_hash, prompt_version, model, encoding_profile, render_seconds, file_bytes, attempts, created_at"
+
+# Columns callers may set through record_render
+RENDER_COLUMNS = [
+    "lineage_id", "topic", "subject", "quality", "model", "encoding_profile", "attempt", "success",
+    "failure", "wall_seconds", "cpu_user", "cpu_system", "peak_rss_kb", "disk_write_bytes", "frames",
+    "output_bytes",
+]
+
+_local = threading.local()
+
+def code_hash(code):
+    """Stable hash of scene code, used to find identical renders."""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+def normalize_topic(topic):
+    return re.sub(r"\s+", " ", str(topic).casefold()).strip()
+
+def connect(path=None):
+    """This thread's connection to the catalog, created (with the schema) on first use."""
+    path = path or CATALOG_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    connection = connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        connections[path] = connection
+    return connection
+
+def _rows(cursor):
+    return [dict(row) for row in cursor.fetchall()]
+
+def record_lesson(**fields):
+    """
+    Add an uploaded lesson to the catalog.
+
+    Args:
+        fields: Values for COLUMNS; video_url, topic, subject and quality
+            are required, code_hash is derived from code when omitted
+
+    Returns:
+        int: The new lesson's id, or None if it could not be written
+    """
+    unknown = set(fields) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown catalog columns: {', '.join(sorted(unknown))}")
+    if fields.get("code") and not fields.get("code_hash"):
+        fields["code_hash"] = code_hash(fields["code"])
+    fields["topic_norm"] = normalize_topic(fields.get("topic", ""))
+    fields["created_at"] = time.time()
+
+    names = list(fields)
+    try:
+        connection = connect()
+        with connection:
+            cursor = connection.execute(
+                f"INSERT INTO lessons ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                [fields[name] for name in names],
+            )
+        return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"Could not record lesson in catalog: {e}")
+        return None
+
+def record_render(**fields):
+    """
+    Add one render attempt's resource usage to the catalog.
+
+    Args:
+        fields: Values for RENDER_COLUMNS; quality and success are required
+
+    Returns:
+        int: The new row's id, or None if it could not be written
+    """
+    unknown = set(fields) - set(RENDER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown render columns: {', '.join(sorted(unknown))}")
+    fields["success"] = int(bool(fields.get("success")))
+    fields["created_at"] = time.time()
+
+    names = list(fields)
+    try:
+        connection = connect()
+        with connection:
+            cursor = connection.execute(
+                f"INSERT INTO renders ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                [fields[name] for name in names],
+            )
+        return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"Could not record render usage in catalog: {e}")
+        return None
+
+def renders_for(lineage_id):
+    """Every recorded render attempt of one lesson lineage, oldest first."""
+    return _rows(connect().execute("SELECT * FROM renders WHERE lineage_id = ? ORDER BY id", (lineage_id,)))
+
+def first_renders_since(timestamp):
+    """Model, subject, quality, outcome and time of every lesson's first render attempt after timestamp, oldest first."""
+    return _rows(connect().execute(
+        "SELECT model, subject, quality, success, failure, wall_seconds, created_at FROM renders "
+        "WHERE attempt = 1 AND created_at >= ? ORDER BY created_at",
+        (timestamp,),
+    ))
+
+def usage_summary(since=None):
+    """
+    Render cost per quality tier and model.
+
+    Args:
+        since: Only count renders after this timestamp
+
+    Returns:
+        list: dicts with quality, model, renders, failures, averages of
+        wall, CPU (user + system) and frames, CPU seconds per rendered
+        frame, peak RSS (max and average) and disk and output bytes
+    """
+    return _rows(connect().execute(
+        "SELECT quality, model, COUNT(*) AS renders, SUM(1 - success) AS failures, "
+        "AVG(wall_seconds) AS avg_wall_seconds, AVG(cpu_user + cpu_system) AS avg_cpu_seconds, "
+        "SUM(CASE WHEN frames > 0 THEN cpu_user + cpu_system END) / NULLIF(SUM(frames), 0) AS cpu_seconds_per_frame, "
+        "AVG(frames) AS avg_frames, MAX(peak_rss_kb) AS max_peak_rss_kb, AVG(peak_rss_kb) AS avg_peak_rss_kb, "
+        "AVG(disk_write_bytes) AS avg_disk_write_bytes, AVG(output_bytes) AS avg_output_bytes "
+        "FROM renders WHERE created_at >= ? GROUP BY quality, model ORDER BY quality, model",
+        (since or 0,),
+    ))
+
+def get_lesson(lesson_id):
+    """Full row of one lesson, including its code, or None."""
+    row = connect().execute("SELECT * FROM lessons WHERE id = ?", (lesson_id,)).fetchone()
+    return dict(row) if row else None
+
+def find_by_code_hash(hash_value, quality=None, encoding_profile=None):
+    """Newest lesson rendered from exactly this code, or None (also when the catalog is unreadable)."""
+    query = f"SELECT {SUMMARY_COLUMNS} FROM lessons WHERE code_hash = ?"
+    params = [hash_value]
+    if quality:
+        query += " AND quality = ?"
+        params.append(quality)
+    if encoding_profile:
+        query += " AND encoding_profile = ?"
+        params.append(encoding_profile)
+    try:
+        row = connect().execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+    except sqlite3.Error as e:
+        print(f"Could not read lesson catalog: {e}")
+        return None
+    return dict(row) if row else None
+
+def find_by_topic(topic, subject=None, quality=None, limit=20):
+    """Lessons whose topic matches exactly after case and whitespace folding, newest first."""
+    query = f"SELECT {SUMMARY_COLUMNS} FROM lessons WHERE topic_norm = ?"
+    params = [normalize_topic(topic)]
+    if subject:
+        query += " AND subject = ?"
+        params.append(subject)
+    if quality:
+        query += " AND quality = ?"
+        params.append(quality)
+    return _rows(connect().execute(query + " ORDER BY id DESC LIMIT ?", params + [limit]))
+
+def search(text, subject=None, limit=20):
+    """Lessons whose topic contains text, newest first."""
+    query = f"SELECT {SUMMARY_COLUMNS} FROM lessons WHERE topic_norm LIKE ?"
+    params = [f"%{normalize_topic(text)}%"]
+    if subject:
+        query += " AND subject = ?"
+        params.append(subject)
+    return _rows(connect().execute(query + " ORDER BY id DESC LIMIT ?", params + [limit]))
+
+def recent(limit=20, subject=None):
+    """Newest lessons, optionally for one subject."""
+    if subject:
+        cursor = connect().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM lessons WHERE subject = ? ORDER BY created_at DESC LIMIT ?",
+            (subject, limit),
+        )
+    else:
+        cursor = connect().execute(f"SELECT {SUMMARY_COLUMNS} FROM lessons ORDER BY created_at DESC LIMIT ?", (limit,))
+    return _rows(cursor)
+
+def older_than(timestamp, limit=1000):
+    """Lessons created before timestamp, oldest first (for cleanup)."""
+    return _rows(connect().execute(
+        f"SELECT {SUMMARY_COLUMNS} FROM lessons WHERE created_at < ? ORDER BY created_at LIMIT ?",
+        (timestamp, limit),
+    ))
+
+def lessons_after(lesson_id, columns="id, topic, subject, quality, voice_preset, feedback, video_url, lineage_id, topic_signature, created_at"):
+    """Lessons with an id above lesson_id, in id order (for incremental indexes)."""
+    return _rows(connect().execute(f"SELECT {columns} FROM lessons WHERE id > ? ORDER BY id", (lesson_id,)))
+
+def set_topic_signatures(signatures):
+    """Store topic_index signatures, given as {lesson_id: JSON-serializable signature}."""
+    connection = connect()
+    with connection:
+        connection.executemany(
+            "UPDATE lessons SET topic_signature = ? WHERE id = ?",
+            [(json.dumps(signature), lesson_id) for lesson_id, signature in signatures.items()],
+        )
+
+def delete_lessons(lesson_ids):
+    connection = connect()
+    with connection:
+        connection.executemany("DELETE FROM lessons WHERE id = ?", [(lesson_id,) for lesson_id in lesson_ids])
+
+def stats():
+    """Totals overall and per quality tier."""
+    connection = connect()
+    total = dict(connection.execute(
+        "SELECT COUNT(*) AS lessons, COALESCE(SUM(file_bytes), 0) AS bytes, MIN(created_at) AS first, MAX(created_at) AS last FROM lessons"
+    ).fetchone())
+    total["by_quality"] = _rows(connection.execute(
+        "SELECT quality, COUNT(*) AS lessons, AVG(render_seconds) AS avg_render_seconds, "
+        "AVG(file_bytes) AS avg_bytes, AVG(attempts) AS avg_attempts FROM lessons GROUP BY quality"
+    ))
+    total["by_subject"] = _rows(connection.execute(
+        "SELECT subject, COUNT(*) AS lessons FROM lessons GROUP BY subject ORDER BY lessons DESC LIMIT 10"
+    ))
+    return total
+
+def _print_rows(rows):
+    for row in rows:
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created_at"]))
+        print(f"#{row['id']:<6} {created}  {row['topic']} ({row['subject']}, {row['quality']})  {row['video_url']}")
+    if not rows:
+        print("No lessons.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the lesson catalog.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Totals per quality tier and subject")
+    recent_parser = subparsers.add_parser("recent", help="Newest lessons")
+    recent_parser.add_argument("--limit", type=int, default=20)
+    recent_parser.add_argument("--subject")
+    search_parser = subparsers.add_parser("search", help="Lessons whose topic contains text")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--subject")
+    search_parser.add_argument("--limit", type=int, default=20)
+    usage_parser = subparsers.add_parser("usage", help="Render cost per quality tier and model")
+    usage_parser.add_argument("--days", type=float, help="Only renders from the last N days")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(stats(), indent=4))
+    elif args.command == "usage":
+        since = time.time() - args.days * 86400 if args.days else None
+        print(json.dumps(usage_summary(since), indent=4))
+    elif args.command == "recent":
+        _print_rows(recent(args.limit, args.subject))
+    else:
+        _print_rows(search(args.text, args.subject, args.limit))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Anti Gravity - Clip Library
+
+Fixed segments (the Anti Gravity teaching-assistant intro and the closing
+card from assistant_intro.py) rendered once and spliced onto lessons
+instead of being rendered with every one of them.
+
+A clip is rendered per quality tier, voice preset and encoding profile,
+through the same Studio.render_scene path as lessons, so it comes out with
+the lesson's resolution, frame rate and codecs. It is stored under
+CLIP_CACHE_DIR named after a hash of everything that goes into it (the
+clip's source file, the voice's SoX effects, the tier and the profile's
+settings), so editing assistant_intro.py or a voice preset simply produces
+new clips. Splicing uses ffmpeg's concat demuxer with stream copy; a clip
+whose streams do not match the lesson's (checked with ffprobe) is skipped
+rather than re-encoding the lesson.
+
+Set LESSON_INTRO and LESSON_OUTRO to clip names (e.g. LESSON_INTRO=intro)
+to splice them onto every catalogued lesson; both are off by default. The
+warm-up pre-renders the configured clips for CLIP_WARM_QUALITIES.
+
+Usage:
+    python clips.py build --quality Low Medium --voice teaching_assistant
+    python clips.py list
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+
+from encoding import ENCODING_PROFILES, get_profile
+from janitor import release_job
+from process_utils import run_measured
+from metrics import cache_lookup
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CLIP_CACHE_DIR = os.path.abspath(os.getenv("CLIP_CACHE_DIR", os.path.join(REPO_DIR, "clip_cache")))
+
+# Clip name -> module and scene class it is rendered from
+CLIPS = {
+    "intro": {"module": "assistant_intro", "scene": "AssistantIntro"},
+    "outro": {"module": "assistant_intro", "scene": "AssistantOutro"},
+}
+
+LESSON_INTRO = os.getenv("LESSON_INTRO", "")
+LESSON_OUTRO = os.getenv("LESSON_OUTRO", "")
+CLIP_WARM_QUALITIES = [q for q in os.getenv("CLIP_WARM_QUALITIES", "Low,Medium").split(",") if q]
+DEFAULT_VOICE_PRESET = "teaching_assistant"
+
+# Stream properties that must match for a stream-copy concat
+MATCH_FIELDS = ["codec_type", "codec_name", "width", "height", "pix_fmt", "r_frame_rate", "sample_rate", "channels"]
+
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+def _voice_effects(voice_preset):
+    from voiceover_backend import VOICE_PRESETS
+    return VOICE_PRESETS.get(voice_preset, VOICE_PRESETS["neutral"])["sox_effects"]
+
+def clip_code(name, voice_preset):
+    """The SceneTopic script that renders a clip in a voice."""
+    clip = CLIPS[name]
+    return (
+        f"from {clip['module']} import {clip['scene']}\n"
+        f"\n"
+        f"class SceneTopic({clip['scene']}):\n"
+        f"    sox_effects = {_voice_effects(voice_preset)!r}\n"
+    )
+
+def clip_key(name, quality, voice_preset, profile_name):
+    """Content address of a clip: changes whenever anything that goes into it does."""
+    clip = CLIPS[name]
+    with open(os.path.join(REPO_DIR, f"{clip['module']}.py"), "rb") as f:
+        source = hashlib.sha256(f.read()).hexdigest()
+    identity = [source, clip_code(name, voice_preset), quality, profile_name, ENCODING_PROFILES.get(profile_name)]
+    digest = hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f"{name}-{quality.lower()}-{digest}"
+
+def clip_path(name, quality, voice_preset, profile_name):
+    return os.path.join(CLIP_CACHE_DIR, f"{clip_key(name, quality, voice_preset, profile_name)}.mp4")
+
+def get_clip(name, quality, voice_preset=DEFAULT_VOICE_PRESET, profile_name=None):
+    """
+    Path of a rendered clip, rendering it first if it is not in the library.
+
+    Returns:
+        tuple: (success, error, path)
+    """
+    from backend import Studio
+
+    if name not in CLIPS:
+        return False, f"Unknown clip '{name}'; known clips: {', '.join(CLIPS)}", None
+    profile_name, _ = get_profile(quality, profile_name)
+    path = clip_path(name, quality, voice_preset, profile_name)
+    cache_lookup("clips", os.path.exists(path))
+    if os.path.exists(path):
+        return True, "", path
+
+    # One build per clip at a time; other callers wait for it
+    with _build_locks_guard:
+        lock = _build_locks.setdefault(path, threading.Lock())
+    with lock:
+        if os.path.exists(path):
+            return True, "", path
+        print(f"Rendering clip '{name}' ({quality}, {voice_preset}, {profile_name})...")
+        workdir = Studio.create_workspace(f"clip-{os.path.basename(path)[:-4]}")
+        try:
+            success, error, found_path, _ = Studio.render_scene(
+                clip_code(name, voice_preset), "clip.mp4", quality=quality, workdir=workdir,
+                encoding_profile=profile_name
+            )
+            if not success:
+                return False, f"Could not render clip '{name}': {error}", None
+            os.makedirs(CLIP_CACHE_DIR, exist_ok=True)
+            temp = f"{path}.{os.getpid()}.tmp"
+            shutil.copyfile(found_path, temp)
+            os.replace(temp, path)
+        finally:
+            release_job(workdir)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return True, "", path
+
+def stream_signature(path):
+    """The MATCH_FIELDS of every stream in a video, or None if ffprobe fails."""
+    command = [
+        "ffprobe", "-v", "error", "-show_entries", f"stream={','.join(MATCH_FIELDS)}", "-of", "json", path,
+    ]
+    returncode, stdout, _, _ = run_measured(command, shell=False)
+    if returncode != 0:
+        return None
+    try:
+        streams = json.loads(stdout).get("streams", [])
+    except json.JSONDecodeError:
+        return None
+    return [{field: stream.get(field) for field in MATCH_FIELDS} for stream in streams]
+
+def concat(paths, output_path, faststart=False):
+    """
+    Join videos with identical stream layouts by stream copy.
+
+    Returns:
+        tuple: (success, error, stats) with run_measured's stats
+    """
+    list_path = f"{output_path}.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    command = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy"]
+    if faststart:
+        command += ["-movflags", "+faststart"]
+    returncode, _, stderr, stats = run_measured(command + [output_path], shell=False)
+    os.remove(list_path)
+    if returncode != 0:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return False, stderr, stats
+    return True, "", stats
+
+def splice_clips(video_path, quality, voice_preset, profile_name, intro=None, outro=None):
+    """
+    Put the intro before and the outro after a rendered lesson, in place.
+
+    Args:
+        intro, outro: Clip names; default to LESSON_INTRO and LESSON_OUTRO
+
+    Returns:
+        tuple: (spliced, stats) where spliced lists the clips added and stats
+        is the concat's run_measured stats (None when nothing was done).
+        Problems are printed and leave the lesson as it was.
+    """
+    intro = LESSON_INTRO if intro is None else intro
+    outro = LESSON_OUTRO if outro is None else outro
+    if not intro and not outro:
+        return [], None
+
+    signature = stream_signature(video_path)
+    parts, spliced = [], []
+    for position, name in (("intro", intro), ("outro", outro)):
+        if not name:
+            continue
+        success, error, path = get_clip(name, quality, voice_preset, profile_name)
+        if not success:
+            print(f"Skipping the {position}: {error}")
+            continue
+        if signature is None or stream_signature(path) != signature:
+            print(f"Skipping the {position}: clip '{name}' streams do not match the lesson's")
+            continue
+        parts.append((position, path))
+        spliced.append(name)
+    if not parts:
+        return [], None
+
+    paths = [path for position, path in parts if position == "intro"] + [video_path]
+    paths += [path for position, path in parts if position == "outro"]
+    root, ext = os.path.splitext(video_path)
+    joined_path = f"{root}.spliced{ext}"
+    _, profile = get_profile(quality, profile_name)
+    success, error, stats = concat(paths, joined_path, faststart=profile.get("faststart", False))
+    if not success:
+        print(f"Could not splice clips onto the lesson: {error}")
+        return [], stats
+    os.replace(joined_path, video_path)
+    return spliced, stats
+
+def prebuild(qualities=CLIP_WARM_QUALITIES, voice_presets=(DEFAULT_VOICE_PRESET,), names=None):
+    """
+    Render the clips lessons will need ahead of time.
+
+    Args:
+        names: Clip names; defaults to the configured LESSON_INTRO/LESSON_OUTRO
+
+    Returns:
+        dict: get_clip's (success, error, path) per (name, quality, voice_preset)
+    """
+    names = names if names is not None else [name for name in (LESSON_INTRO, LESSON_OUTRO) if name]
+    results = {}
+    for name in names:
+        for quality in qualities:
+            for voice_preset in voice_presets:
+                results[(name, quality, voice_preset)] = get_clip(name, quality, voice_preset)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render and inspect the clip library.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Render clips that are not in the library yet")
+    build.add_argument("--clip", nargs="+", default=list(CLIPS), choices=list(CLIPS))
+    build.add_argument("--quality", nargs="+", default=["Low", "Medium", "High"])
+    build.add_argument("--voice", nargs="+", default=[DEFAULT_VOICE_PRESET])
+    subparsers.add_parser("list", help="Show the clips in the library")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        names = sorted(os.listdir(CLIP_CACHE_DIR)) if os.path.isdir(CLIP_CACHE_DIR) else []
+        for name in names:
+            size = os.path.getsize(os.path.join(CLIP_CACHE_DIR, name))
+            print(f"{name}  {size / 1024 / 1024:.1f} MB")
+        if not names:
+            print(f"No clips in {CLIP_CACHE_DIR}")
+        return 0
+
+    failed = False
+    for (name, quality, voice_preset), (success, error, path) in prebuild(args.quality, args.voice, args.clip).items():
+        print(f"{name:6} {quality:6} {voice_preset:20} {path if success else error}")
+        failed = failed or not success
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Anti Gravity - Encoding Profiles
+
+Named output encoding profiles, selectable per quality tier. Manim only
+exposes resolution and frame rate on its command line, so a profile's frame
+rate is passed to Manim (fewer frames to render) and its codec settings are
+applied by a final ffmpeg pass over Manim's output.
+
+Tier defaults can be overridden with ENCODING_PROFILE_LOW,
+ENCODING_PROFILE_MEDIUM and ENCODING_PROFILE_HIGH.
+
+When Manim's partial movie files are kept (lesson workspaces), the profile is
+applied per animation instead of to the whole video: each partial movie is
+encoded once and cached, and the lesson is joined from the encoded segments
+with stream copy. A feedback version then only encodes the animations that
+changed.
+"""
+
+import os
+import re
+import time
+
+from process_utils import run_measured, add_usage
+
+# codec "copy" keeps Manim's streams and only rewrites the container.
+# frame_rate None keeps the tier's native rate (15/30/60 fps).
+ENCODING_PROFILES = {
+    "manim_default": {
+        "description": "Manim's own encoder settings, no extra pass",
+        "codec": None,
+    },
+    "faststart": {
+        "description": "Manim's streams, moov atom moved to the front for progressive playback",
+        "codec": "copy",
+        "faststart": True,
+    },
+    "preview": {
+        "description": "Fast, small preview for flat vector content",
+        "codec": "libx264",
+        "preset": "veryfast",
+        "crf": 30,
+        "tune": "animation",
+        "gop": 300,
+        "frame_rate": 15,
+        "audio_bitrate": "64k",
+        "faststart": True,
+    },
+    "compact": {
+        "description": "Long GOP and animation tuning to shrink static narration holds",
+        "codec": "libx264",
+        "preset": "faster",
+        "crf": 27,
+        "tune": "animation",
+        "gop": 300,
+        "frame_rate": 24,
+        "audio_bitrate": "96k",
+        "faststart": True,
+    },
+    "balanced": {
+        "description": "Default delivery quality",
+        "codec": "libx264",
+        "preset": "medium",
+        "crf": 23,
+        "tune": "animation",
+        "gop": 250,
+        "frame_rate": None,
+        "audio_bitrate": "128k",
+        "faststart": True,
+    },
+    "hevc_compact": {
+        "description": "HEVC for the smallest files; slower to encode and not played everywhere",
+        "codec": "libx265",
+        "preset": "fast",
+        "crf": 28,
+        "gop": 300,
+        "frame_rate": 30,
+        "audio_bitrate": "96k",
+        "faststart": True,
+    },
+}
+
+QUALITY_PROFILES = {
+    "Low": os.getenv("ENCODING_PROFILE_LOW", "preview"),
+    "Medium": os.getenv("ENCODING_PROFILE_MEDIUM", "compact"),
+    "High": os.getenv("ENCODING_PROFILE_HIGH", "balanced"),
+}
+
+def get_profile(quality, profile_name=None):
+    """
+    Resolve the encoding profile for a quality tier.
+
+    Args:
+        quality: Quality tier (Low/Medium/High)
+        profile_name: Explicit profile name, overriding the tier default
+
+    Returns:
+        tuple: (name, profile dict)
+    """
+    name = profile_name or QUALITY_PROFILES.get(quality, "manim_default")
+    if name not in ENCODING_PROFILES:
+        print(f"Unknown encoding profile '{name}', using manim_default")
+        name = "manim_default"
+    return name, ENCODING_PROFILES[name]
+
+def ffmpeg_args(profile, video_only=False):
+    """Build the ffmpeg output arguments for a profile."""
+    codec = profile.get("codec")
+    if codec == "copy":
+        args = ["-c", "copy"]
+    else:
+        args = ["-c:v", codec, "-pix_fmt", "yuv420p"]
+        if profile.get("preset"):
+            args += ["-preset", profile["preset"]]
+        if profile.get("crf") is not None:
+            args += ["-crf", str(profile["crf"])]
+        if profile.get("tune") and codec == "libx264":
+            args += ["-tune", profile["tune"]]
+        if profile.get("gop"):
+            args += ["-g", str(profile["gop"])]
+        if profile.get("frame_rate"):
+            args += ["-r", str(profile["frame_rate"])]
+        if codec == "libx265":
+            # Needed for HEVC playback in Safari/QuickTime
+            args += ["-tag:v", "hvc1"]
+        if video_only:
+            return args + ["-an"]
+        args += ["-c:a", "aac", "-b:a", profile.get("audio_bitrate", "128k")]
+    if profile.get("faststart"):
+        args += ["-movflags", "+faststart"]
+    return args
+
+def transcode(input_path, output_path, profile):
+    """
+    Re-encode a rendered video with a profile's settings.
+
+    Returns:
+        tuple: (success, error, stats) with run_measured's stats
+    """
+    command = ["ffmpeg", "-y", "-loglevel", "error", "-i", input_path] + ffmpeg_args(profile) + [output_path]
+    returncode, _, stderr, stats = run_measured(command, shell=False)
+    if returncode != 0:
+        return False, stderr, stats
+    return True, "", stats
+
+def apply_profile(video_path, profile, usage=None):
+    """
+    Encode video_path in place with the given profile.
+
+    Args:
+        usage: Optional dict the ffmpeg run's resource usage is added to
+            (see process_utils.add_usage)
+
+    Returns:
+        tuple: (success, error, encode_time)
+    """
+    if not profile.get("codec"):
+        return True, "", 0.0
+
+    root, ext = os.path.splitext(video_path)
+    encoded_path = f"{root}.encoded{ext}"
+    success, error, stats = transcode(video_path, encoded_path, profile)
+    if usage is not None:
+        add_usage(usage, stats)
+    if not success:
+        if os.path.exists(encoded_path):
+            os.remove(encoded_path)
+        return False, error, stats["wall_time"]
+    os.replace(encoded_path, video_path)
+    return True, "", stats["wall_time"]
+
+def read_partial_list(list_path):
+    """Partial movie files, in play order, from Manim's partial_movie_file_list.txt."""
+    paths = []
+    with open(list_path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = re.match(r"\s*file\s+'(?:file:)?(.*)'\s*$", line)
+            if match:
+                paths.append(match.group(1).replace("'\\''", "'"))
+    return paths
+
+def apply_profile_segmented(video_path, list_path, segment_dir, profile, usage=None):
+    """
+    Encode video_path in place by encoding each partial movie file once.
+
+    Partial movies are named after Manim's animation hash, so an encoded
+    segment stays valid for as long as its source exists. Manim's own video
+    supplies the audio track.
+
+    Args:
+        video_path: Manim's combined output
+        list_path: Manim's partial_movie_file_list.txt for that output
+        segment_dir: Where encoded segments are cached
+        profile: Encoding profile
+        usage: Optional dict the resource usage of every ffmpeg run is
+            added to (see process_utils.add_usage)
+
+    Returns:
+        tuple: (success, error, encode_time, stats) with stats counting
+        encoded and reused segments
+    """
+    started = time.perf_counter()
+    stats = {"segments": 0, "encoded": 0, "reused": 0}
+    if not profile.get("codec") or profile["codec"] == "copy":
+        success, error, encode_time = apply_profile(video_path, profile, usage=usage)
+        return success, error, encode_time, stats
+
+    try:
+        partials = read_partial_list(list_path)
+    except OSError as e:
+        return False, f"Could not read partial movie list: {e}", time.perf_counter() - started, stats
+    if not partials:
+        return False, "Partial movie list is empty", time.perf_counter() - started, stats
+    os.makedirs(segment_dir, exist_ok=True)
+
+    segments = []
+    for partial in partials:
+        name = os.path.basename(partial)
+        segment = os.path.join(segment_dir, name)
+        # uncached_* partials are rendered afresh every time under the same names
+        if name.startswith("uncached") or not os.path.exists(segment):
+            temp = f"{segment}.tmp.mp4"
+            command = ["ffmpeg", "-y", "-loglevel", "error", "-i", partial] + ffmpeg_args(profile, video_only=True) + [temp]
+            returncode, _, stderr, run_stats = run_measured(command, shell=False)
+            if usage is not None:
+                add_usage(usage, run_stats)
+            if returncode != 0:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                return False, stderr, time.perf_counter() - started, stats
+            os.replace(temp, segment)
+            stats["encoded"] += 1
+        else:
+            stats["reused"] += 1
+        segments.append(segment)
+    stats["segments"] = len(segments)
+
+    concat_list = os.path.join(segment_dir, "segments.txt")
+    with open(concat_list, "w", encoding="utf-8") as f:
+        for segment in segments:
+            escaped = segment.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    root, ext = os.path.splitext(video_path)
+    joined_path = f"{root}.encoded{ext}"
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", concat_list,
+        "-i", video_path,
+        "-map", "0:v", "-map", "1:a?",
+        "-c:v", "copy", "-c:a", "aac", "-b:a", profile.get("audio_bitrate", "128k"),
+    ]
+    if profile.get("faststart"):
+        command += ["-movflags", "+faststart"]
+    returncode, _, stderr, run_stats = run_measured(command + [joined_path], shell=False)
+    if usage is not None:
+        add_usage(usage, run_stats)
+    if returncode != 0:
+        if os.path.exists(joined_path):
+            os.remove(joined_path)
+        return False, stderr, time.perf_counter() - started, stats
+    os.replace(joined_path, video_path)
+
+    # Drop segments whose partial movie Manim has evicted from its cache
+    partial_dir = os.path.dirname(partials[0])
+    for name in os.listdir(segment_dir):
+        if name.endswith(".mp4") and not os.path.exists(os.path.join(partial_dir, name)):
+            os.remove(os.path.join(segment_dir, name))
+    return True, "", time.perf_counter() - started, stats
@@ -0,0 +1,403 @@
+"""
+Anti Gravity - Media Janitor
+
+Background thread that keeps render artifacts (Manim media, the shared text
+SVG cache, job workspaces) under configurable disk quotas. Entries are evicted
+least-recently-used first, anything past its maximum age is dropped, and
+paths registered as belonging to in-flight jobs are never touched. Those
+paths are leased on disk (LEASE_DIR), so a janitor in one process also
+leaves alone the jobs of the app, API, batch runs and workers beside it.
+
+Usage:
+    python janitor.py            # print disk usage and run one sweep
+    python janitor.py --dry-run  # show what would be evicted
+"""
+
+import os
+import sys
+import stat
+import time
+import shutil
+import socket
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+from manim_runner import TEXT_CACHE_DIR, TEXT_CACHE_MB
+from streaming import STREAMS_DIR
+from metrics import register_collector
+
+MB = 1024 * 1024
+
+# Lesson lineage workspaces keep Manim's animation cache for feedback rounds
+LINEAGE_TTL_HOURS = float(os.getenv("LINEAGE_TTL_HOURS", "2"))
+
+# Artifact areas under management. "unit" decides what one evictable entry is:
+# a single file, or each direct child directory (one per script/job).
+ARTIFACT_AREAS = {
+    # Shared by every render (see manim_runner.py); renders touch the entries they use
+    "texts": {"path": TEXT_CACHE_DIR, "unit": "file", "quota_mb": TEXT_CACHE_MB, "max_age_hours": 24 * 30},
+    "images": {"path": os.path.join("media", "images"), "unit": "dir", "quota_mb": 100, "max_age_hours": 24},
+    "voiceovers": {"path": os.path.join("media", "voiceovers"), "unit": "file", "quota_mb": 200, "max_age_hours": 24 * 7},
+    "videos": {"path": os.path.join("media", "videos"), "unit": "dir", "quota_mb": 500, "max_age_hours": 6},
+    "workspaces": {"path": "workspaces", "unit": "dir", "quota_mb": 1024, "max_age_hours": LINEAGE_TTL_HOURS},
+    # Stream playlists written by app.py; their segments live in storage
+    "streams": {"path": STREAMS_DIR, "unit": "file", "quota_mb": 10, "max_age_hours": 6},
+}
+
+# Temporary files younger than this are assumed to be mid-write
+PARTIAL_WRITE_GRACE = 3600
+
+# Combined quota across all areas, applied after the per-area quotas
+TOTAL_QUOTA_MB = int(os.getenv("MEDIA_QUOTA_MB", "1536"))
+SWEEP_INTERVAL = int(os.getenv("JANITOR_INTERVAL", "60"))
+
+# ===== In-flight job registry =====
+
+# The app, the job API, batch runs and render workers each run a janitor over
+# the same directories, so in-flight paths are also leased on disk: one file
+# per path and process, holding the path, refreshed while the job runs.
+LEASE_DIR = os.getenv("JANITOR_LEASE_DIR", "janitor_leases")
+LEASE_REFRESH_SECONDS = 60
+# A lease not refreshed for this long belongs to a process that died
+LEASE_STALE_SECONDS = int(os.getenv("JANITOR_LEASE_STALE_SECONDS", "300"))
+
+_active_paths = {}
+_active_lock = threading.Lock()
+_lease_owner = f"{socket.gethostname()}-{os.getpid()}"
+_refresher = None
+
+def _lease_path(path):
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(LEASE_DIR, f"{digest}-{_lease_owner}.lease")
+
+def _write_lease(path):
+    try:
+        os.makedirs(LEASE_DIR, exist_ok=True)
+        temp = f"{_lease_path(path)}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(path)
+        os.replace(temp, _lease_path(path))
+    except OSError as e:
+        # Still protected from this process's janitor
+        print(f"Could not lease {path} for the janitor: {e}")
+
+def _refresh_leases():
+    while True:
+        time.sleep(LEASE_REFRESH_SECONDS)
+        with _active_lock:
+            active = list(_active_paths)
+        for path in active:
+            try:
+                os.utime(_lease_path(path))
+            except FileNotFoundError:
+                _write_lease(path)
+            except OSError:
+                pass
+
+def register_job(path):
+    """Mark a path as in use by a running job so no process's janitor touches it."""
+    global _refresher
+    path = os.path.abspath(path)
+    with _active_lock:
+        count = _active_paths.get(path, 0)
+        _active_paths[path] = count + 1
+        if count == 0:
+            _write_lease(path)
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_leases, name="janitor-leases", daemon=True)
+            _refresher.start()
+
+def release_job(path):
+    path = os.path.abspath(path)
+    with _active_lock:
+        count = _active_paths.get(path, 0) - 1
+        if count > 0:
+            _active_paths[path] = count
+            return
+        _active_paths.pop(path, None)
+        try:
+            os.remove(_lease_path(path))
+        except OSError:
+            pass
+
+@contextmanager
+def active_job(path):
+    """Context manager form of register_job/release_job."""
+    register_job(path)
+    try:
+        yield path
+    finally:
+        release_job(path)
+
+def leased_paths():
+    """Paths in use by any process: this one's plus every live lease on disk."""
+    with _active_lock:
+        active = set(_active_paths)
+    try:
+        names = os.listdir(LEASE_DIR)
+    except OSError:
+        return active
+    now = time.time()
+    for name in names:
+        if not name.endswith(".lease"):
+            continue
+        lease = os.path.join(LEASE_DIR, name)
+        try:
+            if now - os.stat(lease).st_mtime > LEASE_STALE_SECONDS:
+                os.remove(lease)
+                continue
+            with open(lease, encoding="utf-8") as f:
+                active.add(f.read().strip())
+        except OSError:
+            continue
+    return active
+
+def is_protected(path, active=None):
+    """
+    True if path is inside an in-flight job's files, or contains them.
+
+    Args:
+        active: Result of leased_paths(), to check many paths at once
+    """
+    path = os.path.abspath(path)
+    if active is None:
+        active = leased_paths()
+    for active_path in active:
+        if path == active_path:
+            return True
+        if path.startswith(active_path + os.sep) or active_path.startswith(path + os.sep):
+            return True
+    return False
+
+# ===== Scanning and eviction =====
+
+def _entry_stats(path):
+    """Return (size_bytes, last_used) for a file or directory tree."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0, 0
+    if not stat.S_ISDIR(st.st_mode):
+        # atime is unreliable on noatime mounts, so take the later of the two
+        return st.st_size, max(st.st_atime, st.st_mtime)
+
+    size, last_used = 0, st.st_mtime
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                fst = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            size += fst.st_size
+            last_used = max(last_used, fst.st_atime, fst.st_mtime)
+    return size, last_used
+
+def _remove(path):
+    def remove_readonly(func, target, _):
+        "Clear the readonly bit and reattempt the removal"
+        try:
+            os.chmod(target, stat.S_IWRITE)
+            func(target)
+        except Exception:
+            pass
+
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, onerror=remove_readonly)
+        else:
+            os.remove(path)
+        return True
+    except OSError as e:
+        print(f"Janitor could not remove {path}: {e}")
+        return False
+
+class MediaJanitor(threading.Thread):
+    """Periodically enforces artifact quotas and records disk usage."""
+
+    def __init__(self, root=".", areas=None, total_quota_mb=TOTAL_QUOTA_MB, interval=SWEEP_INTERVAL):
+        super().__init__(daemon=True, name="media-janitor")
+        self.root = root
+        self.areas = areas or ARTIFACT_AREAS
+        self.total_quota = total_quota_mb * MB
+        self.interval = interval
+        self.evicted_bytes = 0
+        self.evicted_entries = 0
+        self._usage = {}
+        self._usage_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def scan(self):
+        """
+        Collect every evictable entry.
+
+        Returns:
+            list: dicts with area, path, size and last_used
+        """
+        entries = []
+        for area, settings in self.areas.items():
+            area_path = os.path.join(self.root, settings["path"])
+            if not os.path.isdir(area_path):
+                continue
+            for name in os.listdir(area_path):
+                path = os.path.join(area_path, name)
+                if settings["unit"] == "file" and os.path.isdir(path):
+                    continue
+                size, last_used = _entry_stats(path)
+                if name.endswith(".tmp") and time.time() - last_used < PARTIAL_WRITE_GRACE:
+                    # Still being written, e.g. a text SVG about to be renamed into place
+                    continue
+                entries.append({"area": area, "path": path, "size": size, "last_used": last_used})
+        return entries
+
+    def sweep(self, dry_run=False):
+        """
+        Run one eviction pass.
+
+        Returns:
+            list: The entries that were (or, with dry_run, would be) evicted
+        """
+        entries = self.scan()
+        now = time.time()
+        evicted = []
+
+        def evict(entry):
+            # Read the leases right before removing, so a job that just started counts
+            if is_protected(entry["path"]):
+                return False
+            if not dry_run and not _remove(entry["path"]):
+                return False
+            evicted.append(entry)
+            return True
+
+        # Pass 1: age limit per area
+        remaining = []
+        for entry in entries:
+            max_age = self.areas[entry["area"]]["max_age_hours"] * 3600
+            if now - entry["last_used"] > max_age and evict(entry):
+                continue
+            remaining.append(entry)
+
+        # Pass 2: per-area quota, least recently used first
+        remaining.sort(key=lambda e: e["last_used"])
+        for area, settings in self.areas.items():
+            area_entries = [e for e in remaining if e["area"] == area]
+            used = sum(e["size"] for e in area_entries)
+            for entry in area_entries:
+                if used <= settings["quota_mb"] * MB:
+                    break
+                if evict(entry):
+                    used -= entry["size"]
+                    remaining.remove(entry)
+
+        # Pass 3: total quota across areas
+        used = sum(e["size"] for e in remaining)
+        for entry in list(remaining):
+            if used <= self.total_quota:
+                break
+            if evict(entry):
+                used -= entry["size"]
+                remaining.remove(entry)
+
+        if not dry_run:
+            self.evicted_entries += len(evicted)
+            self.evicted_bytes += sum(e["size"] for e in evicted)
+            self._record_usage(remaining)
+        return evicted
+
+    def _record_usage(self, entries):
+        areas = {area: {"bytes": 0, "entries": 0} for area in self.areas}
+        for entry in entries:
+            areas[entry["area"]]["bytes"] += entry["size"]
+            areas[entry["area"]]["entries"] += 1
+        try:
+            free_bytes = shutil.disk_usage(self.root).free
+        except OSError:
+            free_bytes = None
+        with self._usage_lock:
+            self._usage = {
+                "areas": areas,
+                "total_bytes": sum(a["bytes"] for a in areas.values()),
+                "free_bytes": free_bytes,
+                "evicted_bytes_total": self.evicted_bytes,
+                "evicted_entries_total": self.evicted_entries,
+                "scanned_at": time.time(),
+            }
+
+    def disk_usage(self):
+        """Disk usage recorded by the most recent sweep (empty before the first one)."""
+        with self._usage_lock:
+            return dict(self._usage)
+
+    def run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Janitor sweep failed: {e}")
+            if self._stop_event.wait(self.interval):
+                break
+
+    def stop(self):
+        self._stop_event.set()
+
+_janitor = None
+_janitor_lock = threading.Lock()
+
+def start_janitor(**kwargs):
+    """Start the process-wide janitor thread once and return it."""
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = MediaJanitor(**kwargs)
+            _janitor.start()
+        return _janitor
+
+def get_janitor():
+    return _janitor
+
+def _collect_metrics():
+    janitor = get_janitor()
+    usage = janitor.disk_usage() if janitor else {}
+    if not usage:
+        return []
+    areas = usage["areas"]
+    return [
+        ("antigravity_media_disk_bytes", "gauge", "Disk used by render artifacts per area at the last sweep",
+         [({"area": area}, data["bytes"]) for area, data in areas.items()]),
+        ("antigravity_media_entries", "gauge", "Evictable entries per artifact area at the last sweep",
+         [({"area": area}, data["entries"]) for area, data in areas.items()]),
+        ("antigravity_media_quota_bytes", "gauge", "Disk quota per artifact area",
+         [({"area": area}, janitor.areas[area]["quota_mb"] * MB) for area in areas]),
+        ("antigravity_media_total_quota_bytes", "gauge", "Combined disk quota across artifact areas",
+         [({}, janitor.total_quota)]),
+        ("antigravity_media_free_bytes", "gauge", "Free space on the artifacts' filesystem",
+         [({}, usage["free_bytes"])]),
+        ("antigravity_media_evicted_bytes_total", "counter", "Bytes evicted by the janitor",
+         [({}, usage["evicted_bytes_total"])]),
+        ("antigravity_media_evicted_entries_total", "counter", "Entries evicted by the janitor",
+         [({}, usage["evicted_entries_total"])]),
+    ]
+
+register_collector(_collect_metrics)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enforce disk quotas on render artifacts.")
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    janitor = MediaJanitor(root=args.root)
+    evicted = janitor.sweep(dry_run=args.dry_run)
+    action = "Would evict" if args.dry_run else "Evicted"
+    for entry in evicted:
+        print(f"{action}: {entry['path']} ({entry['size'] / MB:.1f} MB)")
+    print(f"{action} {len(evicted)} entries, {sum(e['size'] for e in evicted) / MB:.1f} MB")
+
+    if not args.dry_run:
+        usage = janitor.disk_usage()
+        for area, data in usage["areas"].items():
+            print(f"  {area}: {data['bytes'] / MB:.1f} MB in {data['entries']} entries")
+        print(f"Total: {usage['total_bytes'] / MB:.1f} MB")
+    sys.exit(0)
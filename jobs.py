@@ -0,0 +1,238 @@
+"""
+Anti Gravity - Lesson Jobs
+
+Runs lessons in the background so callers get a job ID straight away instead
+of holding a connection open for the minutes a render takes. Each job keeps
+the pipeline's progress events, its result and a cancel flag; finished jobs
+are forgotten after JOB_TTL_SECONDS.
+"""
+
+import os
+import re
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import generate_lesson_shared
+from backend import QUALITY_FLAGS
+from voiceover_backend import VOICE_PRESETS
+from render_scheduler import PRIORITIES
+from narration import parse_languages
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+MAX_TOPIC_LENGTH = int(os.getenv("MAX_TOPIC_LENGTH", "200"))
+
+# Lesson parameters a job accepts, with their defaults
+JOB_PARAMS = {
+    "topic": None,
+    "subject": "General",
+    "quality": "Medium",
+    "voice_preset": "teaching_assistant",
+    "existing_code": None,
+    "feedback": None,
+    "lineage_id": None,
+    "use_index": True,
+    # Render priority class (see render_scheduler); derived from the request when None
+    "priority": None,
+    # More narration languages (see narration.py); NARRATION_LANGUAGES when None
+    "languages": None,
+}
+
+# Parameters that must be strings when given
+TEXT_PARAMS = ("topic", "subject", "existing_code", "feedback")
+
+# Lineage IDs are generated by the pipeline and name a workspace directory
+LINEAGE_ID_PATTERN = re.compile(r"[0-9a-f]{12}")
+
+def validate_params(params):
+    """
+    Check job parameters and fill in defaults.
+
+    Returns:
+        tuple: (success, error, params)
+    """
+    unknown = set(params) - set(JOB_PARAMS)
+    if unknown:
+        return False, f"Unknown parameters: {', '.join(sorted(unknown))}", None
+    for key in TEXT_PARAMS:
+        if params.get(key) is not None and not isinstance(params[key], str):
+            return False, f"{key} must be a string", None
+    if not params.get("topic") or not params["topic"].strip():
+        return False, "topic is required", None
+    if len(params["topic"]) > MAX_TOPIC_LENGTH:
+        return False, f"topic must be at most {MAX_TOPIC_LENGTH} characters", None
+    if params.get("use_index") is not None and not isinstance(params["use_index"], bool):
+        return False, "use_index must be true or false", None
+    if params.get("quality") is not None and params["quality"] not in QUALITY_FLAGS:
+        return False, f"quality must be one of {', '.join(QUALITY_FLAGS)}", None
+    if params.get("voice_preset") is not None and params["voice_preset"] not in VOICE_PRESETS:
+        return False, f"voice_preset must be one of {', '.join(VOICE_PRESETS)}", None
+    lineage_id = params.get("lineage_id")
+    if lineage_id is not None and not (isinstance(lineage_id, str) and LINEAGE_ID_PATTERN.fullmatch(lineage_id)):
+        return False, "lineage_id must be the lineage_id of an earlier result", None
+    if params.get("priority") is not None and params["priority"] not in PRIORITIES:
+        return False, f"priority must be one of {', '.join(PRIORITIES)}", None
+    if params.get("languages") is not None:
+        success, error, _ = parse_languages(params["languages"])
+        if not success:
+            return False, error, None
+    return True, "", {key: default if params.get(key) is None else params[key] for key, default in JOB_PARAMS.items()}
+
+def job_status(result, cancelled=False):
+    """Terminal state for a pipeline result."""
+    if result["success"]:
+        return SUCCEEDED
+    if result.get("cancelled") or cancelled:
+        return CANCELLED
+    return FAILED
+
+def run_lesson(params, on_event, cancel_event):
+    """Run one job's pipeline; a crash becomes a failed result."""
+    try:
+        return generate_lesson_shared(**params, on_event=on_event, cancel_event=cancel_event)
+    except Exception as e:
+        result = {"success": False, "cancelled": False, "shared": False, "error": f"{type(e).__name__}: {e}"}
+        on_event("error", f"Pipeline crashed: {result['error']}")
+        return result
+
+class Job:
+    """One lesson request and everything reported about it so far."""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.result = None
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def add_event(self, kind, message):
+        with self.lock:
+            self.events.append({
+                "index": len(self.events),
+                "time": time.time(),
+                "kind": kind,
+                "message": message,
+            })
+
+    def events_since(self, index):
+        with self.lock:
+            return self.events[index:]
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self):
+        """JSON-ready view of the job; the result omits the generated code."""
+        result = None
+        if self.result is not None:
+            result = {key: value for key, value in self.result.items() if key != "code"}
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": {key: value for key, value in self.params.items() if key != "existing_code"},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": len(self.events),
+            "result": result,
+        }
+
+class JobManager:
+    """Thread pool of lesson pipelines, addressed by job ID."""
+
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_TTL_SECONDS):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="lesson-job")
+        self.ttl = ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, params):
+        """
+        Queue a lesson.
+
+        Returns:
+            tuple: (success, error, job)
+        """
+        success, error, params = validate_params(params)
+        if not success:
+            return False, error, None
+
+        job = Job(params)
+        self._prune()
+        with self.lock:
+            self.jobs[job.id] = job
+        job.add_event("info", "Job queued.")
+        self.pool.submit(self._run, job)
+        return True, "", job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. A running render is killed.
+
+        Returns:
+            tuple: (success, error)
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False, "Unknown job"
+        if job.finished:
+            return False, f"Job already {job.status}"
+        job.cancel_event.set()
+        job.add_event("warning", "Cancellation requested.")
+        return True, ""
+
+    def stats(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        counts = {state: 0 for state in (QUEUED, RUNNING) + TERMINAL_STATES}
+        for job in jobs:
+            counts[job.status] += 1
+        return counts
+
+    def shutdown(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.add_event("info", "Job cancelled before it started.")
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        result = run_lesson(job.params, job.add_event, job.cancel_event)
+        job.result = result
+        job.status = job_status(result, job.cancel_event.is_set())
+        job.finished_at = time.time()
+        job.add_event("info", f"Job {job.status}.")
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
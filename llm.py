@@ -0,0 +1,237 @@
+"""
+Anti Gravity - Gemini Client
+
+google.generativeai and its dependencies (grpc, protobuf, google.api_core)
+take a noticeable share of app start-up. They are imported and configured on
+first use instead of when backend.py / voiceover_backend.py are imported, so
+the Streamlit UI is served before the LLM client is ready. Call init() (or
+start a warm-up, see warmup.py) to pay that cost up front.
+
+ResourceExhausted is resolved lazily as well, so callers can write
+`except llm.ResourceExhausted:` without importing google.api_core themselves.
+
+generate() is the single entry point for prompts: it records every call's
+latency and outcome for adaptive model routing (model_router.py), and hedges
+against Gemini's long latency tail. If a call has not answered by the
+LLM_HEDGE_PERCENTILE of the model's recent latencies, a backup request is
+sent (to LLM_HEDGE_MODEL if set, else the same model) and the first good
+response wins. Every call is bounded by LLM_DEADLINE_SECONDS. The SDK call
+cannot be interrupted, so the losing request is abandoned: its result is
+discarded and its own timeout ends it by the deadline. Until then it holds
+one of the LLM_WORKERS request threads, so at most LLM_MAX_HEDGES hedge
+requests are outstanding at once, and no hedge is sent while every thread
+is busy. metrics() reports how often requests were hedged (or a hedge was
+skipped); it and the latency of every call are exported through metrics.py.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from model_router import get_router
+from metrics import counter, histogram, register_collector
+
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "180"))
+# Latency percentile after which a backup request is sent; 0 disables hedging
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", "")
+# Hedge delay bounds, and the delay used until a model has HEDGE_MIN_SAMPLES latencies
+HEDGE_MIN_SECONDS = 5.0
+HEDGE_DEFAULT_SECONDS = 30.0
+HEDGE_MIN_SAMPLES = 20
+
+# Abandoned requests keep a thread until their timeout, so allow plenty
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "32"))
+# Hedge requests outstanding at once, winners and abandoned losers alike
+MAX_HEDGES = int(os.getenv("LLM_MAX_HEDGES", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+_metrics = {"requests": 0, "hedged": 0, "hedge_wins": 0, "hedges_skipped": 0, "deadline_exceeded": 0}
+_metrics_lock = threading.Lock()
+# Requests submitted to _executor and not finished yet, and how many of them are hedges
+_outstanding = {"calls": 0, "hedges": 0}
+
+CALL_SECONDS = histogram(
+    "antigravity_llm_call_seconds", "Gemini request latency by model and outcome (ok, quota, error)", ["model", "outcome"]
+)
+QUOTA_FALLBACKS = counter(
+    "antigravity_llm_quota_fallbacks_total", "Prompts moved to the fallback model after ResourceExhausted", ["model"]
+)
+
+_genai = None
+_lock = threading.Lock()
+
+def init(api_key=None):
+    """
+    Import and configure google.generativeai once.
+
+    Args:
+        api_key: Gemini API key (default: GOOGLE_API_KEY)
+
+    Returns:
+        module: the configured google.generativeai module
+    """
+    global _genai
+    if _genai is not None:
+        return _genai
+    with _lock:
+        if _genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+            _genai = genai
+    return _genai
+
+def is_ready():
+    return _genai is not None
+
+def model(name):
+    """A GenerativeModel for the given model name."""
+    return init().GenerativeModel(name)
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+def metrics():
+    """Request, hedge and deadline counters since start-up, with the hedge rate."""
+    with _metrics_lock:
+        report = dict(_metrics)
+    report["hedge_rate"] = report["hedged"] / report["requests"] if report["requests"] else 0.0
+    return report
+
+METRIC_HELP = {
+    "requests": "Prompts sent through generate()",
+    "hedged": "Prompts that got a hedge request",
+    "hedge_wins": "Prompts answered by the hedge request",
+    "hedges_skipped": "Hedge requests not sent because LLM_MAX_HEDGES were outstanding or every request thread was busy",
+    "deadline_exceeded": "Prompts with no answer within the deadline",
+}
+
+def _collect_metrics():
+    report = metrics()
+    return [
+        (f"antigravity_llm_{name}_total", "counter", help_text, [({}, report[name])])
+        for name, help_text in METRIC_HELP.items()
+    ]
+
+register_collector(_collect_metrics)
+
+def hedge_delay(name):
+    """Seconds to wait for a model before sending a backup request."""
+    latencies = sorted(get_router().latencies(name))
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_SECONDS
+    index = min(len(latencies) - 1, int(len(latencies) * HEDGE_PERCENTILE / 100))
+    return max(HEDGE_MIN_SECONDS, latencies[index])
+
+def _call(name, prompt, subject, timeout):
+    """One request to the API, recorded with the router when it ends."""
+    started = time.perf_counter()
+    try:
+        text = model(name).generate_content(prompt, request_options={"timeout": timeout}).text
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        get_router().record_call(name, subject, elapsed, ok=False)
+        outcome = "quota" if type(e).__name__ == "ResourceExhausted" else "error"
+        CALL_SECONDS.observe(elapsed, model=name, outcome=outcome)
+        raise
+    elapsed = time.perf_counter() - started
+    get_router().record_call(name, subject, elapsed, ok=True)
+    CALL_SECONDS.observe(elapsed, model=name, outcome="ok")
+    return text
+
+def _submit(name, prompt, subject, timeout, hedge=False):
+    """
+    Start a request on the executor, counted as outstanding until it ends.
+
+    Returns:
+        Future or None: None for a hedge when LLM_MAX_HEDGES are outstanding
+        or every request thread is busy (the hedge would only queue)
+    """
+    with _metrics_lock:
+        if hedge and (_outstanding["hedges"] >= MAX_HEDGES or _outstanding["calls"] >= LLM_WORKERS):
+            _metrics["hedges_skipped"] += 1
+            return None
+        _outstanding["calls"] += 1
+        if hedge:
+            _outstanding["hedges"] += 1
+
+    def finished(_):
+        with _metrics_lock:
+            _outstanding["calls"] -= 1
+            if hedge:
+                _outstanding["hedges"] -= 1
+
+    future = _executor.submit(_call, name, prompt, subject, timeout)
+    # Also runs when a queued request is cancelled
+    future.add_done_callback(finished)
+    return future
+
+def generate(name, prompt, subject=None, deadline=None):
+    """
+    Run a prompt on a model and return the response text.
+
+    Args:
+        deadline: Seconds before giving up (default LLM_DEADLINE_SECONDS)
+
+    Raises:
+        DeadlineExceeded: No response within the deadline
+        Exception: The client's error (including ResourceExhausted) when
+            every request failed
+    """
+    deadline = deadline or LLM_DEADLINE_SECONDS
+    started = time.monotonic()
+    _count("requests")
+    primary = _submit(name, prompt, subject, deadline)
+    pending = [primary]
+
+    if HEDGE_PERCENTILE > 0:
+        done, _ = wait(pending, timeout=min(hedge_delay(name), deadline))
+        if not done:
+            backup_name = HEDGE_MODEL or name
+            backup = _submit(backup_name, prompt, subject, deadline - (time.monotonic() - started), hedge=True)
+            if backup is None:
+                print(f"{name} has not answered after {time.monotonic() - started:.0f}s; too many requests outstanding to hedge")
+            else:
+                print(f"{name} has not answered after {time.monotonic() - started:.0f}s; sending a hedge request to {backup_name}")
+                _count("hedged")
+                pending.append(backup)
+
+    error = None
+    while pending:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            pending.remove(future)
+            try:
+                text = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if future is not primary:
+                _count("hedge_wins")
+            # The other request is abandoned (or dropped if it has not started)
+            for loser in pending:
+                loser.cancel()
+            return text
+
+    if pending:
+        _count("deadline_exceeded")
+        for loser in pending:
+            loser.cancel()
+        raise DeadlineExceeded(f"No response from {name} within {deadline:.0f}s")
+    raise error
+
+def __getattr__(name):
+    if name == "ResourceExhausted":
+        from google.api_core.exceptions import ResourceExhausted
+        return ResourceExhausted
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,385 @@
+"""
+Anti Gravity - Manim Runner
+
+Runs the manim command line with a shared text cache. Every Text and
+MarkupText is rendered by Pango into an SVG named after a hash of its
+content and style; Manim skips the work when that file already exists. By
+default the files live in each render's own media dir, so every workspace
+starts cold. Here they go to one content-addressed directory
+(TEXT_CACHE_DIR) shared by all renders, so repeated labels, titles and
+numbers cost nothing after their first render.
+
+The runner is also the render sandbox's network guard: scene code may only
+reach the text-to-speech hosts (RENDER_NETWORK=tts, the default), nothing
+(none) or anything (all). This protects against accidental network use by
+generated code, not against code written to get around it; CPU, memory,
+file size and wall-clock limits are applied by Studio.render_scene.
+
+It also counts the frames Manim actually renders (animations served from
+its cache cost none) and reports them on stderr as
+"FRAMES_RENDERED=<n>", for Studio.render_scene's resource accounting.
+
+With STREAM_DIR set, finished animations are handed out as stream segments
+while the scene is still rendering (see streaming.py).
+
+With NARRATION_FILE set, every voiceover block is also narrated in the
+file's other languages and held until the longest narration has finished;
+one audio track per language is written next to the file (see
+narration.py).
+
+Because renders run concurrently, the text cache also:
+    - writes each SVG to a temporary file and renames it into place, so a
+      render never reads a half-written SVG from another one;
+    - touches an SVG every time it is used, so the janitor's LRU eviction
+      (size-bounded by TEXT_CACHE_MB) drops the least-used entries first,
+      and re-renders an entry the janitor removed in the meantime.
+
+Usage (same arguments as manim):
+    python manim_runner.py -qm --media_dir media temp_topic.py SceneTopic
+"""
+
+import os
+import sys
+import fnmatch
+import threading
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TEXT_CACHE_DIR = os.path.abspath(os.getenv("TEXT_CACHE_DIR", os.path.join(REPO_DIR, "text_cache")))
+TEXT_CACHE_MB = int(os.getenv("TEXT_CACHE_MB", "200"))
+
+RENDER_NETWORK = os.getenv("RENDER_NETWORK", "tts")
+# Hosts gTTS talks to; extend for other speech services
+TTS_HOSTS = os.getenv("RENDER_ALLOWED_HOSTS", "translate.google.*,translate.googleapis.com").split(",")
+
+# Printed in the traceback of a blocked connection; Studio classifies failures by it
+NETWORK_BLOCKED_MESSAGE = "Network access blocked in render sandbox"
+
+# Last stderr line of a render; Studio parses the frame count from it
+FRAMES_MARKER = "FRAMES_RENDERED"
+
+# Set by Studio.render_scene when the render is streamed
+STREAM_DIR = os.getenv("STREAM_DIR")
+# Animations are grouped into segments of at least this many seconds
+STREAM_SEGMENT_SECONDS = float(os.getenv("STREAM_SEGMENT_SECONDS", "4"))
+# One JSON line per segment, appended to STREAM_DIR
+STREAM_MANIFEST = "segments.jsonl"
+
+# Set by Studio.render_scene for multi-language lessons
+NARRATION_FILE = os.getenv("NARRATION_FILE")
+# Written next to NARRATION_FILE: the track per language and how it was built
+TRACKS_MANIFEST = "tracks.json"
+
+class NetworkBlocked(OSError):
+    pass
+
+def _is_local(host):
+    return host in ("localhost", "::1") or host.startswith("127.")
+
+def install_network_guard(allowed_hosts):
+    """Refuse name lookups and connections except to allowed_hosts (fnmatch patterns) and loopback."""
+    import socket
+
+    patterns = [pattern.strip().lower() for pattern in allowed_hosts if pattern.strip()]
+    allowed_addresses = set()
+    real_getaddrinfo = socket.getaddrinfo
+    real_connect = socket.socket.connect
+    real_connect_ex = socket.socket.connect_ex
+
+    def getaddrinfo(host, *args, **kwargs):
+        name = host.decode() if isinstance(host, bytes) else host
+        if name is not None and not _is_local(str(name)):
+            if not any(fnmatch.fnmatch(str(name).lower(), pattern) for pattern in patterns):
+                raise NetworkBlocked(f"{NETWORK_BLOCKED_MESSAGE}: {name}")
+        results = real_getaddrinfo(host, *args, **kwargs)
+        allowed_addresses.update(result[4][0] for result in results)
+        return results
+
+    def check(sock, address):
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            host = str(address[0])
+            if host not in allowed_addresses and not _is_local(host):
+                raise NetworkBlocked(f"{NETWORK_BLOCKED_MESSAGE}: {host}")
+
+    def connect(self, address):
+        check(self, address)
+        return real_connect(self, address)
+
+    def connect_ex(self, address):
+        check(self, address)
+        return real_connect_ex(self, address)
+
+    socket.getaddrinfo = getaddrinfo
+    socket.socket.connect = connect
+    socket.socket.connect_ex = connect_ex
+
+def _atomic_svg_writer(text2svg):
+    """Wrap a Pango text2svg function so the SVG appears atomically under its final name."""
+    def wrapper(*args, **kwargs):
+        args = list(args)
+        if isinstance(kwargs.get("file_name"), str):
+            target = kwargs["file_name"]
+            temp = kwargs["file_name"] = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        else:
+            position = next((i for i, arg in enumerate(args) if isinstance(arg, str) and arg.endswith(".svg")), None)
+            if position is None:
+                return text2svg(*args, **kwargs)
+            target = args[position]
+            temp = args[position] = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            text2svg(*args, **kwargs)
+            os.replace(temp, target)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        return target
+    return wrapper
+
+def _touching_lookup(text_to_svg):
+    """Wrap Text._text2svg so every use refreshes the cache entry's timestamp."""
+    def wrapper(self, *args, **kwargs):
+        svg_file = text_to_svg(self, *args, **kwargs)
+        try:
+            os.utime(svg_file)
+        except FileNotFoundError:
+            # Evicted between Manim's existence check and now; render it again
+            svg_file = text_to_svg(self, *args, **kwargs)
+        except OSError:
+            pass
+        return svg_file
+    return wrapper
+
+def install_text_cache(cache_dir=TEXT_CACHE_DIR):
+    """Point Manim's text_dir at the shared cache and install the hooks above."""
+    import manimpango
+    from manim import config
+    from manim.mobject.text import text_mobject
+
+    os.makedirs(cache_dir, exist_ok=True)
+    config.text_dir = cache_dir
+
+    manimpango.text2svg = _atomic_svg_writer(manimpango.text2svg)
+    if hasattr(manimpango, "MarkupUtils"):
+        manimpango.MarkupUtils.text2svg = staticmethod(_atomic_svg_writer(manimpango.MarkupUtils.text2svg))
+    for cls in (text_mobject.Text, text_mobject.MarkupText):
+        if hasattr(cls, "_text2svg"):
+            cls._text2svg = _touching_lookup(cls._text2svg)
+
+def install_frame_counter():
+    """Count the frames written by SceneFileWriter and report them at exit."""
+    import atexit
+    from manim.scene.scene_file_writer import SceneFileWriter
+
+    frames = [0]
+    write_frame = SceneFileWriter.write_frame
+
+    def counting_write_frame(self, *args, **kwargs):
+        # write_frame(frame_or_renderer, num_frames=1) writes a held frame num_frames times
+        num_frames = kwargs.get("num_frames", args[1] if len(args) > 1 else 1)
+        frames[0] += num_frames if isinstance(num_frames, int) else 1
+        return write_frame(self, *args, **kwargs)
+
+    SceneFileWriter.write_frame = counting_write_frame
+    atexit.register(lambda: print(f"{FRAMES_MARKER}={frames[0]}", file=sys.stderr, flush=True))
+
+def _partial_movie_files(file_writer):
+    """Partial movie paths written so far; Manim 0.18+ keeps them per section."""
+    if hasattr(file_writer, "sections"):
+        paths = [path for section in file_writer.sections for path in section.partial_movie_files]
+    else:
+        paths = list(getattr(file_writer, "partial_movie_files", []))
+    # Skipped animations have no file
+    return [path for path in paths if path]
+
+def install_stream_writer(stream_dir, segment_seconds=STREAM_SEGMENT_SECONDS):
+    """
+    Hand out finished animations as stream segments while the scene renders.
+
+    After each play or wait, once the animations not yet streamed last
+    segment_seconds, their partial movie files and the matching slice of the
+    scene's audio (voiceovers are placed on it as they start) are appended
+    to stream_dir/STREAM_MANIFEST. The rest is flushed when the scene ends.
+    """
+    import json
+    from pydub import AudioSegment
+    from manim.renderer.cairo_renderer import CairoRenderer
+    from manim.scene.scene_file_writer import SceneFileWriter
+
+    os.makedirs(stream_dir, exist_ok=True)
+    state = {"index": 0, "streamed": 0, "start": 0.0}
+
+    def flush(renderer):
+        file_writer = renderer.file_writer
+        partials = _partial_movie_files(file_writer)[state["streamed"]:]
+        duration = renderer.time - state["start"]
+        if not partials or duration <= 0:
+            return
+        start_ms = int(round(state["start"] * 1000))
+        duration_ms = int(round(duration * 1000))
+        audio = AudioSegment.silent(duration=duration_ms)
+        if getattr(file_writer, "includes_sound", False):
+            audio = audio.overlay(file_writer.audio_segment[start_ms:start_ms + duration_ms])
+        audio_path = os.path.join(stream_dir, f"segment_{state['index']:05d}.wav")
+        audio.export(audio_path, format="wav")
+
+        entry = {
+            "index": state["index"],
+            "start": state["start"],
+            "duration": duration,
+            "partials": [os.path.abspath(path) for path in partials],
+            "audio": os.path.abspath(audio_path),
+        }
+        # One write per line, so a reader never sees half an entry followed by a newline
+        with open(os.path.join(stream_dir, STREAM_MANIFEST), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        state["index"] += 1
+        state["streamed"] += len(partials)
+        state["start"] = renderer.time
+
+    play = CairoRenderer.play
+    finish = SceneFileWriter.finish
+
+    def streaming_play(self, *args, **kwargs):
+        result = play(self, *args, **kwargs)
+        # The animation's partial movie is closed and renderer.time advanced
+        if self.time - state["start"] >= segment_seconds:
+            flush(self)
+        return result
+
+    def streaming_finish(self, *args, **kwargs):
+        flush(self.renderer)
+        return finish(self, *args, **kwargs)
+
+    CairoRenderer.play = streaming_play
+    SceneFileWriter.finish = streaming_finish
+
+def install_narration_tracks(narration_path):
+    """
+    Narrate every voiceover block in more languages than the scene's own.
+
+    narration_path is a JSON file with "languages" (code -> GTTSService
+    options) and "texts" (block text -> code -> translation). Each language
+    gets its own speech service, of the scene's speech service class, with
+    that language's options and its own cache directory (gTTS speaks in the
+    language the service was created with and leaves it out of its cache
+    key). A block's translations are synthesized right after its own
+    narration, and the block's tracker is stretched to the longest of them,
+    so the block's animations (which follow tracker.duration) and its
+    closing wait fit every language. When the scene ends, each language's
+    narration is laid out at the block start times into <code>.wav next to
+    narration_path; blocks without a translation (e.g. narration built at
+    runtime), or whose translation came out as the same audio as another
+    language's, keep the scene's own narration in that track.
+    """
+    import json
+    import hashlib
+    from pathlib import Path
+    from pydub import AudioSegment
+    from manim.scene.scene_file_writer import SceneFileWriter
+    from manim_voiceover import VoiceoverScene
+    from manim_voiceover.modify_audio import get_duration
+
+    with open(narration_path, encoding="utf-8") as f:
+        narration = json.load(f)
+    output_dir = os.path.dirname(os.path.abspath(narration_path))
+    blocks = []
+    services = {}
+
+    add_voiceover_text = VoiceoverScene.add_voiceover_text
+    finish = SceneFileWriter.finish
+
+    def language_service(scene_service, language):
+        key = (id(scene_service), language)
+        if key not in services:
+            # Carry over the scene's voice settings the service class knows about
+            extra = {name: getattr(scene_service, name) for name in ("global_speed", "sox_effects") if hasattr(scene_service, name)}
+            services[key] = type(scene_service)(
+                **narration["languages"][language],
+                cache_dir=str(Path(scene_service.cache_dir) / language),
+                **extra
+            )
+        return services[key]
+
+    def digest(path):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def multilingual_add_voiceover_text(self, text, **kwargs):
+        tracker = add_voiceover_text(self, text, **kwargs)
+        own = str(Path(self.speech_service.cache_dir) / tracker.data["final_audio"])
+        translations = narration["texts"].get(" ".join(text.split()), {})
+        audio = {}
+        seen = {digest(own): None}
+        for language in narration["languages"]:
+            if not translations.get(language):
+                continue
+            service = language_service(self.speech_service, language)
+            data = service._wrap_generate_from_text(translations[language])
+            path = str(Path(service.cache_dir) / data["final_audio"])
+            # Different texts in different languages never sound the same
+            same_as = seen.setdefault(digest(path), language)
+            if same_as != language:
+                print(f"Narration in '{language}' came out identical to '{same_as or 'the original'}', keeping the original: {text[:60]}")
+                continue
+            audio[language] = path
+        longest = max([tracker.duration] + [get_duration(path) for path in audio.values()])
+        # Hold the block until the longest narration has finished
+        tracker.duration = longest
+        tracker.end_t = tracker.start_t + longest
+        blocks.append({
+            "start": tracker.start_t,
+            "own": own,
+            "audio": audio,
+        })
+        return tracker
+
+    def write_tracks():
+        end_ms = 0
+        loaded = {}
+        for block in blocks:
+            for path in [block["own"]] + list(block["audio"].values()):
+                if path not in loaded:
+                    loaded[path] = AudioSegment.from_file(path)
+                end_ms = max(end_ms, int(block["start"] * 1000) + len(loaded[path]))
+        manifest = {"blocks": len(blocks), "tracks": {}}
+        for language in narration["languages"]:
+            track = AudioSegment.silent(duration=end_ms)
+            untranslated = 0
+            for block in blocks:
+                path = block["audio"].get(language)
+                if path is None:
+                    path = block["own"]
+                    untranslated += 1
+                track = track.overlay(loaded[path], position=int(block["start"] * 1000))
+            track_path = os.path.join(output_dir, f"{language}.wav")
+            track.export(track_path, format="wav")
+            manifest["tracks"][language] = {"path": track_path, "untranslated": untranslated}
+        with open(os.path.join(output_dir, TRACKS_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def narrated_finish(self, *args, **kwargs):
+        if blocks:
+            write_tracks()
+        return finish(self, *args, **kwargs)
+
+    VoiceoverScene.add_voiceover_text = multilingual_add_voiceover_text
+    SceneFileWriter.finish = narrated_finish
+
+def main():
+    from manim.__main__ import main as manim_main
+
+    if RENDER_NETWORK == "tts":
+        install_network_guard(TTS_HOSTS)
+    elif RENDER_NETWORK == "none":
+        install_network_guard([])
+    if os.getenv("TEXT_CACHE", "1") != "0":
+        install_text_cache()
+    install_frame_counter()
+    if STREAM_DIR:
+        install_stream_writer(STREAM_DIR)
+    if NARRATION_FILE:
+        install_narration_tracks(NARRATION_FILE)
+    sys.argv[0] = "manim"
+    return manim_main()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Anti Gravity - Metrics
+
+In-process counters, gauges and histograms in the Prometheus text format,
+so quota exhaustion, slow stages and queue build-up show up on a dashboard
+instead of in user complaints.
+
+Modules declare the metrics they record at import time, e.g.
+
+    RENDERS = counter("antigravity_renders_total", "Render attempts by outcome", ["quality", "outcome"])
+    RENDERS.inc(quality="Low", outcome="ok")
+
+Recording is a dict update under an uncontended lock, so it is cheap
+enough for the hot path. Numbers other modules already keep (scheduler
+slots, job counts, llm.metrics()) are not copied on every change: those
+modules register a collector that is only called when the metrics are
+scraped.
+
+The job API serves the registry at /metrics. Other processes (the Streamlit
+app, render workers) serve it on METRICS_PORT when that is set, bound to
+METRICS_ADDRESS (default 127.0.0.1).
+"""
+
+import os
+import math
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_ADDRESS = os.getenv("METRICS_ADDRESS", "127.0.0.1")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers everything from an LLM call to a 1080p60 render
+LATENCY_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+_metrics = {}
+_collectors = {}
+_registry_lock = threading.Lock()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """A metric family: one value per combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        """(suffix, label names, label values, extra label, value) rows for the exposition."""
+        with self.lock:
+            values = dict(self.values)
+        return [("", self.labels, key, None, value) for key, value in sorted(values.items())]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # Per-bucket counts, then sum and count
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self):
+        with self.lock:
+            values = {key: list(counts) for key, counts in self.values.items()}
+        rows = []
+        for key, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                rows.append(("_bucket", self.labels, key, ("le", _format_value(bound)), cumulative))
+            rows.append(("_sum", self.labels, key, None, counts[-2]))
+            rows.append(("_count", self.labels, key, None, counts[-1]))
+        return rows
+
+def _register(metric):
+    with _registry_lock:
+        existing = _metrics.get(metric.name)
+        if existing is None:
+            _metrics[metric.name] = metric
+            return metric
+    # A module imported again (Streamlit reloads edited modules) keeps its metric
+    if type(existing) is not type(metric) or existing.labels != metric.labels:
+        raise ValueError(f"Metric {metric.name} is already registered differently")
+    return existing
+
+def counter(name, help_text, labels=()):
+    return _register(Counter(name, help_text, labels))
+
+def gauge(name, help_text, labels=()):
+    return _register(Gauge(name, help_text, labels))
+
+def histogram(name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram(name, help_text, labels, buckets))
+
+def register_collector(collect):
+    """
+    Add numbers read only when the metrics are scraped.
+
+    Args:
+        collect: callable() returning a list of (name, kind, help, samples)
+            with kind "counter" or "gauge" and samples a list of
+            (labels dict, value)
+    """
+    with _registry_lock:
+        _collectors[f"{collect.__module__}.{collect.__qualname__}"] = collect
+
+def _format_family(name, kind, help_text, rows):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, names, values, extra, value in rows:
+        lines.append(f"{name}{suffix}{_format_labels(names, values, extra)} {_format_value(value)}")
+    return lines
+
+# Shared by the modules that keep a cache; hit ratio = hits / (hits + misses)
+CACHE_LOOKUPS = counter(
+    "antigravity_cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+
+def cache_lookup(cache, hit):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+def render():
+    """Every metric and collector in the Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors.values())
+    lines = []
+    for metric in metrics:
+        lines += _format_family(metric.name, metric.kind, metric.help, metric.samples())
+    for collect in collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            # A broken collector must not take the others down with it
+            print(f"Metrics collector {collect.__qualname__} failed: {e}")
+            continue
+        for name, kind, help_text, samples in families:
+            rows = []
+            for labels, value in samples:
+                if value is None:
+                    continue
+                names = tuple(labels)
+                rows.append(("", names, tuple(str(labels[n]) for n in names), None, value))
+            lines += _format_family(name, kind, help_text, rows)
+    return "\n".join(lines) + "\n"
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the log
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, address=METRICS_ADDRESS):
+    """
+    Serve /metrics on its own port once per process (no-op when port is 0).
+
+    Returns:
+        ThreadingHTTPServer or None
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((address, port), MetricsRequestHandler)
+            except OSError as e:
+                print(f"Could not serve metrics on {address}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+            print(f"Metrics at http://{address}:{port}/metrics")
+        return _server
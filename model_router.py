@@ -0,0 +1,205 @@
+"""
+Anti Gravity - Adaptive Model Routing
+
+Picks the Gemini model for a lesson by expected time to a working video
+rather than by a fixed tier mapping. For each model (overall and per
+subject) it keeps rolling windows of:
+    - call latency and error rate (recorded by llm.generate)
+    - first-render success: how often the model's first scene rendered
+      without a fix (recorded by the pipeline, seeded from the lesson
+      catalog's renders table at start-up)
+
+Expected time to video for a model is the time for one generation, divided
+by its call success rate, plus the render, multiplied by the expected number
+of attempts (1 / first-render success, capped at the pipeline's retries).
+Each quality tier has a preferred model and the models it may fall back to
+(TIER_MODELS); another model is only chosen when it is expected to be
+ROUTER_SWITCH_MARGIN faster, so a tier stays on its preferred model unless
+that model is degraded. Samples expire after ROUTER_WINDOW_SECONDS, so a
+model that recovers is tried again.
+
+Set MODEL_ROUTING=static to always use each tier's preferred model.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+# Preferred model first, then the models a tier may be downgraded to
+TIER_MODELS = {
+    "High": ["gemini-2.0-pro-exp-02-05", "gemini-2.0-flash"],
+    "Medium": ["gemini-2.0-flash", "gemini-2.0-flash-lite"],
+    "Low": ["gemini-2.0-flash-lite", "gemini-2.0-flash"],
+}
+for _tier in TIER_MODELS:
+    _override = os.getenv(f"MODEL_ROUTES_{_tier.upper()}")
+    if _override:
+        TIER_MODELS[_tier] = [name.strip() for name in _override.split(",") if name.strip()]
+
+# Used when the chosen model's quota is exhausted
+FALLBACK_MODEL = "gemini-2.0-flash-lite"
+
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "adaptive")
+WINDOW_SECONDS = float(os.getenv("ROUTER_WINDOW_SECONDS", "3600"))
+SWITCH_MARGIN = float(os.getenv("ROUTER_SWITCH_MARGIN", "0.2"))
+# Samples kept per window
+MAX_SAMPLES = 200
+# Below this many samples a subject falls back to the model's overall figures
+MIN_SUBJECT_SAMPLES = 5
+
+# Priors, weighted as PRIOR_WEIGHT samples, so a model with little data is
+# judged mostly by them
+PRIOR_LATENCY = 10.0
+PRIOR_ERROR_RATE = 0.02
+PRIOR_RENDER_SUCCESS = 0.6
+PRIOR_WEIGHT = 5
+
+# Typical render seconds per tier until renders have been observed
+DEFAULT_RENDER_SECONDS = {"Low": 45.0, "Medium": 120.0, "High": 360.0}
+MAX_ATTEMPTS = 3
+
+# Render failure kinds that count against the model (the scene was at fault)
+MODEL_FAILURES = ("scene_error", "network_blocked", "timeout", "cpu_limit", "memory_limit", "output_limit")
+
+class Window:
+    """Timestamped samples of the last WINDOW_SECONDS."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, value, at=None):
+        self.samples.append((at or time.time(), value))
+
+    def values(self):
+        cutoff = time.time() - WINDOW_SECONDS
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return [value for _, value in self.samples]
+
+def smoothed(values, prior):
+    """Mean of values pulled towards prior by PRIOR_WEIGHT pseudo-samples."""
+    return (sum(values) + prior * PRIOR_WEIGHT) / (len(values) + PRIOR_WEIGHT)
+
+class ModelRouter:
+    """Rolling model statistics and the routing decision made from them."""
+
+    def __init__(self, adaptive=MODEL_ROUTING != "static"):
+        self.adaptive = adaptive
+        self.latency = {}
+        self.calls = {}
+        self.renders = {}
+        self.render_seconds = {tier: Window() for tier in TIER_MODELS}
+        self.lock = threading.Lock()
+
+    def _window(self, table, key):
+        if key not in table:
+            table[key] = Window()
+        return table[key]
+
+    def record_call(self, model, subject, seconds, ok):
+        """One LLM call: its latency (successful calls only) and whether it failed."""
+        with self.lock:
+            for key in ((model, None), (model, subject)):
+                self._window(self.calls, key).add(1.0 if ok else 0.0)
+                if ok:
+                    self._window(self.latency, key).add(seconds)
+
+    def record_render(self, model, subject, success, quality=None, render_seconds=None, at=None):
+        """The outcome of a lesson's first render attempt."""
+        with self.lock:
+            for key in ((model, None), (model, subject)):
+                self._window(self.renders, key).add(1.0 if success else 0.0, at)
+            if success and render_seconds and quality in self.render_seconds:
+                self.render_seconds[quality].add(render_seconds, at)
+
+    def latencies(self, model):
+        """Recent latencies of successful calls to a model, in seconds."""
+        with self.lock:
+            return self._values(self.latency, model, None)
+
+    def _values(self, table, model, subject):
+        """Subject-level samples when there are enough of them, else the model's overall samples."""
+        values = table[(model, subject)].values() if (model, subject) in table else []
+        if len(values) >= MIN_SUBJECT_SAMPLES:
+            return values
+        return table[(model, None)].values() if (model, None) in table else []
+
+    def expected_seconds(self, model, quality, subject=None):
+        """
+        Expected seconds from request to working video with this model.
+
+        Returns:
+            dict: expected, latency, call_success, render_success, render
+        """
+        with self.lock:
+            latency = smoothed(self._values(self.latency, model, subject), PRIOR_LATENCY)
+            call_success = smoothed(self._values(self.calls, model, subject), 1 - PRIOR_ERROR_RATE)
+            render_success = smoothed(self._values(self.renders, model, subject), PRIOR_RENDER_SUCCESS)
+            renders = self.render_seconds.get(quality)
+            render_values = renders.values() if renders else []
+        default_render = DEFAULT_RENDER_SECONDS.get(quality, DEFAULT_RENDER_SECONDS["High"])
+        render = sorted(render_values)[len(render_values) // 2] if render_values else default_render
+
+        generation = latency / max(call_success, 0.05)
+        attempts = min(1 / max(render_success, 0.01), MAX_ATTEMPTS)
+        return {
+            "expected": (generation + render) * attempts,
+            "latency": latency,
+            "call_success": call_success,
+            "render_success": render_success,
+            "render": render,
+        }
+
+    def choose(self, quality, subject=None):
+        """Model for a lesson of this tier (and subject)."""
+        candidates = TIER_MODELS.get(quality, TIER_MODELS["Low"])
+        preferred = candidates[0]
+        if not self.adaptive or len(candidates) == 1:
+            return preferred
+
+        expected = {model: self.expected_seconds(model, quality, subject)["expected"] for model in candidates}
+        best = min(candidates, key=lambda model: expected[model])
+        if best != preferred and expected[best] < expected[preferred] * (1 - SWITCH_MARGIN):
+            print(f"Routing {quality} lesson to {best}: expected {expected[best]:.0f}s to video vs {expected[preferred]:.0f}s on {preferred}")
+            return best
+        return preferred
+
+    def snapshot(self):
+        """Current estimates for every tier's candidates, for dashboards and debugging."""
+        return {
+            quality: {model: self.expected_seconds(model, quality) for model in candidates}
+            for quality, candidates in TIER_MODELS.items()
+        }
+
+    def seed_from_catalog(self):
+        """Load recent first-render outcomes from the lesson catalog."""
+        import catalog
+
+        try:
+            rows = catalog.first_renders_since(time.time() - WINDOW_SECONDS)
+        except Exception as e:
+            print(f"Could not seed model routing from the catalog: {e}")
+            return 0
+        seeded = 0
+        for row in rows:
+            if not row["model"] or not (row["success"] or row["failure"] in MODEL_FAILURES):
+                continue
+            self.record_render(
+                row["model"], row["subject"], bool(row["success"]),
+                quality=row["quality"], render_seconds=row["wall_seconds"], at=row["created_at"]
+            )
+            seeded += 1
+        return seeded
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router():
+    """The process-wide router, seeded from the catalog on first use."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+            _router.seed_from_catalog()
+        return _router
@@ -0,0 +1,261 @@
+"""
+Anti Gravity - Multi-language Narration
+
+The same lesson for English, Hindi and Spanish classrooms without three
+generations and three renders. The scene is generated once, in English; the
+text of its `with self.voiceover(text=...)` blocks is translated in one LLM
+call per batch of new lines, and the scene is rendered once with every
+language:
+    - manim_runner narrates each block in every language during the render
+      and holds the block until the longest narration has finished, so the
+      animations fit whichever language is the slowest to say it;
+    - it writes one audio track per language, each narration placed at its
+      block's start time;
+    - the tracks are muxed onto the rendered video with the video stream
+      copied: as extra audio tracks of one MP4 (NARRATION_OUTPUT=tracks,
+      the default), or as one MP4 per language (NARRATION_OUTPUT=files).
+
+Blocks whose narration is built at runtime (f-strings, loops over variables)
+have no fixed text to translate and keep the English narration in every
+track. Translations are keyed by block text, so a fix or feedback version
+only translates the blocks it changed.
+
+Set NARRATION_LANGUAGES (e.g. "hi,es") to narrate every lesson in more
+languages by default; a lesson request can also ask for languages itself.
+"""
+
+import os
+import ast
+import json
+import shutil
+
+from manim_runner import TRACKS_MANIFEST
+from process_utils import run_measured, add_usage
+
+# The language scenes are generated in
+PRIMARY_LANGUAGE = "en"
+
+# Language code (gTTS lang) -> display name, gTTS accent (tld) and the
+# ISO 639-2 code players show for the audio track
+LANGUAGES = {
+    "en": {"name": "English", "tld": "com", "iso639_2": "eng"},
+    "hi": {"name": "Hindi", "tld": "co.in", "iso639_2": "hin"},
+    "es": {"name": "Spanish", "tld": "es", "iso639_2": "spa"},
+    "fr": {"name": "French", "tld": "fr", "iso639_2": "fra"},
+    "de": {"name": "German", "tld": "de", "iso639_2": "deu"},
+    "pt": {"name": "Portuguese", "tld": "com.br", "iso639_2": "por"},
+    "bn": {"name": "Bengali", "tld": "com", "iso639_2": "ben"},
+}
+
+NARRATION_LANGUAGES = os.getenv("NARRATION_LANGUAGES", "")
+NARRATION_OUTPUT = os.getenv("NARRATION_OUTPUT", "tracks")
+
+# Written to the render's narration directory for manim_runner
+NARRATION_FILE = "narration.json"
+
+def parse_languages(languages):
+    """
+    Validate requested narration languages.
+
+    Args:
+        languages: List or comma-separated string of language codes
+
+    Returns:
+        tuple: (success, error, languages) with the primary language and
+        duplicates removed
+    """
+    if not languages:
+        return True, "", []
+    if isinstance(languages, str):
+        languages = languages.split(",")
+    if not isinstance(languages, list) or not all(isinstance(code, str) for code in languages):
+        return False, "languages must be a list of language codes", None
+    codes = []
+    for code in (code.strip().lower() for code in languages):
+        if code not in LANGUAGES:
+            return False, f"Unknown language '{code}'; supported: {', '.join(LANGUAGES)}", None
+        if code != PRIMARY_LANGUAGE and code not in codes:
+            codes.append(code)
+    return True, "", codes
+
+def narration_texts(code):
+    """
+    Texts of a scene's voiceover blocks, in order and without duplicates.
+
+    Only literal texts are returned, whitespace-normalized the way
+    manim-voiceover normalizes them before synthesis.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    found = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "voiceover"):
+            continue
+        for keyword in node.keywords:
+            if keyword.arg == "text" and isinstance(keyword.value, ast.Constant) and isinstance(keyword.value.value, str):
+                found.append((node.lineno, node.col_offset, " ".join(keyword.value.value.split())))
+    # ast.walk is breadth-first; keep the blocks in source order
+    texts = []
+    for _, _, text in sorted(found):
+        if text and text not in texts:
+            texts.append(text)
+    return texts
+
+def _parse_translations(text, lines, languages):
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return False, "No JSON object in the response", None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        return False, f"Invalid JSON: {e}", None
+    translations = {line: {} for line in lines}
+    for language in languages:
+        translated = data.get(language) if isinstance(data, dict) else None
+        if not isinstance(translated, list) or len(translated) != len(lines):
+            return False, f"Expected a list of {len(lines)} lines for '{language}'", None
+        for line, translation in zip(lines, translated):
+            if not isinstance(translation, str) or not translation.strip():
+                return False, f"Empty {LANGUAGES[language]['name']} translation for: {line}", None
+            translations[line][language] = " ".join(translation.split())
+    return True, "", translations
+
+def translate(texts, languages, model_name, subject=None, known=None):
+    """
+    Translate narration lines that are not translated yet.
+
+    Args:
+        texts: Narration lines (see narration_texts)
+        languages: Language codes to translate into
+        known: Earlier translations ({text: {language: translation}}) to reuse
+
+    Returns:
+        tuple: (success, error, translations) where translations holds known
+        plus the new lines; on failure it still holds known
+    """
+    from voiceover_backend import generate_code
+
+    translations = {text: dict(by_language) for text, by_language in (known or {}).items()}
+    missing = [text for text in texts if any(language not in translations.get(text, {}) for language in languages)]
+    if not missing or not languages:
+        return True, "", translations
+
+    names = {language: LANGUAGES[language]["name"] for language in languages}
+    prompt = f"""
+        CONTEXT: These lines are the spoken narration of an educational animation{f" about {subject}" if subject else ""}, in order. Translate them for students who will hear them read aloud.
+
+        LINES:
+        {json.dumps(missing, ensure_ascii=False)}
+
+        LANGUAGES:
+        {json.dumps(names, ensure_ascii=False)}
+
+        INSTRUCTIONS:
+        1. Translate every line into every language, as natural spoken language a teacher would use.
+        2. Keep numbers, variable names and formulas as they are; keep each line about as long as the original.
+        3. Output ONLY a JSON object mapping each language code to a list with exactly {len(missing)} translated lines, in the same order. No markdown.
+        """
+    error = ""
+    for attempt in range(2):
+        text = generate_code(model_name, prompt, subject=subject)
+        if text.startswith("# Error"):
+            return False, text, translations
+        success, error, new = _parse_translations(text, missing, languages)
+        if success:
+            for line, by_language in new.items():
+                translations.setdefault(line, {}).update(by_language)
+            return True, "", translations
+        print(f"Narration translation rejected ({error}), retrying...")
+    return False, error, translations
+
+def write_narration(narration_dir, languages, translations):
+    """
+    Prepare a render's narration directory for manim_runner.
+
+    Returns:
+        str: Path of the NARRATION_FILE to pass to the runner
+    """
+    shutil.rmtree(narration_dir, ignore_errors=True)
+    os.makedirs(narration_dir)
+    path = os.path.join(narration_dir, NARRATION_FILE)
+    payload = {
+        "languages": {language: {"lang": language, "tld": LANGUAGES[language]["tld"]} for language in languages},
+        "texts": translations,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    return path
+
+def read_tracks(narration_dir):
+    """The runner's TRACKS_MANIFEST, or None when it wrote no tracks."""
+    try:
+        with open(os.path.join(narration_dir, TRACKS_MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def mux_tracks(video_path, tracks, profile, output=NARRATION_OUTPUT):
+    """
+    Add narration tracks to a rendered video without re-encoding its video.
+
+    Args:
+        video_path: The rendered lesson, narrated in PRIMARY_LANGUAGE
+        tracks: {language: wav path} from the runner
+        profile: The lesson's encoding profile (for the audio bitrate)
+        output: "tracks" to add them as audio tracks of video_path, "files"
+            to write one video per language next to it
+
+    Returns:
+        tuple: (success, error, outputs, stats) where outputs maps each
+        language to its video (video_path itself for "tracks") and stats
+        holds the ffmpeg runs' usage fields summed (see add_usage)
+    """
+    bitrate = profile.get("audio_bitrate", "128k")
+    faststart = ["-movflags", "+faststart"] if profile.get("faststart") else []
+    stats = {}
+    languages = list(tracks)
+    root, ext = os.path.splitext(video_path)
+
+    if output == "files":
+        jobs = [
+            (
+                ["-i", video_path, "-i", tracks[language], "-map", "0:v", "-map", "1:a",
+                 "-c:v", "copy", "-c:a", "aac", "-b:a", bitrate,
+                 "-metadata:s:a:0", f"language={LANGUAGES[language]['iso639_2']}"],
+                f"{root}.{language}{ext}",
+            )
+            for language in languages
+        ]
+    else:
+        inputs = ["-i", video_path]
+        maps = ["-map", "0:v", "-map", "0:a"]
+        codecs = ["-c:v", "copy", "-c:a:0", "copy"]
+        metadata = ["-metadata:s:a:0", f"language={LANGUAGES[PRIMARY_LANGUAGE]['iso639_2']}", "-disposition:a:0", "default"]
+        for index, language in enumerate(languages, start=1):
+            inputs += ["-i", tracks[language]]
+            maps += ["-map", f"{index}:a"]
+            codecs += [f"-c:a:{index}", "aac", f"-b:a:{index}", bitrate]
+            metadata += [
+                f"-metadata:s:a:{index}", f"language={LANGUAGES[language]['iso639_2']}",
+                f"-disposition:a:{index}", "0",
+            ]
+        jobs = [(inputs + maps + codecs + metadata, f"{root}.narrated{ext}")]
+
+    outputs = []
+    for args, output_path in jobs:
+        command = ["ffmpeg", "-y", "-loglevel", "error"] + args + faststart + [output_path]
+        returncode, _, stderr, run_stats = run_measured(command, shell=False)
+        add_usage(stats, run_stats)
+        if returncode != 0:
+            for path in outputs + [output_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            return False, stderr, None, stats
+        outputs.append(output_path)
+
+    if output == "files":
+        return True, "", dict(zip(languages, outputs)), stats
+    os.replace(outputs[0], video_path)
+    return True, "", {language: video_path for language in [PRIMARY_LANGUAGE] + languages}, stats
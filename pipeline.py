@@ -0,0 +1,460 @@
+"""
+Anti Gravity - Lesson Pipeline
+
+The generate -> render -> self-correct loop behind the "Generate Lesson"
+button, kept free of Streamlit so it can be driven from app.py, load tests
+and other front ends alike.
+"""
+
+import re
+import copy
+import time
+import uuid
+import threading
+
+from backend import Studio
+from janitor import release_job
+from process_utils import add_usage
+from render_scheduler import get_scheduler, priority_for, INTERACTIVE
+from singleflight import SingleFlight
+from topic_index import get_index, REUSE_SIMILARITY, SUGGEST_SIMILARITY
+from voiceover_backend import VoiceoverArtist, PROMPT_VERSION
+from model_router import get_router, MODEL_FAILURES
+from streaming import STREAM_OUTPUT, segment_message
+from metrics import counter, histogram, cache_lookup
+from narration import parse_languages, narration_texts, translate, NARRATION_LANGUAGES, PRIMARY_LANGUAGE
+import scene_estimator
+import scene_diff
+import scene_spec
+
+MAX_RETRIES = 3
+
+# What the self-correction step is told when a render hits a sandbox limit
+# (see backend.RenderError) instead of failing with a traceback
+FAILURE_HINTS = {
+    "timeout": "The render was stopped because it ran past its time limit. Simplify the scene: fewer and shorter animations, no long loops, no updaters that run for the whole scene.",
+    "cpu_limit": "The render was stopped because it used too much CPU time. Reduce the number of mobjects and animations, and remove expensive updaters or per-frame computations.",
+    "memory_limit": "The render ran out of memory. Create far fewer mobjects (no VGroups with thousands of elements) and remove objects from the scene once they are no longer needed.",
+    "output_limit": "The render wrote a file larger than allowed. Shorten the scene and avoid very long wait() calls.",
+    "network_blocked": "The scene tried to access the network, which is not allowed during rendering. Remove any downloads, HTTP requests or external resources.",
+}
+
+# How many times an over-budget scene is sent back before rendering anyway
+MAX_BUDGET_REGENERATIONS = 1
+
+STAGE_SECONDS = histogram(
+    "antigravity_stage_seconds", "Pipeline stage latency (generate, translate, queue, render, fix, total)", ["stage", "quality"]
+)
+RENDER_ATTEMPTS = histogram(
+    "antigravity_render_attempts", "Render attempts per lesson", ["quality"], buckets=list(range(1, MAX_RETRIES + 1))
+)
+RENDERS = counter("antigravity_renders_total", "Render attempts by outcome (ok or the RenderError kind)", ["quality", "outcome"])
+LESSONS = counter("antigravity_lessons_total", "Lessons by outcome (success, failed, cancelled, reused)", ["quality", "outcome"])
+
+# One render at a time per lineage, since versions share a workspace.
+# lineage_id -> [lock, holders and waiters]; dropped when nobody needs it
+_lineage_locks = {}
+_lineage_locks_guard = threading.Lock()
+
+def _acquire_lineage(lineage_id):
+    with _lineage_locks_guard:
+        entry = _lineage_locks.setdefault(lineage_id, [threading.Lock(), 0])
+        entry[1] += 1
+    entry[0].acquire()
+
+def _release_lineage(lineage_id):
+    with _lineage_locks_guard:
+        entry = _lineage_locks[lineage_id]
+        entry[0].release()
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _lineage_locks[lineage_id]
+
+# Identical new-lesson requests in flight at the same time share one pipeline run
+_lesson_flights = SingleFlight()
+
+def _empty_result(lineage_id=None):
+    """A generate_lesson result before anything has run."""
+    return {
+        "success": False,
+        "cancelled": False,
+        "video_url": None,
+        "code": None,
+        "error": "",
+        "attempts": 0,
+        "lineage_id": lineage_id,
+        "estimate": None,
+        "timings": {"generate": 0.0, "translate": 0.0, "render": [], "fix": [], "queue": 0.0, "total": 0.0},
+        "reused": None,
+        "similar": None,
+        "block_diff": None,
+        "failure": None,
+        "model": None,
+        "scene_format": None,
+        "narration_urls": None,
+        "usage": {"renders": 0, "frames": 0},
+    }
+
+def generate_lesson(
+    topic,
+    subject,
+    quality="Medium",
+    voice_preset="teaching_assistant",
+    existing_code=None,
+    feedback=None,
+    lineage_id=None,
+    on_event=None,
+    cancel_event=None,
+    use_index=False,
+    priority=None,
+    languages=None
+):
+    """
+    Generate, render and upload one lesson video.
+
+    Args:
+        topic: The educational topic to explain
+        subject: Subject area (Math, Physics, etc.)
+        quality: Quality tier (Low/Medium/High)
+        voice_preset: Voice character preset (see VOICE_PRESETS)
+        existing_code: Previous scene code, when regenerating from feedback
+        feedback: User feedback describing what to change
+        lineage_id: Lineage of the lesson being regenerated; pass the value
+            from a previous result so unchanged animations are reused from
+            its render cache (a new lineage is started when omitted)
+        on_event: Optional callback(kind, message) for progress reporting,
+            where kind is "info", "progress", "warning" or "error", or
+            "segment" for a stream segment of the running render (with
+            STREAM_OUTPUT; see streaming.parse_segment and
+            streaming.playlist)
+        cancel_event: Optional threading.Event; when set, the pipeline stops
+            at the next stage boundary and a running render is killed
+        use_index: Look new lessons up in the topic index first, serving a
+            near-duplicate instead of generating, and serve scenes already
+            rendered from identical code out of the lesson catalog
+        priority: Render priority class (see render_scheduler); by default
+            preview for Low quality, final otherwise and feedback for
+            regenerations
+        languages: More languages to narrate the lesson in (codes from
+            narration.LANGUAGES; default NARRATION_LANGUAGES). The visuals
+            are rendered once and each language gets its own narration
+            track (see narration.py)
+
+    Returns:
+        dict: success, cancelled, video_url, code, error, attempts, lineage_id,
+            estimate (see scene_estimator.estimate), timings (generate,
+            translate, render, fix, queue (waiting for a render slot) and
+            total seconds), reused and similar (index
+            matches, see topic_index) and, for feedback versions, block_diff
+            (see scene_diff.diff_blocks), model (the Gemini model chosen by
+            model_router), scene_format ("spec" when the scene was
+            compiled from a scene spec, "code" for free-form code),
+            narration_urls (language -> video URL, for narrated lessons), failure
+            (the RenderError kind of
+            the last failed render) and usage (resource usage summed over
+            every render attempt: renders, frames and process_utils'
+            usage fields; each attempt is also recorded in the catalog)
+    """
+    notify = on_event or (lambda kind, message: None)
+    cancel_event = cancel_event or threading.Event()
+    started = time.perf_counter()
+    lineage_id = lineage_id or uuid.uuid4().hex[:12]
+    result = _empty_result(lineage_id)
+    timings = result["timings"]
+    usage = result["usage"]
+
+    valid, error, languages = parse_languages(NARRATION_LANGUAGES if languages is None else languages)
+    if not valid:
+        result["error"] = error
+        notify("error", error)
+        return result
+    translations = {}
+
+    new_lesson = not (existing_code and feedback)
+    # Indexed lessons are narrated in one language only
+    if use_index and new_lesson and not languages:
+        score, match = get_index().best_match(topic, subject, quality, voice_preset, threshold=SUGGEST_SIMILARITY)
+        code = get_index().load_code(match) if match else None
+        cache_lookup("lesson_index", bool(match and score >= REUSE_SIMILARITY and code))
+        if match and score >= REUSE_SIMILARITY and code:
+            notify("info", f"♻️ Serving the existing lesson '{match['topic']}' ({score:.0%} match).")
+            result.update({
+                "success": True,
+                "video_url": match["video_url"],
+                "code": code,
+                "lineage_id": match["lineage_id"] or lineage_id,
+                "reused": {"topic": match["topic"], "similarity": score},
+            })
+            timings["total"] = time.perf_counter() - started
+            LESSONS.inc(quality=quality, outcome="reused")
+            return result
+        if match:
+            result["similar"] = {"topic": match["topic"], "similarity": score, "video_url": match["video_url"]}
+            notify("info", f"A similar lesson already exists: '{match['topic']}' ({score:.0%} match) {match['video_url']}")
+
+    # One model per lesson, routed by expected time to a working video
+    model_name = get_router().choose(quality, subject)
+    result["model"] = model_name
+
+    if not new_lesson:
+        notify("info", f"🔄 Regenerating '{topic}' with feedback: {feedback}...")
+        current_code = VoiceoverArtist.regenerate_video_code(
+            original_code=existing_code,
+            feedback=feedback,
+            topic=topic,
+            subject=subject,
+            quality=quality,
+            model_name=model_name
+        )
+        if not current_code.startswith("# Error"):
+            # The lineage workspace's render cache makes re-rendering incremental
+            result["block_diff"] = scene_diff.diff_blocks(existing_code, current_code)
+            notify("progress", f"🧩 {scene_diff.describe(result['block_diff'])}")
+    else:
+        notify("info", f"🎬 Planning and animating '{topic}' ({subject})...")
+        current_code = VoiceoverArtist.generate_voiceover_scene(
+            topic=topic,
+            subject=subject,
+            quality=quality,
+            voice_preset=voice_preset,
+            use_sox=True,
+            model_name=model_name
+        )
+
+    # Send scenes that would run too long or cost too much back before rendering
+    estimate = None
+    for budget_round in range(MAX_BUDGET_REGENERATIONS + 1):
+        if current_code.startswith("# Error"):
+            break
+        estimate = scene_estimator.estimate(current_code, quality)
+        problems = scene_estimator.check_budget(estimate, quality) if estimate else []
+        if not problems or budget_round == MAX_BUDGET_REGENERATIONS:
+            break
+        notify("warning", f"Scene is over budget, regenerating: {' '.join(problems)}")
+        current_code = VoiceoverArtist.regenerate_video_code(
+            original_code=current_code,
+            feedback=" ".join(problems),
+            topic=topic,
+            subject=subject,
+            quality=quality,
+            model_name=model_name
+        )
+    result["estimate"] = estimate
+    timings["generate"] = time.perf_counter() - started
+
+    if estimate:
+        notify("progress", f"⏱ Estimated video length ~{estimate['duration']:.0f}s, render time ~{estimate['eta']:.0f}s")
+
+    priority = priority or priority_for(quality, feedback=not new_lesson)
+    scheduler = get_scheduler()
+    # Interactive renders can be watched while they render
+    on_segment = None
+    if STREAM_OUTPUT and priority in INTERACTIVE:
+        on_segment = lambda segment: notify("segment", segment_message(segment))
+
+    _acquire_lineage(lineage_id)
+    workdir = None
+    try:
+        workdir = Studio.create_workspace(lineage_id)
+        for attempt in range(MAX_RETRIES):
+            if cancel_event.is_set():
+                result["cancelled"] = True
+                result["error"] = "Cancelled."
+                notify("warning", "Lesson generation cancelled.")
+                break
+            if current_code.startswith("# Error"):
+                result["error"] = current_code
+                notify("error", f"Failed to generate animation code: {current_code}")
+                break
+
+            narration = None
+            if languages:
+                # Only blocks new to this attempt are translated
+                translate_started = time.perf_counter()
+                texts = narration_texts(current_code)
+                translated, translate_error, translations = translate(
+                    texts, languages, model_name, subject=subject, known=translations
+                )
+                timings["translate"] += time.perf_counter() - translate_started
+                if not translated:
+                    notify("warning", f"Could not translate the narration ({translate_error}); those blocks stay in {PRIMARY_LANGUAGE}.")
+                narration = {
+                    "languages": languages,
+                    "translations": {text: translations[text] for text in texts if text in translations},
+                }
+
+            notify("progress", f"🎥 Rendering video (Attempt {attempt + 1}/{MAX_RETRIES})...")
+            result["attempts"] = attempt + 1
+
+            # Wait for a render slot; interactive work goes ahead of bulk renders
+            queued = time.perf_counter()
+            ticket = scheduler.acquire(
+                priority, cancel_event=cancel_event,
+                on_wait=lambda position: notify("progress", f"⏳ All render slots are busy; you are number {position} in the queue...")
+            )
+            timings["queue"] += time.perf_counter() - queued
+            if ticket is None:
+                result["cancelled"] = True
+                result["error"] = "Cancelled."
+                notify("warning", "Lesson generation cancelled.")
+                break
+
+            # Try to render
+            render_started = time.perf_counter()
+            lesson = {
+                "topic": topic,
+                "subject": subject,
+                "voice_preset": voice_preset,
+                "feedback": feedback if not new_lesson else None,
+                "lineage_id": lineage_id,
+                "prompt_version": PROMPT_VERSION,
+                "model": model_name,
+                "attempts": attempt + 1,
+            }
+            try:
+                render_success, render_error, rendered_path, render_stats = Studio.render_video(
+                    current_code, "lesson.mp4", quality=quality, workdir=workdir, keep_partial_files=True,
+                    cancel_event=cancel_event, lesson=lesson, reuse=use_index, pause_event=ticket.pause_event,
+                    on_segment=on_segment, narration=narration
+                )
+            finally:
+                scheduler.release(ticket)
+            timings["render"].append(time.perf_counter() - render_started)
+            if render_stats:
+                RENDERS.inc(quality=quality, outcome=render_stats["failure"] or "ok")
+                add_usage(usage, render_stats["usage"])
+                usage["frames"] += render_stats["frames"] or 0
+                usage["renders"] += 1
+            first_render = render_stats and attempt == 0 and new_lesson
+            if first_render and (render_stats["failure"] is None or render_stats["failure"] in MODEL_FAILURES):
+                # Whether the model's first scene rendered feeds model routing
+                get_router().record_render(
+                    model_name, subject, render_stats["failure"] is None,
+                    quality=quality, render_seconds=render_stats["wall_time"]
+                )
+
+            if render_success and rendered_path:
+                result["success"] = True
+                result["video_url"] = rendered_path
+                if languages:
+                    result["narration_urls"] = render_stats.get("narration_urls") if render_stats else None
+                    missing = [code for code in languages if code not in (result["narration_urls"] or {})]
+                    if missing:
+                        notify("warning", f"The lesson could not be narrated in: {', '.join(missing)}.")
+                # Only cold renders (no cached animations) are useful for calibration,
+                # timed without uploads, muxing or pauses; catalog hits have no stats
+                if render_stats and attempt == 0 and not existing_code:
+                    render_seconds = render_stats["wall_time"] - render_stats.get("paused_time", 0.0)
+                    scene_estimator.record_render(current_code, quality, render_seconds)
+                break
+
+            result["error"] = render_error
+            failure = getattr(render_error, "kind", "scene_error")
+            result["failure"] = failure
+            if failure in ("config", "cancelled"):
+                break
+            if attempt < MAX_RETRIES - 1 and not cancel_event.is_set():
+                if failure in ("upload_failed", "missing_output"):
+                    # The scene is fine; the next attempt re-renders from cache
+                    notify("warning", f"Render attempt {attempt + 1} could not deliver the video. Retrying...")
+                    continue
+                notify("warning", f"Render failed on attempt {attempt + 1} ({failure.replace('_', ' ')}). Retrying with self-correction...")
+                # Self-correct; limit breaches get a description of the limit instead of a traceback
+                fix_started = time.perf_counter()
+                current_code = VoiceoverArtist.fix_code(
+                    current_code, FAILURE_HINTS.get(failure, render_error), topic, quality,
+                    model_name=model_name, subject=subject
+                )
+                timings["fix"].append(time.perf_counter() - fix_started)
+    finally:
+        # The workspace is kept for later versions; the janitor expires it
+        if workdir is not None:
+            release_job(workdir)
+        _release_lineage(lineage_id)
+
+    result["code"] = current_code
+    result["scene_format"] = "spec" if scene_spec.extract_spec(current_code) is not None else "code"
+    timings["total"] = time.perf_counter() - started
+    _observe(result, quality)
+    return result
+
+def _observe(result, quality):
+    """Record a finished lesson's stage latencies, attempts and outcome in metrics.py."""
+    timings = result["timings"]
+    for stage in ("generate", "queue", "total"):
+        STAGE_SECONDS.observe(timings[stage], stage=stage, quality=quality)
+    if timings["translate"]:
+        STAGE_SECONDS.observe(timings["translate"], stage="translate", quality=quality)
+    for stage in ("render", "fix"):
+        for seconds in timings[stage]:
+            STAGE_SECONDS.observe(seconds, stage=stage, quality=quality)
+    if result["attempts"]:
+        RENDER_ATTEMPTS.observe(result["attempts"], quality=quality)
+    outcome = "success" if result["success"] else "cancelled" if result["cancelled"] else "failed"
+    LESSONS.inc(quality=quality, outcome=outcome)
+
+def lesson_key(topic, subject, quality, voice_preset):
+    """Normalized identity of a new-lesson request, used to coalesce duplicates."""
+    def normalize(text):
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", str(text).casefold())).strip()
+    return (normalize(topic), normalize(subject), quality, voice_preset)
+
+def generate_lesson_shared(
+    topic,
+    subject,
+    quality="Medium",
+    voice_preset="teaching_assistant",
+    existing_code=None,
+    feedback=None,
+    lineage_id=None,
+    on_event=None,
+    cancel_event=None,
+    use_index=True,
+    priority=None,
+    languages=None
+):
+    """
+    generate_lesson, with identical concurrent new-lesson requests coalesced.
+
+    Requests with the same normalized topic, subject, quality, voice,
+    narration languages and render priority that arrive while one is running
+    attach to it: they see its progress from the start and get the same
+    video, code and lineage. A bulk request never carries an interactive
+    caller along at bulk priority (or without streaming). Fix and feedback
+    versions (existing_code, feedback or lineage_id set) are per user and
+    always run on their own. Unlike generate_lesson, the topic index is
+    consulted by default.
+
+    Returns:
+        dict: as generate_lesson, plus "shared" (True when the result came
+        from another caller's run)
+    """
+    if existing_code or feedback or lineage_id:
+        result = generate_lesson(
+            topic, subject, quality=quality, voice_preset=voice_preset,
+            existing_code=existing_code, feedback=feedback, lineage_id=lineage_id,
+            on_event=on_event, cancel_event=cancel_event, use_index=use_index, priority=priority,
+            languages=languages
+        )
+        result["shared"] = False
+        return result
+
+    def work(emit, flight_cancel_event):
+        return generate_lesson(
+            topic, subject, quality=quality, voice_preset=voice_preset,
+            on_event=emit, cancel_event=flight_cancel_event, use_index=use_index, priority=priority,
+            languages=languages
+        )
+
+    priority = priority or priority_for(quality)
+    key = lesson_key(topic, subject, quality, voice_preset) + (use_index, tuple(languages or ()), priority)
+    result, shared, cancelled = _lesson_flights.run(key, work, on_event=on_event, cancel_event=cancel_event)
+    cache_lookup("singleflight", shared)
+    if cancelled:
+        result = _empty_result()
+        result.update({"cancelled": True, "shared": shared, "error": "Cancelled."})
+        return result
+    # Every caller gets its own copy to modify
+    result = copy.deepcopy(result)
+    result["shared"] = shared
+    return result
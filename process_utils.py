@@ -0,0 +1,201 @@
+"""
+Anti Gravity - Process Utilities
+
+Helpers for running the external tools behind a render (manim, ffmpeg, sox)
+and measuring what they cost.
+"""
+
+import os
+import time
+import signal
+import threading
+import subprocess
+
+# Linux reports block I/O in 512-byte units
+BLOCK_BYTES = 512
+
+# Resource usage fields of run_measured's stats that add up across runs;
+# peak_rss_kb is combined with max instead (see add_usage)
+USAGE_FIELDS = ("wall_time", "cpu_user", "cpu_system", "disk_write_bytes")
+
+def add_usage(total, stats):
+    """
+    Add one run's resource usage (run_measured stats) to a running total.
+
+    Fields the platform could not measure (None) are skipped.
+
+    Returns:
+        dict: total, updated in place
+    """
+    for field in USAGE_FIELDS:
+        if stats.get(field) is not None:
+            total[field] = (total.get(field) or 0) + stats[field]
+    if stats.get("peak_rss_kb") is not None:
+        total["peak_rss_kb"] = max(total.get("peak_rss_kb") or 0, stats["peak_rss_kb"])
+    return total
+
+def kill_process_tree(process):
+    """Kill a process started by run_measured together with its children."""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+def _limit_resources(command, shell, limits):
+    """
+    Wrap a command in /bin/sh so ulimit applies rlimits before it runs.
+
+    Setting them in the child with preexec_fn is not safe while other threads
+    (concurrent renders) are running, and resource.prlimit after Popen would
+    leave a window in which the child already runs, and may fork, unlimited.
+
+    Returns:
+        tuple: (command, shell) to pass to Popen
+    """
+    ulimits = []
+    if limits.get("cpu_seconds"):
+        seconds = int(limits["cpu_seconds"])
+        # SIGXCPU at the soft limit, SIGKILL a little later if it is ignored
+        ulimits += [f"ulimit -S -t {seconds}", f"ulimit -H -t {seconds + 5}"]
+    if limits.get("memory_mb"):
+        ulimits.append(f"ulimit -v {int(limits['memory_mb'] * 1024)}")
+    if limits.get("file_mb"):
+        # ulimit -f counts 512-byte blocks
+        ulimits.append(f"ulimit -f {int(limits['file_mb'] * 2048)}")
+    if not ulimits:
+        return command, shell
+    prefix = " && ".join(ulimits)
+    if shell:
+        return f"{prefix} && {{\n{command}\n}}", True
+    if isinstance(command, (str, bytes, os.PathLike)):
+        command = [command]
+    return ["/bin/sh", "-c", f'{prefix} && exec "$@"', "sh", *command], False
+
+def signal_process_tree(process, signum):
+    """Send a signal to the process group of a process started by run_measured."""
+    try:
+        os.killpg(process.pid, signum)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+def run_measured(command, env=None, shell=True, cancel_event=None, timeout=None, limits=None, pause_event=None):
+    """
+    Run a command and measure what it cost.
+
+    Resource usage is collected with os.wait4 so it covers the child and every
+    descendant it waited for (manim, ffmpeg, sox), independent of other renders
+    running in the same process. The command runs in its own process group,
+    which is killed if cancel_event (a threading.Event) gets set or the
+    timeout (wall-clock seconds) passes.
+
+    Args:
+        limits: Optional rlimits for the command and its children (POSIX
+            only): cpu_seconds, memory_mb (address space) and file_mb
+            (largest file it may write). Like every rlimit they apply to
+            each process on its own: cpu_seconds caps the CPU time of each
+            process in the group, not their sum, so pair it with timeout
+            to bound a command that fans out. A command that exceeds the
+            limits exits with a signal or an error; if /bin/sh cannot set
+            them it exits non-zero without running the command.
+        pause_event: Optional threading.Event; while it is set the process
+            group is stopped (SIGSTOP, POSIX only) and the timeout clock
+            does not run
+
+    Returns:
+        tuple: (returncode, stdout, stderr, stats) where stats has wall_time,
+        cpu_user, cpu_system, peak_rss_kb, disk_write_bytes (usage is None
+        where wait4 is unavailable, e.g. on Windows), paused_time (seconds
+        of wall_time spent stopped by pause_event), cancelled and timed_out.
+    """
+    start = time.perf_counter()
+    if limits and os.name == "posix":
+        command, shell = _limit_resources(command, shell, limits)
+    process = subprocess.Popen(
+        command, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env,
+        start_new_session=(os.name == "posix")
+    )
+
+    finished = threading.Event()
+    cancelled = threading.Event()
+    timed_out = threading.Event()
+    paused = {"seconds": 0.0}
+    if pause_event is not None and not hasattr(signal, "SIGSTOP"):
+        pause_event = None
+    if cancel_event is not None or timeout or pause_event is not None:
+        def watch():
+            deadline = start + timeout if timeout else None
+            paused_at = None
+            while not finished.wait(0.5):
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled.set()
+                elif pause_event is not None and pause_event.is_set():
+                    if paused_at is None:
+                        paused_at = time.perf_counter()
+                        signal_process_tree(process, signal.SIGSTOP)
+                    continue
+                elif paused_at is not None:
+                    signal_process_tree(process, signal.SIGCONT)
+                    paused["seconds"] += time.perf_counter() - paused_at
+                    if deadline:
+                        deadline += time.perf_counter() - paused_at
+                    paused_at = None
+                    continue
+                elif deadline and time.perf_counter() > deadline:
+                    timed_out.set()
+                else:
+                    continue
+                kill_process_tree(process)
+                return
+        threading.Thread(target=watch, daemon=True).start()
+
+    if not hasattr(os, "wait4"):
+        stdout, stderr = process.communicate()
+        finished.set()
+        stats = {
+            "wall_time": time.perf_counter() - start,
+            "cpu_user": None,
+            "cpu_system": None,
+            "peak_rss_kb": None,
+            "disk_write_bytes": None,
+            "paused_time": paused["seconds"],
+            "cancelled": cancelled.is_set(),
+            "timed_out": timed_out.is_set(),
+        }
+        return process.returncode, stdout, stderr, stats
+
+    # Drain both pipes in threads so the child never blocks on a full pipe
+    output = {}
+    def drain(name, stream):
+        output[name] = stream.read()
+        stream.close()
+
+    readers = [
+        threading.Thread(target=drain, args=("stdout", process.stdout), daemon=True),
+        threading.Thread(target=drain, args=("stderr", process.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    _, status, usage = os.wait4(process.pid, 0)
+    finished.set()
+    wall_time = time.perf_counter() - start
+    for reader in readers:
+        reader.join()
+
+    # We reaped the child ourselves, so tell Popen not to wait for it again
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    stats = {
+        "wall_time": wall_time,
+        "cpu_user": usage.ru_utime,
+        "cpu_system": usage.ru_stime,
+        "peak_rss_kb": usage.ru_maxrss,
+        "disk_write_bytes": usage.ru_oublock * BLOCK_BYTES,
+        "paused_time": paused["seconds"],
+        "cancelled": cancelled.is_set(),
+        "timed_out": timed_out.is_set(),
+    }
+    return process.returncode, output.get("stdout", ""), output.get("stderr", ""), stats
@@ -0,0 +1,361 @@
+"""
+Anti Gravity - Durable Render Queue
+
+Lets lessons render on other machines than the web tier. The API server
+(api_server.py --queue) keeps jobs in a SQLite queue instead of running them
+in its own worker pool; standalone workers (render_worker.py) lease one job
+at a time, run the pipeline, heartbeat while they work and publish progress
+events and the result back.
+
+A lease that is not renewed within its lease time (the worker died, lost its
+network or was killed) expires and the job goes back to the queue, up to
+RENDER_MAX_ATTEMPTS leases per job. Jobs survive restarts of the API server
+and of the workers.
+
+Workers reach the queue through the API server's /queue endpoints, or open
+the database directly when they share its filesystem. SQLite's WAL mode
+needs shared memory, so set RENDER_QUEUE_JOURNAL=DELETE when the file sits
+on a network share.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+from jobs import validate_params, QUEUED, RUNNING, FAILED, CANCELLED, TERMINAL_STATES, JOB_TTL_SECONDS
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_PATH = os.getenv("RENDER_QUEUE", os.path.join(REPO_DIR, "render_queue.db"))
+QUEUE_JOURNAL_MODE = os.getenv("RENDER_QUEUE_JOURNAL", "WAL")
+
+# Seconds a lease lasts without a heartbeat; workers renew it every third of that
+LEASE_SECONDS = int(os.getenv("RENDER_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("RENDER_MAX_ATTEMPTS", "3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_seconds REAL,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, created_at);
+CREATE TABLE IF NOT EXISTS task_events (
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (task_id, idx)
+);
+"""
+
+LEASE_LOST = "Lease lost"
+
+class RenderQueue:
+    """Jobs in a SQLite database, leased to workers."""
+
+    def __init__(self, path=None, max_attempts=MAX_ATTEMPTS):
+        self.path = path or QUEUE_PATH
+        self.max_attempts = max_attempts
+        self.local = threading.local()
+
+    def connect(self):
+        """This thread's connection, created (with the schema) on first use."""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            # Autocommit; writes take the database lock up front with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute(f"PRAGMA journal_mode={QUEUE_JOURNAL_MODE}")
+            connection.executescript(SCHEMA)
+            self.local.connection = connection
+        return connection
+
+    def _write(self, work):
+        """Run work(connection) in one write transaction and return its result."""
+        connection = self.connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            value = work(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return value
+
+    @staticmethod
+    def _add_events(connection, task_id, events):
+        row = connection.execute("SELECT COALESCE(MAX(idx) + 1, 0) FROM task_events WHERE task_id = ?", (task_id,)).fetchone()
+        index = row[0]
+        for event in events:
+            connection.execute(
+                "INSERT INTO task_events (task_id, idx, time, kind, message) VALUES (?, ?, ?, ?, ?)",
+                (task_id, index, event.get("time") or time.time(), event["kind"], event["message"]),
+            )
+            index += 1
+
+    def _requeue_expired(self, connection):
+        """Put jobs whose worker stopped heartbeating back in the queue (or fail them)."""
+        now = time.time()
+        expired = connection.execute(
+            "SELECT id, worker, attempts, cancel_requested FROM tasks WHERE status = ? AND lease_expires < ?",
+            (RUNNING, now),
+        ).fetchall()
+        for row in expired:
+            if row["cancel_requested"]:
+                status, message = CANCELLED, f"Worker {row['worker']} stopped responding; job cancelled."
+            elif row["attempts"] >= self.max_attempts:
+                status, message = FAILED, f"Worker {row['worker']} stopped responding; giving up after {row['attempts']} attempts."
+            else:
+                status, message = QUEUED, f"Worker {row['worker']} stopped responding; job requeued."
+            if status == QUEUED:
+                connection.execute("UPDATE tasks SET status = ?, worker = NULL, lease_expires = NULL WHERE id = ?", (status, row["id"]))
+            else:
+                result = {"success": False, "cancelled": status == CANCELLED, "shared": False, "error": message}
+                connection.execute(
+                    "UPDATE tasks SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                    (status, json.dumps(result), now, row["id"]),
+                )
+            self._add_events(connection, row["id"], [{"kind": "warning", "message": message}])
+        return len(expired)
+
+    def enqueue(self, params):
+        """Add a job; returns its ID."""
+        task_id = uuid.uuid4().hex
+
+        def work(connection):
+            connection.execute(
+                "INSERT INTO tasks (id, params, status, created_at) VALUES (?, ?, ?, ?)",
+                (task_id, json.dumps(params), QUEUED, time.time()),
+            )
+            self._add_events(connection, task_id, [{"kind": "info", "message": "Job queued."}])
+        self._write(work)
+        return task_id
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        """
+        Take the oldest queued job.
+
+        Returns:
+            dict: id, params and attempt of the leased job, or None when the
+            queue is empty
+        """
+        def work(connection):
+            self._requeue_expired(connection)
+            row = connection.execute(
+                "SELECT id, params, attempts FROM tasks WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            connection.execute(
+                "UPDATE tasks SET status = ?, worker = ?, lease_seconds = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (RUNNING, worker, lease_seconds, now + lease_seconds, now, row["id"]),
+            )
+            attempt = row["attempts"] + 1
+            self._add_events(connection, row["id"], [{"kind": "info", "message": f"Started on worker {worker} (attempt {attempt})."}])
+            return {"id": row["id"], "params": json.loads(row["params"]), "attempt": attempt}
+        return self._write(work)
+
+    def _holder(self, connection, task_id, worker):
+        row = connection.execute("SELECT status, worker, lease_seconds, cancel_requested FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None or row["status"] != RUNNING or row["worker"] != worker:
+            return None
+        return row
+
+    def heartbeat(self, task_id, worker, events=()):
+        """
+        Renew a lease and store the progress events since the last heartbeat.
+
+        Returns:
+            tuple: (success, error, cancel) where cancel tells the worker to
+            stop; a lost lease (the job was requeued or finished elsewhere)
+            is (False, LEASE_LOST, True)
+        """
+        def work(connection):
+            row = self._holder(connection, task_id, worker)
+            if row is None:
+                return False, LEASE_LOST, True
+            connection.execute("UPDATE tasks SET lease_expires = ? WHERE id = ?", (time.time() + row["lease_seconds"], task_id))
+            self._add_events(connection, task_id, events)
+            return True, "", bool(row["cancel_requested"])
+        return self._write(work)
+
+    def complete(self, task_id, worker, status, result, events=()):
+        """
+        Publish a job's result.
+
+        Returns:
+            tuple: (success, error)
+        """
+        if status not in TERMINAL_STATES:
+            return False, f"Not a final status: {status}"
+
+        def work(connection):
+            if self._holder(connection, task_id, worker) is None:
+                return False, LEASE_LOST
+            self._add_events(connection, task_id, list(events) + [{"kind": "info", "message": f"Job {status}."}])
+            connection.execute(
+                "UPDATE tasks SET status = ?, result = ?, finished_at = ?, lease_expires = NULL WHERE id = ?",
+                (status, json.dumps(result), time.time(), task_id),
+            )
+            return True, ""
+        return self._write(work)
+
+    def cancel(self, task_id):
+        """
+        Cancel a job. A queued job ends at once; a running one is stopped
+        by its worker at the next heartbeat.
+
+        Returns:
+            tuple: (success, error)
+        """
+        def work(connection):
+            row = connection.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return False, "Unknown job"
+            if row["status"] in TERMINAL_STATES:
+                return False, f"Job already {row['status']}"
+            if row["status"] == QUEUED:
+                result = {"success": False, "cancelled": True, "shared": False, "error": "Cancelled."}
+                connection.execute(
+                    "UPDATE tasks SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                    (CANCELLED, json.dumps(result), time.time(), task_id),
+                )
+                self._add_events(connection, task_id, [{"kind": "info", "message": "Job cancelled before it started."}])
+            else:
+                connection.execute("UPDATE tasks SET cancel_requested = 1 WHERE id = ?", (task_id,))
+                self._add_events(connection, task_id, [{"kind": "warning", "message": "Cancellation requested."}])
+            return True, ""
+        return self._write(work)
+
+    def get(self, task_id):
+        """A job's row with params and result decoded, or None."""
+        row = self.connect().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        task = dict(row)
+        task["params"] = json.loads(task["params"])
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+    def events_since(self, task_id, index):
+        rows = self.connect().execute(
+            'SELECT idx AS "index", time, kind, message FROM task_events WHERE task_id = ? AND idx >= ? ORDER BY idx',
+            (task_id, index),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def event_count(self, task_id):
+        return self.connect().execute("SELECT COUNT(*) FROM task_events WHERE task_id = ?", (task_id,)).fetchone()[0]
+
+    def stats(self):
+        """Job counts per state and the workers holding leases."""
+        connection = self.connect()
+        counts = {state: 0 for state in (QUEUED, RUNNING) + TERMINAL_STATES}
+        for row in connection.execute("SELECT status, COUNT(*) AS jobs FROM tasks GROUP BY status"):
+            counts[row["status"]] = row["jobs"]
+        workers = [row[0] for row in connection.execute("SELECT DISTINCT worker FROM tasks WHERE status = ?", (RUNNING,))]
+        return {**counts, "workers": workers}
+
+    def prune(self, ttl=JOB_TTL_SECONDS):
+        """Forget finished jobs older than ttl seconds; also requeues expired leases."""
+        cutoff = time.time() - ttl
+
+        def work(connection):
+            self._requeue_expired(connection)
+            placeholders = ", ".join("?" for _ in TERMINAL_STATES)
+            expired = [row[0] for row in connection.execute(
+                f"SELECT id FROM tasks WHERE status IN ({placeholders}) AND finished_at < ?", TERMINAL_STATES + (cutoff,)
+            )]
+            for task_id in expired:
+                connection.execute("DELETE FROM task_events WHERE task_id = ?", (task_id,))
+                connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            return len(expired)
+        return self._write(work)
+
+class QueuedJob:
+    """A job in the render queue, with the interface of jobs.Job (read live from the queue)."""
+
+    def __init__(self, queue, task_id):
+        self.queue = queue
+        self.id = task_id
+
+    @property
+    def status(self):
+        task = self.queue.get(self.id)
+        return task["status"] if task else CANCELLED
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATES
+
+    def events_since(self, index):
+        return self.queue.events_since(self.id, index)
+
+    def to_dict(self):
+        """JSON-ready view of the job; the result omits the generated code."""
+        task = self.queue.get(self.id) or {}
+        result = task.get("result")
+        if result is not None:
+            result = {key: value for key, value in result.items() if key != "code"}
+        return {
+            "job_id": self.id,
+            "status": task.get("status"),
+            "params": {key: value for key, value in task.get("params", {}).items() if key != "existing_code"},
+            "created_at": task.get("created_at"),
+            "started_at": task.get("started_at"),
+            "finished_at": task.get("finished_at"),
+            "events": self.queue.event_count(self.id),
+            "result": result,
+            "worker": task.get("worker"),
+            "attempts": task.get("attempts"),
+        }
+
+class QueueJobManager:
+    """jobs.JobManager's interface over the render queue; render_worker.py runs the jobs."""
+
+    def __init__(self, queue, ttl=JOB_TTL_SECONDS):
+        self.queue = queue
+        self.ttl = ttl
+
+    def submit(self, params):
+        """
+        Queue a lesson for the next free worker.
+
+        Returns:
+            tuple: (success, error, job)
+        """
+        success, error, params = validate_params(params)
+        if not success:
+            return False, error, None
+        self.queue.prune(self.ttl)
+        return True, "", QueuedJob(self.queue, self.queue.enqueue(params))
+
+    def get(self, job_id):
+        if self.queue.get(job_id) is None:
+            return None
+        return QueuedJob(self.queue, job_id)
+
+    def cancel(self, job_id):
+        return self.queue.cancel(job_id)
+
+    def stats(self):
+        return self.queue.stats()
+
+    def shutdown(self):
+        # Jobs are durable and run on the workers; nothing to stop here
+        pass
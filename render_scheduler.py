@@ -0,0 +1,351 @@
+"""
+Anti Gravity - Render Scheduler
+
+Decides which waiting render runs next when there are more renders than
+render slots on this machine. The slots are shared by every process on the
+host (the Streamlit app, the job API, batch runs and render workers) through
+a small SQLite table, so a batch run in its own process still yields to the
+app's interactive renders. Without it a student waiting on a Low preview
+competes equally with batch 1080p60 renders that take ten times longer.
+
+Every render asks for a slot with a priority class, from most to least
+urgent:
+    preview   interactive Low quality lessons
+    final     interactive Medium/High lessons
+    feedback  regenerations from user feedback (and fixes)
+    bulk      batch runs and other background work
+
+Rules:
+    - RENDER_SLOTS renders run at once (default: half the CPU cores).
+    - RENDER_RESERVED_INTERACTIVE of them are never given to bulk work, so
+      an interactive render finds a free slot even under batch load.
+    - Waiters are served by class, then by arrival; every AGING_SECONDS of
+      waiting moves a waiter up one class, so bulk work cannot starve.
+    - With RENDER_PREEMPT=pause (the default), when interactive renders are
+      still waiting and every slot is busy, the newest running bulk render
+      is paused (SIGSTOP of its process group, see process_utils) and
+      resumed once interactive demand drops. RENDER_PREEMPT=off disables it.
+
+The table (RENDER_SLOTS_DB, default render_slots.db next to this file) holds
+one row per waiting, running or paused render. Each process heartbeats its
+own rows and re-runs the rules above over all rows every POLL_SECONDS, so a
+render paused by another process stops within one poll. Rows of a process
+that stops heartbeating (it crashed) are dropped after STALE_SECONDS. Keep
+the file on a local disk and use the same RENDER_SLOTS settings for every
+process on the host; render workers on other machines use their own.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from collections import deque
+
+from metrics import histogram, register_collector
+
+PREVIEW = "preview"
+FINAL = "final"
+FEEDBACK = "feedback"
+BULK = "bulk"
+# Most urgent first
+PRIORITIES = [PREVIEW, FINAL, FEEDBACK, BULK]
+INTERACTIVE = (PREVIEW, FINAL, FEEDBACK)
+
+WAITING = "waiting"
+RUNNING = "running"
+PAUSED = "paused"
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SLOTS_PATH = os.getenv("RENDER_SLOTS_DB", os.path.join(REPO_DIR, "render_slots.db"))
+RENDER_SLOTS = int(os.getenv("RENDER_SLOTS", str(max(2, (os.cpu_count() or 2) // 2))))
+RENDER_RESERVED_INTERACTIVE = int(os.getenv("RENDER_RESERVED_INTERACTIVE", "1"))
+AGING_SECONDS = float(os.getenv("RENDER_AGING_SECONDS", "120"))
+RENDER_PREEMPT = os.getenv("RENDER_PREEMPT", "pause")
+# Rows not heartbeated for this long belong to a process that is gone
+STALE_SECONDS = float(os.getenv("RENDER_SLOT_STALE_SECONDS", "30"))
+
+# How often each process heartbeats its renders and re-runs the rules
+POLL_SECONDS = 0.5
+# Waits remembered per class for the latency percentiles in stats()
+WAIT_HISTORY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id TEXT PRIMARY KEY,
+    priority TEXT NOT NULL,
+    state TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    paused_at REAL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+WAIT_SECONDS = histogram("antigravity_render_wait_seconds", "Time renders waited for a slot", ["priority"])
+
+def priority_for(quality, feedback=False):
+    """Default priority class of an interactive render."""
+    if feedback:
+        return FEEDBACK
+    return PREVIEW if quality == "Low" else FINAL
+
+class Ticket:
+    """One render's place in the scheduler."""
+
+    def __init__(self, priority):
+        self.id = uuid.uuid4().hex
+        self.priority = priority
+        # Wall-clock times, comparable across processes
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.granted = False
+        # Set while the scheduler wants the render paused
+        self.pause_event = threading.Event()
+
+class RenderScheduler:
+    """Priority render slots shared by every process using the same table."""
+
+    def __init__(self, path=None, slots=RENDER_SLOTS, reserved=RENDER_RESERVED_INTERACTIVE,
+                 preempt=RENDER_PREEMPT == "pause", aging_seconds=AGING_SECONDS):
+        self.path = path or SLOTS_PATH
+        self.slots = max(1, slots)
+        # At least one slot must stay usable by bulk work
+        self.reserved = min(max(0, reserved), self.slots - 1)
+        self.preempt = preempt
+        self.aging_seconds = aging_seconds
+        # This process's renders, by ticket id
+        self.tickets = {}
+        self.waits = {priority: deque(maxlen=WAIT_HISTORY) for priority in PRIORITIES}
+        self.condition = threading.Condition()
+        self.db_lock = threading.Lock()
+        self.connection = None
+        self.poller = None
+
+    def _write(self, work):
+        """Run work(connection) in one write transaction and return its result."""
+        with self.db_lock:
+            if self.connection is None:
+                # Autocommit; writes take the database lock up front with BEGIN IMMEDIATE
+                self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+                self.connection.row_factory = sqlite3.Row
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                self.connection.executescript(SCHEMA)
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                value = work(self.connection)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+            return value
+
+    def acquire(self, priority, cancel_event=None, on_wait=None):
+        """
+        Wait for a render slot.
+
+        Args:
+            priority: One of PRIORITIES
+            cancel_event: Optional threading.Event; stop waiting when set
+            on_wait: Optional callback(position) called once if the render
+                has to wait, with its place in the queue (1 = next)
+
+        Returns:
+            Ticket: pass its pause_event to the render and give it back with
+            release(); None if cancel_event was set while waiting
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown render priority: {priority}")
+        ticket = Ticket(priority)
+        with self.condition:
+            self.tickets[ticket.id] = ticket
+        self._start_poller()
+        position = self._sync(position_of=ticket)
+        if not ticket.granted and on_wait:
+            on_wait(position)
+        with self.condition:
+            while not ticket.granted:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                # The poller re-runs the rules, so aging and other processes' releases count
+                self.condition.wait(POLL_SECONDS)
+        if not ticket.granted:
+            self.release(ticket)
+            return None
+        self.waits[priority].append(ticket.started_at - ticket.enqueued_at)
+        WAIT_SECONDS.observe(ticket.started_at - ticket.enqueued_at, priority=priority)
+        return ticket
+
+    def release(self, ticket):
+        with self.condition:
+            self.tickets.pop(ticket.id, None)
+        ticket.pause_event.clear()
+        self._sync(drop=ticket)
+
+    def _start_poller(self):
+        with self.condition:
+            if self.poller is not None:
+                return
+            self.poller = threading.Thread(target=self._poll, daemon=True)
+            self.poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            with self.condition:
+                if not self.tickets:
+                    continue
+            try:
+                self._sync()
+            except sqlite3.Error as e:
+                print(f"Render scheduler could not reach {self.path}: {e}")
+
+    def _sync(self, drop=None, position_of=None):
+        """
+        Heartbeat this process's renders, re-run the rules over every
+        process's renders, and pass the outcome on to our tickets.
+
+        Returns:
+            int or None: position_of's place in the queue (1 = next)
+        """
+        with self.condition:
+            tickets = list(self.tickets.values())
+
+        def work(connection):
+            now = time.time()
+            if drop is not None:
+                connection.execute("DELETE FROM tickets WHERE id = ?", (drop.id,))
+            for ticket in tickets:
+                updated = connection.execute("UPDATE tickets SET heartbeat = ? WHERE id = ?", (now, ticket.id))
+                if updated.rowcount == 0:
+                    # New, or dropped as stale while this process was stalled
+                    state = PAUSED if ticket.pause_event.is_set() else RUNNING if ticket.granted else WAITING
+                    connection.execute(
+                        "INSERT INTO tickets (id, priority, state, enqueued_at, started_at, paused_at, heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (ticket.id, ticket.priority, state, ticket.enqueued_at, ticket.started_at, now if state == PAUSED else None, now),
+                    )
+            rows = self._schedule(connection, now)
+            position = None
+            if position_of is not None and rows[position_of.id]["state"] == WAITING:
+                waiting = sorted((row for row in rows.values() if row["state"] == WAITING), key=lambda row: self._order(row, now))
+                position = [row["id"] for row in waiting].index(position_of.id) + 1
+            return {ticket.id: rows.get(ticket.id) for ticket in tickets}, position
+
+        states, position = self._write(work)
+        with self.condition:
+            for ticket in tickets:
+                row = states[ticket.id]
+                if row is None:
+                    continue
+                if row["state"] != WAITING and not ticket.granted:
+                    ticket.granted = True
+                    ticket.started_at = row["started_at"]
+                if row["state"] == PAUSED:
+                    ticket.pause_event.set()
+                elif ticket.id in self.tickets:
+                    ticket.pause_event.clear()
+            self.condition.notify_all()
+        return position
+
+    def _order(self, row, now):
+        """Class index, lowered by one per aging_seconds waited, then arrival."""
+        aged = (now - row["enqueued_at"]) / self.aging_seconds if self.aging_seconds > 0 else 0
+        return (PRIORITIES.index(row["priority"]) - aged, row["enqueued_at"], row["id"])
+
+    def _schedule(self, connection, now):
+        """
+        Grant, pause and resume slots over every process's rows, inside a
+        write transaction.
+
+        Returns:
+            dict: every live row by id, after the changes
+        """
+        connection.execute("DELETE FROM tickets WHERE heartbeat < ?", (now - STALE_SECONDS,))
+        rows = {row["id"]: dict(row) for row in connection.execute("SELECT * FROM tickets")}
+        waiting = sorted((row for row in rows.values() if row["state"] == WAITING), key=lambda row: self._order(row, now))
+        running = [row for row in rows.values() if row["state"] == RUNNING]
+        paused = sorted((row for row in rows.values() if row["state"] == PAUSED), key=lambda row: row["paused_at"])
+        bulk_limit = self.slots - self.reserved
+        changed = set()
+
+        def interactive_waiting():
+            return any(row["priority"] in INTERACTIVE for row in waiting)
+
+        while True:
+            granted = None
+            if len(running) < self.slots:
+                for row in waiting:
+                    if row["priority"] == BULK and (len(running) >= bulk_limit or paused):
+                        # Reserved slots are for interactive work, and paused bulk renders resume first
+                        continue
+                    granted = row
+                    break
+            if granted is not None:
+                waiting.remove(granted)
+                running.append(granted)
+                granted.update(state=RUNNING, started_at=now)
+                changed.add(granted["id"])
+                continue
+            running_bulk = [row for row in running if row["priority"] == BULK]
+            if self.preempt and running_bulk and len(running) >= self.slots and interactive_waiting():
+                newest = max(running_bulk, key=lambda row: row["started_at"])
+                running.remove(newest)
+                paused.append(newest)
+                newest.update(state=PAUSED, paused_at=now)
+                changed.add(newest["id"])
+                continue
+            break
+        # Resume paused bulk renders, oldest first, once interactive demand has passed
+        while paused and not interactive_waiting() and len(running) < bulk_limit:
+            resumed = paused.pop(0)
+            running.append(resumed)
+            resumed.update(state=RUNNING, paused_at=None)
+            changed.add(resumed["id"])
+
+        for ticket_id in changed:
+            row = rows[ticket_id]
+            connection.execute(
+                "UPDATE tickets SET state = ?, started_at = ?, paused_at = ? WHERE id = ?",
+                (row["state"], row["started_at"], row["paused_at"], ticket_id),
+            )
+        return rows
+
+    def stats(self):
+        """Running, waiting and paused renders per class on this host, and this process's recent wait percentiles (seconds)."""
+        rows = self._write(lambda connection: self._schedule(connection, time.time())).values()
+        report = {"slots": self.slots, "reserved_interactive": self.reserved, "classes": {}}
+        with self.condition:
+            for priority in PRIORITIES:
+                waits = sorted(self.waits[priority])
+                counts = {state: sum(1 for row in rows if row["priority"] == priority and row["state"] == state) for state in (RUNNING, WAITING, PAUSED)}
+                report["classes"][priority] = {
+                    **counts,
+                    "wait_p50": waits[len(waits) // 2] if waits else None,
+                    "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+                }
+        return report
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """The process-wide scheduler, created on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RenderScheduler()
+        return _scheduler
+
+def _collect_metrics():
+    report = get_scheduler().stats()
+    renders = [
+        ({"priority": priority, "state": state}, counts[state])
+        for priority, counts in report["classes"].items()
+        for state in ("running", "waiting", "paused")
+    ]
+    return [
+        ("antigravity_render_slots", "gauge", "Render slots on this host", [({}, report["slots"])]),
+        ("antigravity_renders_active", "gauge", "Renders by priority class and state (running, waiting, paused)", renders),
+    ]
+
+register_collector(_collect_metrics)
@@ -0,0 +1,219 @@
+"""
+Anti Gravity - Render Worker
+
+Standalone worker that renders lessons from the durable render queue
+(render_queue.py), so rendering can scale out to other machines separately
+from the web tier. Each slot leases one job, runs the lesson pipeline on it
+and heartbeats while it runs, sending the progress events along; the result
+is published when the pipeline ends. A cancelled job is stopped at the next
+heartbeat.
+
+If the worker dies, its leases expire and the jobs go back to the queue. On
+Ctrl-C or SIGTERM running renders are killed and their jobs are left to
+expire the same way, so another worker picks them up.
+
+The worker needs the same environment as the app (GEMINI_API_KEY,
+GITHUB_TOKEN, GITHUB_REPO, manim, ffmpeg, sox). Set METRICS_PORT to serve
+its metrics (see metrics.py).
+
+Usage:
+    python render_worker.py --server http://web-host:8600 --slots 2
+    python render_worker.py --queue /shared/render_queue.db
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+
+from janitor import start_janitor
+from jobs import run_lesson, job_status
+from render_queue import RenderQueue, LEASE_SECONDS, LEASE_LOST
+from warmup import start_warmup
+from metrics import start_metrics_server
+
+RENDER_QUEUE_SERVER = os.getenv("RENDER_QUEUE_SERVER", "")
+API_TOKEN = os.getenv("API_TOKEN", "")
+
+# Seconds between lease attempts while the queue is empty
+POLL_SECONDS = 2.0
+# Delays between attempts to publish a result before leaving the lease to expire
+COMPLETE_RETRY_DELAYS = [0, 2, 5, 15, 30]
+
+class QueueClient:
+    """RenderQueue's worker methods over the API server's /queue endpoints."""
+
+    def __init__(self, server, token=""):
+        self.server = server.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def _post(self, path, payload):
+        import requests
+        return requests.post(f"{self.server}{path}", json=payload, headers=self.headers, timeout=30)
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        try:
+            response = self._post("/queue/lease", {"worker": worker, "lease_seconds": lease_seconds})
+        except Exception as e:
+            print(f"Could not reach the queue: {e}")
+            return None
+        if response.status_code == 204:
+            return None
+        if response.status_code != 200:
+            print(f"Lease request failed: {response.status_code} {response.text[:200]}")
+            return None
+        return response.json()
+
+    def heartbeat(self, task_id, worker, events=()):
+        try:
+            response = self._post(f"/queue/{task_id}/heartbeat", {"worker": worker, "events": list(events)})
+        except Exception as e:
+            return False, str(e), False
+        if response.status_code == 409:
+            return False, LEASE_LOST, True
+        if response.status_code != 200:
+            return False, f"{response.status_code} {response.text[:200]}", False
+        return True, "", response.json().get("cancel", False)
+
+    def complete(self, task_id, worker, status, result, events=()):
+        try:
+            response = self._post(
+                f"/queue/{task_id}/complete",
+                {"worker": worker, "status": status, "result": result, "events": list(events)},
+            )
+        except Exception as e:
+            return False, str(e)
+        if response.status_code == 409:
+            return False, LEASE_LOST
+        if response.status_code != 200:
+            return False, f"{response.status_code} {response.text[:200]}"
+        return True, ""
+
+class Worker:
+    """Leases jobs into a fixed number of slots and runs them."""
+
+    def __init__(self, queue, worker_id, slots=1, lease_seconds=LEASE_SECONDS):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.slots = max(1, slots)
+        self.lease_seconds = lease_seconds
+        self.running = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def run(self):
+        print(f"Render worker {self.worker_id} started with {self.slots} slot(s).")
+        while not self.stopping.is_set():
+            with self.lock:
+                free = self.slots - len(self.running)
+            task = self.queue.lease(self.worker_id, self.lease_seconds) if free > 0 else None
+            if task is None:
+                self.stopping.wait(POLL_SECONDS)
+                continue
+            print(f"Leased job {task['id']} (attempt {task['attempt']}): {task['params'].get('topic')}")
+            cancel_event = threading.Event()
+            with self.lock:
+                self.running[task["id"]] = cancel_event
+            threading.Thread(target=self.run_task, args=(task, cancel_event), name=f"job-{task['id'][:8]}", daemon=True).start()
+
+    def stop(self):
+        """Kill running renders; their leases expire and the jobs are requeued."""
+        self.stopping.set()
+        with self.lock:
+            for cancel_event in self.running.values():
+                cancel_event.set()
+        # Give the pipelines a moment to kill their render process groups
+        deadline = time.time() + 10
+        while self.running and time.time() < deadline:
+            time.sleep(0.2)
+
+    def run_task(self, task, cancel_event):
+        events = []
+        events_lock = threading.Lock()
+
+        def on_event(kind, message):
+            with events_lock:
+                events.append({"time": time.time(), "kind": kind, "message": message})
+
+        def take_events():
+            with events_lock:
+                batch = events[:]
+                del events[:]
+            return batch
+
+        heartbeat_stop = threading.Event()
+
+        def heartbeat():
+            while not heartbeat_stop.wait(self.lease_seconds / 3):
+                batch = take_events()
+                success, error, cancel = self.queue.heartbeat(task["id"], self.worker_id, batch)
+                if not success and error != LEASE_LOST:
+                    # Transient; resend the events with the next heartbeat
+                    print(f"Heartbeat for job {task['id']} failed: {error}")
+                    with events_lock:
+                        events[:0] = batch
+                if cancel:
+                    cancel_event.set()
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            result = run_lesson(task["params"], on_event, cancel_event)
+        finally:
+            heartbeat_stop.set()
+            heartbeat_thread.join()
+            with self.lock:
+                self.running.pop(task["id"], None)
+
+        if self.stopping.is_set():
+            # Shutting down: leave the lease to expire so another worker reruns it
+            return
+        status = job_status(result, cancel_event.is_set())
+        final_events = take_events()
+        for delay in COMPLETE_RETRY_DELAYS:
+            time.sleep(delay)
+            success, error = self.queue.complete(task["id"], self.worker_id, status, result, final_events)
+            if success or error == LEASE_LOST:
+                break
+            print(f"Could not publish the result of job {task['id']}: {error}")
+        print(f"Job {task['id']} {status}" + ("" if success else f" (not published: {error})"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Render lessons from the render queue.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--server", default=RENDER_QUEUE_SERVER, help="API server running with --queue")
+    source.add_argument("--queue", help="Open the queue database directly (same host or shared filesystem)")
+    parser.add_argument("--token", default=API_TOKEN, help="API_TOKEN of the server")
+    parser.add_argument("--slots", type=int, default=1, help="Lessons rendered at the same time")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+    args = parser.parse_args()
+
+    if args.queue:
+        queue = RenderQueue(args.queue)
+    elif args.server:
+        queue = QueueClient(args.server, args.token)
+    else:
+        parser.error("Give --server (or RENDER_QUEUE_SERVER) or --queue")
+
+    worker = Worker(queue, args.worker_id, slots=args.slots, lease_seconds=args.lease_seconds)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    start_janitor()
+    start_warmup()
+    start_metrics_server()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        print("\nStopping; running jobs will be requeued when their leases expire.")
+        worker.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
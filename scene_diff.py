@@ -0,0 +1,144 @@
+"""
+Anti Gravity - Voiceover Block Diff
+
+Splits a generated SceneTopic into its voiceover blocks (each
+`with self.voiceover(text=...)` statement in construct(), together with the
+statements leading up to it) and compares two versions of a scene block by
+block.
+
+Re-rendering itself is incremental through Manim's animation cache in the
+lesson workspace: an animation whose code and starting state are unchanged
+is reused, and manim-voiceover only synthesizes narration it has not cached.
+Unchanged blocks before the first change are therefore free, later blocks
+are re-rendered only where the change reaches their state, and per-animation
+encoding (encoding.apply_profile_segmented) keeps the final encode
+proportional too. This module tells the pipeline (and the user) how much of
+a feedback version has to be rendered again.
+"""
+
+import ast
+import difflib
+
+def _is_voiceover(statement):
+    if not isinstance(statement, ast.With):
+        return False
+    for item in statement.items:
+        call = item.context_expr
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr == "voiceover":
+            return True
+    return False
+
+def _narration(statement):
+    for item in statement.items:
+        for keyword in getattr(item.context_expr, "keywords", []):
+            if keyword.arg == "text" and isinstance(keyword.value, ast.Constant):
+                return str(keyword.value.value)
+    return ""
+
+def _construct(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name == "construct":
+            return node
+    return None
+
+def split_blocks(code):
+    """
+    Split a scene into voiceover blocks.
+
+    Returns:
+        list: dicts with index, narration, source, start_line and end_line,
+        or None if the code does not parse or has no construct()
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    construct = _construct(tree)
+    if construct is None:
+        return None
+
+    lines = code.splitlines()
+    blocks = []
+    pending = []
+
+    def close(statements, narration):
+        start = statements[0].lineno
+        end = statements[-1].end_lineno
+        blocks.append({
+            "index": len(blocks),
+            "narration": narration,
+            "source": "\n".join(line.strip() for line in lines[start - 1:end]),
+            "start_line": start,
+            "end_line": end,
+        })
+
+    for statement in construct.body:
+        pending.append(statement)
+        if _is_voiceover(statement):
+            close(pending, _narration(statement))
+            pending = []
+    if pending:
+        close(pending, "")
+    return blocks
+
+def _preamble(code, blocks):
+    """Everything outside construct()'s blocks (imports, helpers, class setup)."""
+    lines = code.splitlines()
+    covered = set()
+    for block in blocks:
+        covered.update(range(block["start_line"], block["end_line"] + 1))
+    return "\n".join(line.strip() for number, line in enumerate(lines, start=1) if number not in covered)
+
+def diff_blocks(old_code, new_code):
+    """
+    Compare two versions of a scene block by block.
+
+    Returns:
+        dict: total (blocks in the new scene), changed (indexes of new or
+        modified blocks), first_changed (index, or None), reused_prefix
+        (unchanged blocks before the first change), narration_changed (blocks
+        whose narration must be synthesized) and preamble_changed, or None
+        when either version cannot be split
+    """
+    old_blocks = split_blocks(old_code)
+    new_blocks = split_blocks(new_code)
+    if old_blocks is None or new_blocks is None:
+        return None
+
+    matcher = difflib.SequenceMatcher(
+        a=[block["source"] for block in old_blocks],
+        b=[block["source"] for block in new_blocks],
+        autojunk=False,
+    )
+    unchanged = set()
+    for match in matcher.get_matching_blocks():
+        unchanged.update(range(match.b, match.b + match.size))
+    changed = [block["index"] for block in new_blocks if block["index"] not in unchanged]
+
+    old_narrations = {block["narration"] for block in old_blocks}
+    preamble_changed = _preamble(old_code, old_blocks) != _preamble(new_code, new_blocks)
+    first_changed = 0 if preamble_changed and new_blocks else (changed[0] if changed else None)
+    return {
+        "total": len(new_blocks),
+        "changed": changed,
+        "first_changed": first_changed,
+        "reused_prefix": len(new_blocks) if first_changed is None else first_changed,
+        "narration_changed": sum(1 for i in changed if new_blocks[i]["narration"] not in old_narrations),
+        "preamble_changed": preamble_changed,
+    }
+
+def describe(diff):
+    """One-line summary of a diff_blocks result for progress messages."""
+    if diff is None:
+        return "Scene structure changed; re-rendering it in full."
+    if diff["first_changed"] is None:
+        return "No voiceover block changed; the render comes from cache."
+    if diff["preamble_changed"]:
+        return f"Setup code changed; re-rendering all {diff['total']} blocks (cached animations are still reused)."
+    changed = ", ".join(str(i + 1) for i in diff["changed"])
+    message = f"{len(diff['changed'])} of {diff['total']} voiceover blocks changed ({changed})"
+    if diff["reused_prefix"] == 1:
+        message += "; block 1 reused"
+    elif diff["reused_prefix"]:
+        message += f"; blocks 1-{diff['reused_prefix']} reused"
+    return message + f"; {diff['narration_changed']} new narration clip(s) to synthesize."
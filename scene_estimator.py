@@ -0,0 +1,421 @@
+"""
+Anti Gravity - Scene Cost Estimator
+
+Static analysis of a generated SceneTopic. Walks the AST of construct() to
+estimate the video's duration (play run_times, waits and voiceover narration
+length), count animations, mobjects, Text objects and updaters, and predict
+render seconds per quality tier with a linear model whose coefficients are
+calibrated from recorded render timings.
+
+Usage:
+    python scene_estimator.py estimate temp_topic.py
+    python scene_estimator.py calibrate     # refit from render_history.jsonl and the benchmark baseline
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import argparse
+import threading
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+COEFFICIENTS_PATH = os.path.join(REPO_DIR, "benchmarks", "estimator_coefficients.json")
+HISTORY_PATH = os.path.join(REPO_DIR, "render_history.jsonl")
+
+# Roughly the speaking rate of gTTS English narration
+WORDS_PER_SECOND = 2.6
+
+# Native frame rate of each tier (-ql/-qm/-qh)
+TIER_FPS = {"Low": 15, "Medium": 30, "High": 60}
+
+# Assumed iteration count for loops whose length cannot be read statically
+UNKNOWN_LOOP_ITERATIONS = 5
+
+MOBJECT_CLASSES = {
+    "Circle", "Square", "Rectangle", "RoundedRectangle", "Triangle", "Polygon", "RegularPolygon",
+    "Line", "DashedLine", "Arrow", "DoubleArrow", "Vector", "Dot", "Ellipse", "Arc", "Annulus",
+    "Sector", "Brace", "NumberLine", "Axes", "NumberPlane", "Text", "MarkupText", "Paragraph",
+    "VGroup", "Group", "SurroundingRectangle", "BackgroundRectangle", "Star", "Cross",
+}
+TEXT_CLASSES = {"Text", "MarkupText", "Paragraph"}
+
+# Features used by the render-time model, in coefficient order
+FEATURES = ["frames", "animations", "texts", "updater_frames", "constant"]
+
+# Uncalibrated starting point (seconds per unit); replaced by `calibrate`
+DEFAULT_COEFFICIENTS = {
+    "Low": {"frames": 0.02, "animations": 0.3, "texts": 0.15, "updater_frames": 0.01, "constant": 4.0},
+    "Medium": {"frames": 0.05, "animations": 0.4, "texts": 0.2, "updater_frames": 0.03, "constant": 5.0},
+    "High": {"frames": 0.15, "animations": 0.6, "texts": 0.3, "updater_frames": 0.08, "constant": 6.0},
+}
+
+# Budgets a scene must meet before it is sent to a render worker
+MAX_VIDEO_SECONDS = float(os.getenv("MAX_VIDEO_SECONDS", "120"))
+MAX_RENDER_SECONDS = {"Low": 180, "Medium": 420, "High": 900}
+MAX_UPDATERS = 3
+
+def _call_name(node):
+    """Name of the called function or method, e.g. 'Circle' or 'play'."""
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+def _is_self_call(node, method):
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == method
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id == "self"
+    )
+
+def _number(node, default):
+    try:
+        value = ast.literal_eval(node)
+    except (ValueError, SyntaxError, TypeError):
+        return default
+    return float(value) if isinstance(value, (int, float)) else default
+
+class _SceneWalker:
+    """Accumulates duration and counts over construct(), scaling by loop iterations."""
+
+    def __init__(self):
+        self.known_lengths = {}
+        self.animations = 0
+        self.play_calls = 0
+        self.mobjects = 0
+        self.texts = 0
+        self.updaters = 0
+        self.narration_seconds = 0.0
+        self.voiceover_blocks = 0
+        self.unbounded_loops = 0
+        self.max_loop_iterations = 1
+
+    def loop_iterations(self, node):
+        """Best-effort iteration count for a for-loop's iterable."""
+        it = node.iter
+        if isinstance(it, ast.Call) and _call_name(it) in ("enumerate", "reversed", "list", "zip") and it.args:
+            it = it.args[0]
+        if isinstance(it, ast.Call) and _call_name(it) == "range":
+            bounds = [_number(a, None) for a in it.args]
+            if None not in bounds and bounds:
+                if len(bounds) == 1:
+                    return max(0, int(bounds[0]))
+                step = bounds[2] if len(bounds) > 2 and bounds[2] else 1
+                return max(0, int((bounds[1] - bounds[0]) / step))
+            # range(len(values)) with a known list
+            if len(it.args) == 1 and isinstance(it.args[0], ast.Call) and _call_name(it.args[0]) == "len":
+                inner = it.args[0].args[0] if it.args[0].args else None
+                if isinstance(inner, ast.Name) and inner.id in self.known_lengths:
+                    return self.known_lengths[inner.id]
+        if isinstance(it, (ast.List, ast.Tuple, ast.Set)):
+            return len(it.elts)
+        if isinstance(it, ast.Name) and it.id in self.known_lengths:
+            return self.known_lengths[it.id]
+        self.unbounded_loops += 1
+        return UNKNOWN_LOOP_ITERATIONS
+
+    def count_expression(self, node, multiplier):
+        """Count mobject constructions and updaters anywhere inside an expression."""
+        for sub in ast.walk(node):
+            if not isinstance(sub, ast.Call):
+                continue
+            name = _call_name(sub)
+            if name in MOBJECT_CLASSES:
+                self.mobjects += multiplier
+                if name in TEXT_CLASSES:
+                    self.texts += multiplier
+            elif name in ("always_redraw", "add_updater"):
+                self.updaters += multiplier
+
+    def block(self, statements, multiplier):
+        """Walk a list of statements and return their duration in seconds (per pass)."""
+        duration = 0.0
+        for stmt in statements:
+            duration += self.statement(stmt, multiplier)
+        return duration
+
+    def statement(self, stmt, multiplier):
+        if isinstance(stmt, ast.Assign) and isinstance(stmt.value, (ast.List, ast.Tuple)):
+            for target in stmt.targets:
+                if isinstance(target, ast.Name):
+                    self.known_lengths[target.id] = len(stmt.value.elts)
+
+        if isinstance(stmt, ast.For):
+            iterations = self.loop_iterations(stmt)
+            self.max_loop_iterations = max(self.max_loop_iterations, iterations * multiplier)
+            body = self.block(stmt.body, multiplier * iterations)
+            return body * iterations + self.block(stmt.orelse, multiplier)
+
+        if isinstance(stmt, ast.While):
+            self.unbounded_loops += 1
+            iterations = UNKNOWN_LOOP_ITERATIONS
+            return self.block(stmt.body, multiplier * iterations) * iterations
+
+        if isinstance(stmt, ast.If):
+            # Either branch may run; budget for the longer one
+            return max(self.block(stmt.body, multiplier), self.block(stmt.orelse, multiplier))
+
+        if isinstance(stmt, ast.With):
+            narration = 0.0
+            for item in stmt.items:
+                call = item.context_expr
+                if _is_self_call(call, "voiceover"):
+                    text = next((kw.value for kw in call.keywords if kw.arg == "text"), call.args[0] if call.args else None)
+                    try:
+                        words = len(str(ast.literal_eval(text)).split())
+                    except (ValueError, SyntaxError, TypeError):
+                        words = 20
+                    narration = words / WORDS_PER_SECOND
+                    self.narration_seconds += narration * multiplier
+                    self.voiceover_blocks += multiplier
+            inner = self.block(stmt.body, multiplier)
+            # The voiceover block waits for the narration to finish
+            return max(inner, narration)
+
+        if isinstance(stmt, (ast.Try,)):
+            return self.block(stmt.body, multiplier)
+
+        if isinstance(stmt, (ast.FunctionDef, ast.ClassDef)):
+            return 0.0
+
+        duration = 0.0
+        for node in ast.walk(stmt):
+            if _is_self_call(node, "play"):
+                self.play_calls += multiplier
+                animations = [a for a in node.args if not isinstance(a, ast.Starred)]
+                self.animations += max(1, len(animations)) * multiplier
+                run_time = next((kw.value for kw in node.keywords if kw.arg == "run_time"), None)
+                duration += _number(run_time, 1.0) if run_time is not None else 1.0
+            elif _is_self_call(node, "wait"):
+                duration += _number(node.args[0], 1.0) if node.args else 1.0
+        self.count_expression(stmt, multiplier)
+        return duration
+
+def analyze(code):
+    """
+    Extract cost features from SceneTopic.construct.
+
+    Returns:
+        dict: duration, narration_seconds, animations, play_calls, mobjects,
+        texts, updaters, voiceover_blocks, unbounded_loops and
+        max_loop_iterations; or None if the code has no parsable construct()
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    construct = None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef) and node.name == "SceneTopic":
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == "construct":
+                    construct = item
+    if construct is None:
+        return None
+
+    walker = _SceneWalker()
+    duration = walker.block(construct.body, 1)
+    return {
+        "duration": round(duration, 1),
+        "narration_seconds": round(walker.narration_seconds, 1),
+        "animations": walker.animations,
+        "play_calls": walker.play_calls,
+        "mobjects": walker.mobjects,
+        "texts": walker.texts,
+        "updaters": walker.updaters,
+        "voiceover_blocks": walker.voiceover_blocks,
+        "unbounded_loops": walker.unbounded_loops,
+        "max_loop_iterations": walker.max_loop_iterations,
+    }
+
+def _frame_rate(quality):
+    from encoding import get_profile
+    _, profile = get_profile(quality)
+    return profile.get("frame_rate") or TIER_FPS.get(quality, 15)
+
+def feature_vector(features, quality):
+    fps = _frame_rate(quality)
+    # Updaters re-run every frame they are alive; assume they live the whole scene
+    return {
+        "frames": features["duration"] * fps,
+        "animations": features["animations"],
+        "texts": features["texts"],
+        "updater_frames": features["updaters"] * features["duration"] * fps,
+        "constant": 1.0,
+    }
+
+_coefficients = None
+_coefficients_lock = threading.Lock()
+
+def load_coefficients():
+    global _coefficients
+    with _coefficients_lock:
+        if _coefficients is None:
+            coefficients = {tier: dict(values) for tier, values in DEFAULT_COEFFICIENTS.items()}
+            if os.path.exists(COEFFICIENTS_PATH):
+                with open(COEFFICIENTS_PATH, "r", encoding="utf-8") as f:
+                    for tier, values in json.load(f).get("tiers", {}).items():
+                        coefficients.setdefault(tier, {}).update(values)
+            _coefficients = coefficients
+        return _coefficients
+
+def predict_render_seconds(features, quality):
+    coefficients = load_coefficients().get(quality, DEFAULT_COEFFICIENTS["Low"])
+    vector = feature_vector(features, quality)
+    return round(sum(coefficients[name] * vector[name] for name in FEATURES), 1)
+
+def estimate(code, quality="Medium"):
+    """
+    Analyze a scene and predict its render time for every tier.
+
+    Returns:
+        dict: The analyze() features plus render_seconds per tier and the
+        requested tier's prediction under "eta", or None if unparsable
+    """
+    features = analyze(code)
+    if features is None:
+        return None
+    features["render_seconds"] = {tier: predict_render_seconds(features, tier) for tier in TIER_FPS}
+    features["eta"] = features["render_seconds"].get(quality)
+    return features
+
+def check_budget(estimate_result, quality="Medium"):
+    """
+    Compare an estimate against the scene budgets.
+
+    Returns:
+        list: Problems phrased as instructions for regenerating the scene
+            (empty when the scene is within budget)
+    """
+    problems = []
+    if estimate_result["duration"] > MAX_VIDEO_SECONDS:
+        problems.append(
+            f"The scene runs about {estimate_result['duration']:.0f} seconds; keep the total under "
+            f"{MAX_VIDEO_SECONDS:.0f} seconds by shortening narration and waits."
+        )
+    if estimate_result["updaters"] > MAX_UPDATERS:
+        problems.append(
+            f"The scene uses {estimate_result['updaters']} updaters/always_redraw calls; use at most "
+            f"{MAX_UPDATERS} and prefer plain .animate transitions."
+        )
+    limit = MAX_RENDER_SECONDS.get(quality)
+    if limit and estimate_result["eta"] and estimate_result["eta"] > limit:
+        problems.append(
+            f"The scene is too expensive to render ({estimate_result['animations']} animations, "
+            f"{estimate_result['mobjects']} objects); simplify loops and reduce the number of self.play calls."
+        )
+    return problems
+
+# ===== Calibration =====
+
+def record_render(code, quality, render_seconds):
+    """Append an observed render time to the history used by `calibrate`."""
+    features = analyze(code)
+    if features is None:
+        return
+    record = {"quality": quality, "features": features, "render_seconds": round(render_seconds, 2), "recorded_at": time.time()}
+    try:
+        with open(HISTORY_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Could not record render timing: {e}")
+
+def _training_records():
+    records = []
+    if os.path.exists(HISTORY_PATH):
+        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+
+    # Benchmark baseline timings of the recorded corpus are calibration data too
+    baseline_path = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+    if os.path.exists(baseline_path):
+        import stubs
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        for entry in stubs.load_corpus():
+            features = analyze(entry["code"])
+            for quality, metrics in baseline.get(entry["name"], {}).items():
+                if features and metrics.get("wall_time"):
+                    records.append({"quality": quality, "features": features, "render_seconds": metrics["wall_time"]})
+    return records
+
+def calibrate(records):
+    """
+    Fit per-tier coefficients by least squares, clamped to be non-negative.
+
+    Tiers with fewer observations than features keep their current values.
+
+    Returns:
+        dict: {tier: {"coefficients": {...}, "samples": n, "mean_abs_error": s}}
+    """
+    import numpy as np
+
+    fitted = {}
+    for tier in TIER_FPS:
+        tier_records = [r for r in records if r["quality"] == tier]
+        if len(tier_records) < len(FEATURES):
+            continue
+        X = np.array([[feature_vector(r["features"], tier)[name] for name in FEATURES] for r in tier_records])
+        y = np.array([r["render_seconds"] for r in tier_records])
+        solution, *_ = np.linalg.lstsq(X, y, rcond=None)
+        solution = np.clip(solution, 0, None)
+        error = float(np.mean(np.abs(X @ solution - y)))
+        fitted[tier] = {
+            "coefficients": {name: round(float(value), 5) for name, value in zip(FEATURES, solution)},
+            "samples": len(tier_records),
+            "mean_abs_error": round(error, 2),
+        }
+    return fitted
+
+def main():
+    global _coefficients
+    parser = argparse.ArgumentParser(description="Static cost estimator for generated scenes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    estimate_parser = sub.add_parser("estimate", help="Estimate duration and render time of a scene file")
+    estimate_parser.add_argument("path")
+    estimate_parser.add_argument("--quality", default="Medium", choices=list(TIER_FPS))
+    sub.add_parser("calibrate", help="Refit coefficients from recorded render timings")
+    args = parser.parse_args()
+
+    if args.command == "estimate":
+        with open(args.path, "r", encoding="utf-8") as f:
+            result = estimate(f.read(), args.quality)
+        if result is None:
+            print("Could not find SceneTopic.construct in this file.")
+            return 1
+        print(json.dumps(result, indent=4))
+        for problem in check_budget(result, args.quality):
+            print(f"OVER BUDGET: {problem}")
+        return 0
+
+    fitted = calibrate(_training_records())
+    if not fitted:
+        print("Not enough recorded renders to calibrate; coefficients unchanged.")
+        return 1
+    data = {"tiers": {}, "fit": {}}
+    if os.path.exists(COEFFICIENTS_PATH):
+        with open(COEFFICIENTS_PATH, "r", encoding="utf-8") as f:
+            data.update(json.load(f))
+    data["calibrated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for tier, fit in fitted.items():
+        data["tiers"][tier] = fit["coefficients"]
+        data["fit"][tier] = {"samples": fit["samples"], "mean_abs_error": fit["mean_abs_error"]}
+        print(f"{tier}: {fit['coefficients']} (n={fit['samples']}, MAE {fit['mean_abs_error']}s)")
+    with open(COEFFICIENTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    _coefficients = None
+    print(f"Coefficients written to {COEFFICIENTS_PATH}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,588 @@
+"""
+Anti Gravity - Scene Specs
+
+A compact JSON description of a lesson that the LLM can write instead of
+150-300 lines of free-form Manim code. A spec is a list of beats; each beat
+is one narration line plus what appears, disappears and happens on screen
+while it is spoken:
+
+    {
+      "title": "Bubble Sort",
+      "beats": [
+        {"narration": "We start with an unsorted array.",
+         "show": [{"type": "array", "id": "nums", "values": [4, 2, 5, 1, 3]}]},
+        {"narration": "Four and two are out of order, so we swap them.",
+         "steps": [{"action": "highlight", "target": "nums", "indices": [0, 1], "color": "red"},
+                   {"action": "swap", "target": "nums", "i": 0, "j": 1},
+                   {"action": "unhighlight", "target": "nums", "indices": [0, 1]}]}
+      ]
+    }
+
+build_scene validates a spec and compiles it into an ordinary SceneTopic
+VoiceoverScene: straight-line Manim calls, one voiceover block per beat, so
+the estimator, the block diff, the render cache and the fix loop treat it
+like any other scene. Layout is decided here, not by the LLM: the heading
+sits at the top edge, at most MAX_STAGE elements share the stage in fixed
+slots, and every element is scaled down to fit its slot. The spec is kept
+in a comment at the top of the script (see extract_spec), so feedback
+versions can edit the spec instead of the code.
+
+Usage:
+    python scene_spec.py validate spec.json
+    python scene_spec.py compile spec.json > temp_topic.py
+"""
+
+import re
+import ast
+import sys
+import json
+import keyword
+import argparse
+
+SPEC_MARKER = "# scene-spec: "
+
+COLORS = {
+    "white": "WHITE", "gray": "GRAY", "blue": "BLUE", "teal": "TEAL", "green": "GREEN",
+    "yellow": "YELLOW", "gold": "GOLD", "orange": "ORANGE", "red": "RED", "pink": "PINK",
+    "purple": "PURPLE",
+}
+BACKGROUND_COLOR = "#1b1d2b"
+
+SHAPES = {
+    "circle": "Circle(radius=1.2, color={color}, fill_opacity=0.4)",
+    "square": "Square(side_length=2, color={color}, fill_opacity=0.4)",
+    "rectangle": "Rectangle(width=3.2, height=2, color={color}, fill_opacity=0.4)",
+    "dot": "Dot(radius=0.2, color={color})",
+    "star": "Star(outer_radius=1.2, color={color}, fill_opacity=0.4)",
+    "hexagon": "RegularPolygon(n=6, color={color}, fill_opacity=0.4).scale(1.2)",
+    "arrow": "Arrow(LEFT * 1.5, RIGHT * 1.5, color={color})",
+}
+ELEMENT_TYPES = ("text", "shape", "array", "triangle")
+ACTIONS = ("highlight", "unhighlight", "indicate", "swap", "change_text", "wait")
+
+# Limits keep scenes inside the render budgets (see scene_estimator)
+MIN_BEATS = 3
+MAX_BEATS = 14
+MAX_STEPS = 10
+MAX_NARRATION = 400
+MAX_TEXT = 80
+MAX_LABEL = 30
+MAX_ARRAY = 10
+MAX_WAIT = 3
+
+# Elements on screen at once, and the slots they are laid out in
+MAX_STAGE = 2
+STAGE_Y = -0.4
+SLOTS = {1: [(0.0, STAGE_Y)], 2: [(-3.3, STAGE_Y), (3.3, STAGE_Y)]}
+SLOT_SIZE = {1: (11.0, 5.0), 2: (5.6, 5.0)}
+HEADING_WIDTH = 12
+
+ID_PATTERN = re.compile(r"^[a-z][a-z0-9_]{0,30}$")
+# Names the compiled code uses itself
+RESERVED_IDS = {"self", "heading", "new_heading", "changed"}
+
+# Corners of the triangle element; sides a, b, c are BC, AB and AC
+RIGHT_TRIANGLE = [(-2.0, -1.5), (2.0, -1.5), (2.0, 1.5)]
+TRIANGLE = [(-2.2, -1.5), (2.2, -1.5), (0.8, 1.6)]
+TRIANGLE_SIDES = {"a": (1, 2), "b": (0, 1), "c": (0, 2)}
+
+SPEC_FORMAT = """
+A scene spec is a JSON object: {"title": "<lesson title>", "beats": [<beat>, ...]} with %(min_beats)d to %(max_beats)d beats.
+
+Beat (one narration line and what happens on screen while it is spoken, in this order):
+  {"narration": "<spoken text, at most %(max_narration)d characters>",
+   "title": "<heading shown at the top; omit to keep the current one, null to remove it>",
+   "remove": ["<id>", ...],
+   "show": [<element>, ...],
+   "steps": [<step>, ...]}
+The first beat shows the lesson title as its heading unless it sets its own.
+At most %(max_stage)d elements can be on screen at once; remove one before showing another. Layout is automatic.
+
+Elements (every id is lowercase letters, digits and underscores, unique in the spec):
+  {"type": "text", "id": "...", "text": "<at most %(max_text)d characters, e.g. a formula like a² + b² = c²>"}
+  {"type": "shape", "id": "...", "shape": "%(shapes)s", "label": "<optional caption>"}
+  {"type": "array", "id": "...", "values": [<up to %(max_array)d numbers or short strings>]}
+  {"type": "triangle", "id": "...", "right_angle": true, "sides": {"a": "...", "b": "...", "c": "..."}, "vertices": ["A", "B", "C"]}
+    (a is the vertical side, b the base, c the hypotenuse; sides and vertices are optional)
+Any element may set "color": one of %(colors)s.
+
+Steps (target is the id of an element on screen):
+  {"action": "highlight", "target": "...", "color": "...", "indices": [...] for arrays, "sides": ["a", ...] for triangles}
+  {"action": "unhighlight", "target": "...", "indices": [...], "sides": [...]}
+  {"action": "indicate", "target": "...", "indices": [...]}
+  {"action": "swap", "target": "<array id>", "i": 0, "j": 1}
+  {"action": "change_text", "target": "<text id>", "text": "..."}
+  {"action": "wait", "seconds": <at most %(max_wait)d>}
+""" % {
+    "min_beats": MIN_BEATS, "max_beats": MAX_BEATS, "max_narration": MAX_NARRATION, "max_stage": MAX_STAGE,
+    "max_text": MAX_TEXT, "shapes": "|".join(SHAPES), "max_array": MAX_ARRAY,
+    "colors": ", ".join(COLORS), "max_wait": MAX_WAIT,
+}
+
+def _literal(text):
+    """A Python string literal for text."""
+    return json.dumps(str(text), ensure_ascii=False)
+
+def _point(x, y):
+    return f"[{x:g}, {y:g}, 0]"
+
+def _outward(point, other, centroid, distance):
+    """A point distance away from point, pointing away from the centroid (other is None for a vertex)."""
+    if other is None:
+        dx, dy = point[0] - centroid[0], point[1] - centroid[1]
+        base = point
+    else:
+        base = ((point[0] + other[0]) / 2, (point[1] + other[1]) / 2)
+        dx, dy = other[1] - point[1], point[0] - other[0]
+        if dx * (base[0] - centroid[0]) + dy * (base[1] - centroid[1]) < 0:
+            dx, dy = -dx, -dy
+    length = (dx * dx + dy * dy) ** 0.5 or 1.0
+    return base[0] + dx / length * distance, base[1] + dy / length * distance
+
+class _Compiler:
+    """One pass over a spec that validates it and emits the scene at the same time."""
+
+    def __init__(self, spec, sox_effects):
+        self.spec = spec
+        self.sox_effects = sox_effects
+        self.errors = []
+        self.lines = []
+        self.elements = {}
+        # Ids on screen in slot order, and the layout each was last fitted to
+        self.stage = []
+        self.slots = {}
+        self.heading = False
+
+    def error(self, where, message):
+        self.errors.append(f"{where}: {message}")
+
+    def emit(self, line=""):
+        self.lines.append(f"            {line}" if line else "")
+
+    def color(self, where, value, default):
+        if value is None:
+            return default
+        if not isinstance(value, str) or value.lower() not in COLORS:
+            self.error(where, f"unknown color {value!r}; use one of {', '.join(COLORS)}")
+            return default
+        return COLORS[value.lower()]
+
+    def text(self, where, value, limit):
+        if not isinstance(value, str) or not value.strip():
+            self.error(where, "must be non-empty text")
+            return False
+        if len(value) > limit:
+            self.error(where, f"is {len(value)} characters long; the limit is {limit}")
+            return False
+        return True
+
+    def compile(self):
+        spec = self.spec
+        if not isinstance(spec, dict):
+            self.error("spec", "must be a JSON object")
+            return
+        beats = spec.get("beats")
+        if not isinstance(beats, list) or not MIN_BEATS <= len(beats) <= MAX_BEATS:
+            self.error("beats", f"must be a list of {MIN_BEATS} to {MAX_BEATS} beats")
+            return
+        title = spec.get("title")
+        if not self.text("title", title, MAX_TEXT):
+            title = None
+
+        for index, beat in enumerate(beats):
+            where = f"beats[{index}]"
+            if not isinstance(beat, dict):
+                self.error(where, "must be an object")
+                continue
+            if index == 0 and "title" not in beat:
+                beat = dict(beat, title=title)
+            self.beat(where, beat)
+
+    def beat(self, where, beat):
+        narration = beat.get("narration")
+        if not self.text(f"{where}.narration", narration, MAX_NARRATION):
+            narration = ""
+        self.lines.append(f"        with self.voiceover(text={_literal(narration)}):")
+        start = len(self.lines)
+
+        if "title" in beat:
+            self.set_heading(f"{where}.title", beat["title"])
+
+        removed = beat.get("remove") or []
+        if not isinstance(removed, list):
+            self.error(f"{where}.remove", "must be a list of ids")
+            removed = []
+        fade_outs = []
+        for element_id in removed:
+            if element_id not in self.stage:
+                self.error(f"{where}.remove", f"{element_id!r} is not on screen")
+                continue
+            self.stage.remove(element_id)
+            self.slots.pop(element_id, None)
+            fade_outs.append(f"FadeOut({element_id})")
+        if fade_outs:
+            self.emit(f"self.play({', '.join(fade_outs)})")
+
+        shown = beat.get("show") or []
+        if not isinstance(shown, list):
+            self.error(f"{where}.show", "must be a list of elements")
+            shown = []
+        new_ids = []
+        for position, element in enumerate(shown):
+            element_id = self.element(f"{where}.show[{position}]", element)
+            if element_id:
+                new_ids.append(element_id)
+        if len(self.stage) + len(new_ids) > MAX_STAGE:
+            self.error(
+                f"{where}.show",
+                f"{len(self.stage) + len(new_ids)} elements would be on screen; at most {MAX_STAGE} fit, remove some first"
+            )
+            new_ids = new_ids[:max(0, MAX_STAGE - len(self.stage))]
+        if new_ids or (fade_outs and self.stage):
+            # Also re-centres what is left after a removal
+            self.layout(new_ids)
+
+        steps = beat.get("steps") or []
+        if not isinstance(steps, list) or len(steps) > MAX_STEPS:
+            self.error(f"{where}.steps", f"must be a list of at most {MAX_STEPS} steps")
+            steps = []
+        for position, step in enumerate(steps):
+            self.step(f"{where}.steps[{position}]", step)
+
+        if len(self.lines) == start:
+            self.emit("self.wait(0.5)")
+        self.lines.append("")
+
+    def set_heading(self, where, title):
+        if title is None or title == "":
+            if self.heading:
+                self.emit("self.play(FadeOut(heading))")
+                self.heading = False
+            return
+        if not self.text(where, title, MAX_TEXT):
+            return
+        name = "new_heading" if self.heading else "heading"
+        self.emit(f"{name} = Text({_literal(title)}, font_size=44, color=YELLOW).to_edge(UP)")
+        self.emit(f"{name}.scale(min(1, {HEADING_WIDTH} / {name}.width))")
+        if self.heading:
+            self.emit("self.play(ReplacementTransform(heading, new_heading))")
+            self.emit("heading = new_heading")
+        else:
+            self.emit("self.play(Write(heading))")
+        self.heading = True
+
+    def element(self, where, element):
+        """Emit the construction of one element; returns its id, or None if invalid."""
+        if not isinstance(element, dict):
+            self.error(where, "must be an object")
+            return None
+        element_id = element.get("id")
+        if not isinstance(element_id, str) or not ID_PATTERN.match(element_id) or keyword.iskeyword(element_id) or element_id in RESERVED_IDS:
+            self.error(where, f"id {element_id!r} must be lowercase letters, digits and underscores")
+            return None
+        if element_id in self.elements:
+            self.error(where, f"id {element_id!r} is already used")
+            return None
+        kind = element.get("type")
+        if kind not in ELEMENT_TYPES:
+            self.error(where, f"unknown type {kind!r}; use one of {', '.join(ELEMENT_TYPES)}")
+            return None
+
+        if kind == "text":
+            color = self.color(f"{where}.color", element.get("color"), "WHITE")
+            if not self.text(f"{where}.text", element.get("text"), MAX_TEXT):
+                return None
+            self.emit(f"{element_id} = Text({_literal(element['text'])}, font_size=40, color={color})")
+            info = {"type": kind, "color": color}
+
+        elif kind == "shape":
+            color = self.color(f"{where}.color", element.get("color"), "BLUE")
+            shape = element.get("shape")
+            if shape not in SHAPES:
+                self.error(f"{where}.shape", f"unknown shape {shape!r}; use one of {', '.join(SHAPES)}")
+                return None
+            self.emit(f"{element_id} = VGroup({SHAPES[shape].format(color=color)})")
+            label = element.get("label")
+            if label is not None and self.text(f"{where}.label", label, MAX_LABEL):
+                self.emit(f"{element_id}.add(Text({_literal(label)}, font_size=30).next_to({element_id}[0], DOWN, buff=0.25))")
+            info = {"type": kind, "color": color}
+
+        elif kind == "array":
+            color = self.color(f"{where}.color", element.get("color"), "BLUE")
+            values = element.get("values")
+            if not isinstance(values, list) or not 1 <= len(values) <= MAX_ARRAY:
+                self.error(f"{where}.values", f"must be a list of 1 to {MAX_ARRAY} values")
+                return None
+            if not all(isinstance(value, (int, float)) and not isinstance(value, bool) or isinstance(value, str) and 0 < len(value) <= 4 for value in values):
+                self.error(f"{where}.values", "values must be numbers or strings of at most 4 characters")
+                return None
+            cells = ", ".join(
+                f"VGroup(Square(side_length=1, color={color}), Text({_literal(value)}, font_size=36))" for value in values
+            )
+            self.emit(f"{element_id} = VGroup({cells})")
+            self.emit(f"{element_id}.arrange(RIGHT, buff=0.2)")
+            info = {"type": kind, "color": color, "length": len(values)}
+
+        else:
+            color = self.color(f"{where}.color", element.get("color"), "WHITE")
+            right_angle = bool(element.get("right_angle", False))
+            corners = RIGHT_TRIANGLE if right_angle else TRIANGLE
+            centroid = (sum(x for x, _ in corners) / 3, sum(y for _, y in corners) / 3)
+            sides = ", ".join(
+                f"Line({_point(*corners[p])}, {_point(*corners[q])}, color={color})" for p, q in TRIANGLE_SIDES.values()
+            )
+            self.emit(f"{element_id} = VGroup(VGroup({sides}))")
+            if right_angle:
+                self.emit(f"{element_id}.add(RightAngle({element_id}[0][0], {element_id}[0][1], length=0.3, quadrant=(1, -1)))")
+            side_labels = element.get("sides") or {}
+            if not isinstance(side_labels, dict):
+                self.error(f"{where}.sides", "must be an object with keys a, b and c")
+                side_labels = {}
+            for side, label in side_labels.items():
+                if side not in TRIANGLE_SIDES:
+                    self.error(f"{where}.sides", f"unknown side {side!r}; use a, b or c")
+                elif self.text(f"{where}.sides.{side}", label, MAX_LABEL):
+                    p, q = TRIANGLE_SIDES[side]
+                    x, y = _outward(corners[p], corners[q], centroid, 0.45)
+                    self.emit(f"{element_id}.add(Text({_literal(label)}, font_size=32).move_to({_point(x, y)}))")
+            vertices = element.get("vertices") or []
+            if not isinstance(vertices, list) or len(vertices) not in (0, 3):
+                self.error(f"{where}.vertices", "must list three vertex names")
+                vertices = []
+            for corner, name in zip(corners, vertices):
+                if self.text(f"{where}.vertices", name, MAX_LABEL):
+                    x, y = _outward(corner, None, centroid, 0.4)
+                    self.emit(f"{element_id}.add(Text({_literal(name)}, font_size=32).move_to({_point(x, y)}))")
+            info = {"type": kind, "color": color}
+
+        self.elements[element_id] = info
+        return element_id
+
+    def layout(self, new_ids):
+        """Move what is on screen to the slots of the new layout and bring in new_ids."""
+        count = len(self.stage) + len(new_ids)
+        width, height = SLOT_SIZE[count]
+        fit = "scale(min(1, {width:g} / {id}.width, {height:g} / {id}.height))"
+        moves = []
+        for slot, element_id in enumerate(self.stage):
+            if self.slots.get(element_id) != (count, slot):
+                x, y = SLOTS[count][slot]
+                moves.append(f"{element_id}.animate.{fit.format(width=width, height=height, id=element_id)}.move_to({_point(x, y)})")
+                self.slots[element_id] = (count, slot)
+        if moves:
+            self.emit(f"self.play({', '.join(moves)})")
+
+        entrances = []
+        for element_id in new_ids:
+            slot = len(self.stage)
+            x, y = SLOTS[count][slot]
+            self.emit(f"{element_id}.{fit.format(width=width, height=height, id=element_id)}.move_to({_point(x, y)})")
+            self.stage.append(element_id)
+            self.slots[element_id] = (count, slot)
+            animation = "Write" if self.elements[element_id]["type"] == "text" else "Create"
+            entrances.append(f"{animation}({element_id})")
+        if entrances:
+            self.emit(f"self.play({', '.join(entrances)})")
+
+    def parts(self, where, step, element_id):
+        """Sub-mobject expressions a step addresses, or None if invalid."""
+        info = self.elements[element_id]
+        if info["type"] == "array" and step.get("indices") is not None:
+            indices = step["indices"]
+            if not isinstance(indices, list) or not indices or not all(isinstance(i, int) and 0 <= i < info["length"] for i in indices):
+                self.error(f"{where}.indices", f"must be a list of positions from 0 to {info['length'] - 1}")
+                return None
+            return [f"{element_id}[{i}]" for i in indices]
+        if info["type"] == "triangle" and step.get("sides") is not None:
+            sides = step["sides"]
+            if not isinstance(sides, list) or not sides or not all(side in TRIANGLE_SIDES for side in sides):
+                self.error(f"{where}.sides", "must be a list of a, b and c")
+                return None
+            order = list(TRIANGLE_SIDES)
+            return [f"{element_id}[0][{order.index(side)}]" for side in sides]
+        if step.get("indices") is not None or step.get("sides") is not None:
+            self.error(where, "indices only apply to arrays and sides only to triangles")
+            return None
+        return [element_id]
+
+    def colored(self, element_id, part):
+        """The part of an element that highlighting recolors (array squares, shape bodies, triangle sides)."""
+        kind = self.elements[element_id]["type"]
+        if kind == "array":
+            if part == element_id:
+                return [f"{element_id}[{i}][0]" for i in range(self.elements[element_id]["length"])]
+            return [f"{part}[0]"]
+        if kind in ("shape", "triangle") and part == element_id:
+            return [f"{element_id}[0]"]
+        return [part]
+
+    def step(self, where, step):
+        if not isinstance(step, dict):
+            self.error(where, "must be an object")
+            return
+        action = step.get("action")
+        if action not in ACTIONS:
+            self.error(where, f"unknown action {action!r}; use one of {', '.join(ACTIONS)}")
+            return
+        if action == "wait":
+            seconds = step.get("seconds", 1)
+            if not isinstance(seconds, (int, float)) or not 0 < seconds <= MAX_WAIT:
+                self.error(f"{where}.seconds", f"must be a number of seconds up to {MAX_WAIT}")
+                return
+            self.emit(f"self.wait({seconds:g})")
+            return
+
+        element_id = step.get("target")
+        if element_id not in self.stage:
+            self.error(f"{where}.target", f"{element_id!r} is not on screen")
+            return
+        info = self.elements[element_id]
+
+        if action == "swap":
+            if info["type"] != "array":
+                self.error(where, "swap only applies to arrays")
+                return
+            i, j = step.get("i"), step.get("j")
+            if not all(isinstance(k, int) and 0 <= k < info["length"] for k in (i, j)) or i == j:
+                self.error(where, f"i and j must be two different positions from 0 to {info['length'] - 1}")
+                return
+            self.emit(
+                f"self.play({element_id}[{i}].animate.move_to({element_id}[{j}].get_center()), "
+                f"{element_id}[{j}].animate.move_to({element_id}[{i}].get_center()))"
+            )
+            # Keep the group's order in line with the screen, so later steps address the right cell
+            self.emit(
+                f"{element_id}.submobjects[{i}], {element_id}.submobjects[{j}] = "
+                f"{element_id}.submobjects[{j}], {element_id}.submobjects[{i}]"
+            )
+            return
+
+        if action == "change_text":
+            if info["type"] != "text":
+                self.error(where, "change_text only applies to text elements")
+                return
+            if not self.text(f"{where}.text", step.get("text"), MAX_TEXT):
+                return
+            width, _ = SLOT_SIZE[len(self.stage)]
+            self.emit(f"changed = Text({_literal(step['text'])}, font_size=40, color={info['color']}).move_to({element_id})")
+            self.emit(f"changed.scale(min(1, {width:g} / changed.width))")
+            self.emit(f"self.play(Transform({element_id}, changed))")
+            return
+
+        parts = self.parts(where, step, element_id)
+        if parts is None:
+            return
+        if action == "indicate":
+            self.emit(f"self.play({', '.join(f'Indicate({part})' for part in parts)})")
+            return
+        if action == "highlight":
+            color = self.color(f"{where}.color", step.get("color"), "YELLOW")
+        else:
+            color = info["color"]
+        targets = [target for part in parts for target in self.colored(element_id, part)]
+        self.emit(f"self.play({', '.join(f'{target}.animate.set_color({color})' for target in targets)})")
+
+    def code(self):
+        spec_line = json.dumps(self.spec, ensure_ascii=False, separators=(",", ":"))
+        speech_options = ['lang="en"', 'tld="com"']
+        if self.sox_effects:
+            speech_options.append(f"sox_effects={self.sox_effects!r}")
+        header = [
+            "from manim import *",
+            "from manim_voiceover import VoiceoverScene",
+            "from manim_voiceover.services.gtts import GTTSService",
+            "",
+            "# Compiled from the scene spec below by scene_spec.py; change the spec, not this code.",
+            f"{SPEC_MARKER}{spec_line}",
+            "",
+            "class SceneTopic(VoiceoverScene):",
+            "    def construct(self):",
+            f"        self.camera.background_color = {_literal(BACKGROUND_COLOR)}",
+            "        self.set_speech_service(",
+            "            GTTSService(",
+        ] + [f"                {option}," for option in speech_options] + [
+            "            )",
+            "        )",
+            "",
+        ]
+        return "\n".join(header + self.lines + ["        self.wait(1)", ""])
+
+def build_scene(spec, sox_effects=None):
+    """
+    Validate a scene spec and compile it into a SceneTopic script.
+
+    Args:
+        spec: The parsed spec (see SPEC_FORMAT)
+        sox_effects: SoX effects for the speech service, or None
+
+    Returns:
+        tuple: (success, errors, code) with every validation error found
+    """
+    compiler = _Compiler(spec, sox_effects)
+    compiler.compile()
+    if compiler.errors:
+        return False, compiler.errors, None
+    return True, [], compiler.code()
+
+def parse_spec(text):
+    """
+    Read a spec from an LLM response, ignoring markdown fences and chatter.
+
+    Returns:
+        tuple: (success, error, spec)
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return False, "No JSON object in the response", None
+    try:
+        spec = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        return False, f"Invalid JSON: {e}", None
+    if not isinstance(spec, dict):
+        return False, "The spec must be a JSON object", None
+    return True, "", spec
+
+def extract_spec(code):
+    """The spec a compiled scene was built from, or None for free-form code."""
+    for line in (code or "").splitlines():
+        if line.startswith(SPEC_MARKER):
+            try:
+                return json.loads(line[len(SPEC_MARKER):])
+            except json.JSONDecodeError:
+                return None
+    return None
+
+def extract_sox_effects(code):
+    """The SoX effects a compiled scene's speech service was set up with, or None."""
+    match = re.search(r"sox_effects=(\[[^\]]*\])", code or "")
+    if not match:
+        return None
+    try:
+        return ast.literal_eval(match.group(1))
+    except (ValueError, SyntaxError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate or compile a scene spec.")
+    parser.add_argument("command", choices=["validate", "compile"])
+    parser.add_argument("spec", help="JSON spec file")
+    args = parser.parse_args()
+
+    with open(args.spec, "r", encoding="utf-8") as f:
+        success, error, spec = parse_spec(f.read())
+    if not success:
+        print(error, file=sys.stderr)
+        return 1
+    success, errors, code = build_scene(spec)
+    if not success:
+        for error in errors:
+            print(error, file=sys.stderr)
+        return 1
+    if args.command == "compile":
+        print(code)
+    else:
+        print("Spec is valid.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Anti Gravity - Single-Flight Request Coalescing
+
+When several callers ask for the same work at the same time (a class all
+pressing "Generate Lesson" for the shared topic), only the first starts it;
+the others attach to the running flight, see its progress events from the
+beginning, and receive its result. The flight is forgotten once it ends, so
+later requests start fresh.
+
+The work runs on its own thread and every caller waits on theirs, so progress
+callbacks always fire on the caller's thread (Streamlit needs this). A caller
+that cancels or goes away detaches; the work itself is only cancelled once
+every caller has detached.
+"""
+
+import threading
+
+# How often waiting callers check their own cancel flag
+POLL_SECONDS = 0.5
+
+class Flight:
+    """One running piece of work and the callers waiting on it."""
+
+    def __init__(self, key):
+        self.key = key
+        self.events = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.waiters = 0
+        self.cancel_event = threading.Event()
+        self.condition = threading.Condition()
+
+    def emit(self, kind, message):
+        with self.condition:
+            self.events.append((kind, message))
+            self.condition.notify_all()
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key."""
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def in_flight(self):
+        with self.lock:
+            return {key: flight.waiters for key, flight in self.flights.items()}
+
+    def run(self, key, work, on_event=None, cancel_event=None):
+        """
+        Run work once per key, however many callers ask for it concurrently.
+
+        Args:
+            key: Hashable identity of the request
+            work: Callable taking (on_event, cancel_event) and returning a result
+            on_event: Optional callback(kind, message), called on this thread
+            cancel_event: Optional threading.Event that detaches this caller
+
+        Returns:
+            tuple: (result, shared, cancelled). shared is True when the
+            result came from a flight another caller started; result is None
+            for a caller that cancelled.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            shared = flight is not None
+            if flight is None:
+                flight = Flight(key)
+                self.flights[key] = flight
+                threading.Thread(target=self._fly, args=(flight, work), daemon=True).start()
+            with flight.condition:
+                flight.waiters += 1
+
+        seen = 0
+        cancelled = False
+        try:
+            while True:
+                with flight.condition:
+                    if len(flight.events) == seen and not flight.done:
+                        flight.condition.wait(POLL_SECONDS)
+                    events = flight.events[seen:]
+                    done = flight.done
+                seen += len(events)
+                if on_event:
+                    for kind, message in events:
+                        on_event(kind, message)
+                if done:
+                    break
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+        finally:
+            with self.lock, flight.condition:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.done:
+                    # Nobody is waiting for this any more; new callers start over
+                    flight.cancel_event.set()
+                    if self.flights.get(key) is flight:
+                        del self.flights[key]
+
+        if cancelled:
+            return None, shared, True
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, shared, False
+
+    def _fly(self, flight, work):
+        try:
+            flight.result = work(flight.emit, flight.cancel_event)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self.lock:
+                if self.flights.get(flight.key) is flight:
+                    del self.flights[flight.key]
+            with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
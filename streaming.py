@@ -0,0 +1,217 @@
+"""
+Anti Gravity - Streaming Output
+
+HLS output so a lesson can be watched while it is still rendering. Without
+it nothing can be played until Manim has written and combined every partial
+movie and the finished video has been uploaded.
+
+While a streamed render runs, manim_runner hands out groups of finished
+animations (at least STREAM_SEGMENT_SECONDS long, with their slice of the
+narration) as soon as they are written. SegmentPublisher packages each group
+as an MPEG-TS segment (video stream-copied, audio encoded to AAC), uploads it
+to the same storage as the videos and reports it; the pipeline passes it on
+as a "segment" progress event. Front ends build the growing HLS playlist
+from those events:
+    - the job API serves it at /jobs/<id>/stream.m3u8
+    - app.py writes it under static/streams and plays it with hls.js
+The finished MP4 is still encoded, uploaded and catalogued as before and
+replaces the stream once it is ready.
+
+Each render attempt is a new stream with its own ID, so a player that sees
+a new ID starts over. Streaming costs one storage upload per segment, so it
+is off unless STREAM_OUTPUT=1, and only interactive renders are streamed.
+"""
+
+import os
+import json
+import math
+import uuid
+import shutil
+import threading
+
+from manim_runner import STREAM_MANIFEST
+from process_utils import run_measured, add_usage
+
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "0") == "1"
+
+# Where app.py publishes playlists (served by Streamlit's static file serving)
+STREAMS_DIR = os.path.join("static", "streams")
+
+# How often the publisher looks for new segments
+POLL_SECONDS = 0.5
+AUDIO_BITRATE = "128k"
+
+HLS_PLAYER = "https://cdn.jsdelivr.net/npm/hls.js@1"
+
+class SegmentPublisher:
+    """Packages and publishes the stream segments of one render as they appear."""
+
+    def __init__(self, stream_dir, upload, on_segment):
+        """
+        Args:
+            stream_dir: Directory the render writes its segments to (the
+                runner's STREAM_DIR); emptied on start and removed on finish
+            upload: callable(path) -> (url, error) publishing one segment
+            on_segment: callable(segment) called with a dict of stream,
+                index, duration and url for every published segment
+        """
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.stream_dir = stream_dir
+        self.upload = upload
+        self.on_segment = on_segment
+        self.usage = {}
+        self.published = 0
+        self.error = None
+        self.publish_rest = True
+        self.position = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        # Segments of an earlier render in this workspace must not be replayed
+        shutil.rmtree(self.stream_dir, ignore_errors=True)
+        os.makedirs(self.stream_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name=f"stream-{self.stream_id}", daemon=True)
+        self.thread.start()
+
+    def finish(self, publish_rest=True):
+        """
+        Stop once the segments already written are handled.
+
+        Args:
+            publish_rest: Publish them (the render succeeded); otherwise
+                they are dropped
+        """
+        self.publish_rest = publish_rest
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        shutil.rmtree(self.stream_dir, ignore_errors=True)
+
+    def run(self):
+        while True:
+            stopping = self.stop_event.is_set()
+            for entry in self._new_entries():
+                if self.error is None and (self.publish_rest or not stopping):
+                    self._publish(entry)
+            if stopping:
+                return
+            self.stop_event.wait(POLL_SECONDS)
+
+    def _new_entries(self):
+        """Complete manifest lines written since the last call."""
+        path = os.path.join(self.stream_dir, STREAM_MANIFEST)
+        try:
+            with open(path, "rb") as f:
+                f.seek(self.position)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        complete = data[:data.rfind(b"\n") + 1]
+        self.position += len(complete)
+        return [json.loads(line) for line in complete.decode("utf-8").splitlines() if line.strip()]
+
+    def _publish(self, entry):
+        name = f"segment_{entry['index']:05d}"
+        list_path = os.path.join(self.stream_dir, f"{name}.txt")
+        segment_path = os.path.join(self.stream_dir, f"{self.stream_id}_{name}.ts")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for partial in entry["partials"]:
+                escaped = partial.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        # Timestamps continue from the previous segment so players need no discontinuities
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", entry["audio"],
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy", "-c:a", "aac", "-b:a", AUDIO_BITRATE,
+            "-output_ts_offset", f"{entry['start']:.3f}",
+            "-f", "mpegts", segment_path,
+        ]
+        returncode, _, stderr, stats = run_measured(command, shell=False)
+        add_usage(self.usage, stats)
+        if returncode != 0:
+            self.error = f"Could not package stream segment {entry['index']}: {stderr[-500:]}"
+        else:
+            url, error = self.upload(segment_path)
+            if url:
+                self.published += 1
+                self.on_segment({"stream": self.stream_id, "index": entry["index"], "duration": entry["duration"], "url": url})
+            else:
+                self.error = f"Could not publish stream segment {entry['index']}: {error}"
+        if self.error:
+            # The render goes on; only the stream stops
+            print(f"{self.error}. Streaming stopped, the video will be available when the render finishes.")
+        for path in (list_path, segment_path, entry["audio"]):
+            if os.path.exists(path):
+                os.remove(path)
+
+def segment_message(segment):
+    """A published segment as a progress event message: "<stream> <index> <duration> <url>"."""
+    return f"{segment['stream']} {segment['index']} {segment['duration']:.3f} {segment['url']}"
+
+def parse_segment(message):
+    stream, index, duration, url = message.split(" ", 3)
+    return {"stream": stream, "index": int(index), "duration": float(duration), "url": url}
+
+def playlist(messages, ended=False):
+    """
+    HLS media playlist of the latest stream among segment event messages.
+
+    Args:
+        messages: "segment" event messages in the order they were sent
+        ended: The render is over; no more segments will be added
+
+    Returns:
+        str: The playlist, or None when there are no segments
+    """
+    if not messages:
+        return None
+    segments = [parse_segment(message) for message in messages]
+    latest = segments[-1]["stream"]
+    segments = sorted((s for s in segments if s["stream"] == latest), key=lambda s: s["index"])
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{math.ceil(max(s['duration'] for s in segments))}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:EVENT",
+    ]
+    for segment in segments:
+        lines += [f"#EXTINF:{segment['duration']:.3f},", segment["url"]]
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+def write_playlist(path, messages, ended=False):
+    """Write playlist() to path atomically, so players never read half a playlist."""
+    text = playlist(messages, ended)
+    if text is None:
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp, path)
+    return True
+
+def player_html(playlist_url):
+    """A video element playing an HLS playlist (natively in Safari, with hls.js elsewhere)."""
+    return f"""
+<video id="lesson-stream" controls autoplay muted playsinline style="width: 100%; border-radius: 8px;"></video>
+<script src="{HLS_PLAYER}"></script>
+<script>
+  var video = document.getElementById("lesson-stream");
+  var source = {json.dumps(playlist_url)};
+  if (video.canPlayType("application/vnd.apple.mpegurl")) {{
+    video.src = source;
+  }} else if (window.Hls && Hls.isSupported()) {{
+    // Start from the introduction, not the live edge
+    var hls = new Hls({{startPosition: 0}});
+    hls.loadSource(source);
+    hls.attachMedia(video);
+  }}
+</script>
+"""
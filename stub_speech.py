@@ -0,0 +1,77 @@
+"""
+Anti Gravity - Silent Speech Service
+
+Offline replacement for GTTSService, imported by rendered scenes (see
+stubs.offline_scene). It writes silent audio whose length follows the
+narration text, so voiceover blocks keep realistic timing without network
+access. The service's language is written into the audio's metadata, so
+narrations in different languages are different files as they are with gTTS.
+"""
+
+import os
+import time
+import random
+import subprocess
+from pathlib import Path
+
+from manim_voiceover.helper import remove_bookmarks
+from manim_voiceover.services.base import SpeechService
+
+# Roughly the speaking rate of gTTS English narration
+WORDS_PER_SECOND = 2.6
+
+# Injected per-request latency (seconds) and failure rate, set by the load-test
+# harness through the environment since scenes render in a subprocess
+TTS_LATENCY = float(os.getenv("STUB_TTS_LATENCY", "0"))
+TTS_ERROR_RATE = float(os.getenv("STUB_TTS_ERROR_RATE", "0"))
+
+class StubSpeechService(SpeechService):
+    """Speech service that synthesizes silence instead of calling gTTS."""
+
+    def __init__(self, words_per_second=WORDS_PER_SECOND, lang="en", **kwargs):
+        self.words_per_second = words_per_second
+        # Like gTTS, the language is fixed per service and tags the audio
+        self.lang = lang
+        # Other gTTS-only options are accepted so generated scenes need no edits
+        for key in ("tld", "sox_effects"):
+            kwargs.pop(key, None)
+        SpeechService.__init__(self, **kwargs)
+
+    def generate_from_text(self, text, cache_dir=None, path=None, **kwargs):
+        if cache_dir is None:
+            cache_dir = self.cache_dir
+
+        input_text = remove_bookmarks(text)
+        input_data = {"input_text": input_text, "service": "stub", "lang": self.lang, "words_per_second": self.words_per_second}
+
+        cached_result = self.get_cached_result(input_data, cache_dir)
+        if cached_result is not None:
+            return cached_result
+
+        if TTS_LATENCY > 0:
+            time.sleep(TTS_LATENCY)
+        if random.random() < TTS_ERROR_RATE:
+            raise RuntimeError("Stub TTS error")
+
+        if path is None:
+            audio_path = self.get_audio_basename(input_data) + ".mp3"
+        else:
+            audio_path = path
+
+        duration = max(0.5, len(input_text.split()) / self.words_per_second)
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono",
+                "-t", f"{duration:.2f}", "-q:a", "9",
+                "-metadata", f"language={self.lang}",
+                str(Path(cache_dir) / audio_path),
+            ],
+            check=True,
+        )
+
+        return {
+            "input_text": text,
+            "input_data": input_data,
+            "original_audio": audio_path,
+        }
@@ -0,0 +1,159 @@
+"""
+Anti Gravity - Offline Stubs
+
+Stand-ins for the Gemini and gTTS backends so the generation -> render
+pipeline can be exercised without network access or API quota. Used by the
+benchmark and load-test harnesses.
+"""
+
+import os
+import tempfile
+import re
+import json
+import time
+import random
+import threading
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "corpus")
+
+GTTS_IMPORT = "from manim_voiceover.services.gtts import GTTSService"
+STUB_IMPORT = "from stub_speech import StubSpeechService as GTTSService"
+
+def load_corpus(corpus_dir=CORPUS_DIR, offline=False):
+    """
+    Load the recorded scene corpus.
+
+    Args:
+        corpus_dir: Directory holding manifest.json and the scene files
+        offline: Rewrite scenes to use the silent stub speech service
+
+    Returns:
+        list: Manifest entries, each with its recorded scene code under "code".
+    """
+    with open(os.path.join(corpus_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    for entry in entries:
+        with open(os.path.join(corpus_dir, entry["file"]), "r", encoding="utf-8") as f:
+            entry["code"] = f.read()
+        if offline:
+            entry["code"] = offline_scene(entry["code"])
+    return entries
+
+def offline_scene(code):
+    """Point a generated scene at the silent stub speech service instead of gTTS."""
+    if GTTS_IMPORT in code:
+        return code.replace(GTTS_IMPORT, STUB_IMPORT)
+    return code.replace("from manim import *", f"from manim import *\n{STUB_IMPORT}", 1)
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubModel:
+    """
+    Drop-in for genai.GenerativeModel that replays recorded scenes.
+
+    The topic is read back out of the prompt and matched against the corpus,
+    so generate, regenerate and fix prompts all return the recorded scene.
+    Scene spec prompts are declined, so the recorded free-form scenes are
+    what gets rendered. Narration translation prompts get every line back
+    tagged with the language code (e.g. "[hi] ..."), one word longer than
+    the original.
+    Latency and failures can be injected to simulate a slow or flaky backend.
+    """
+
+    def __init__(self, model_name, corpus, latency=0.0, latency_jitter=0.0, error_rate=0.0, quota_rate=0.0):
+        self.model_name = model_name
+        self.corpus = corpus
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.quota_rate = quota_rate
+
+    def generate_content(self, prompt, request_options=None):
+        from google.api_core import exceptions
+
+        delay = self.latency + random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        roll = random.random()
+        if roll < self.quota_rate:
+            raise exceptions.ResourceExhausted("Stub quota exhausted")
+        if roll < self.quota_rate + self.error_rate:
+            raise RuntimeError("Stub model error")
+
+        if "SPEC FORMAT:" in prompt:
+            return StubResponse('{"unsupported": "The stub model only replays recorded scene code"}')
+
+        if "LANGUAGES:" in prompt:
+            lines = json.loads(re.search(r"LINES:\s*\n\s*(.+)\n", prompt).group(1))
+            languages = json.loads(re.search(r"LANGUAGES:\s*\n\s*(.+)\n", prompt).group(1))
+            return StubResponse(json.dumps({code: [f"[{code}] {line}" for line in lines] for code in languages}))
+
+        match = re.search(r'TOPIC(?: TO EXPLAIN)?: "([^"]*)"', prompt)
+        topic = match.group(1).strip().lower() if match else ""
+        for entry in self.corpus:
+            if entry["topic"].lower() == topic:
+                return StubResponse(f"```python\n{entry['code']}\n```")
+
+        # Unknown topic: fall back to a deterministic pick so runs stay comparable
+        entry = self.corpus[sum(map(ord, topic)) % len(self.corpus)]
+        return StubResponse(f"```python\n{entry['code']}\n```")
+
+_installed = {}
+_install_lock = threading.Lock()
+
+def install_stub_llm(corpus=None, **options):
+    """
+    Route every genai.GenerativeModel(...) construction to a StubModel.
+
+    Args:
+        corpus: Entries from load_corpus() (loaded from disk if omitted)
+        **options: latency, latency_jitter, error_rate, quota_rate for StubModel
+    """
+    import google.generativeai as genai
+
+    corpus = corpus if corpus is not None else load_corpus()
+    with _install_lock:
+        if "GenerativeModel" not in _installed:
+            _installed["GenerativeModel"] = genai.GenerativeModel
+        genai.GenerativeModel = lambda model_name, **kwargs: StubModel(model_name, corpus, **options)
+
+def uninstall_stub_llm():
+    """Restore the real genai.GenerativeModel."""
+    import google.generativeai as genai
+
+    with _install_lock:
+        if "GenerativeModel" in _installed:
+            genai.GenerativeModel = _installed.pop("GenerativeModel")
+
+def install_stub_upload(latency=0.0, error_rate=0.0):
+    """
+    Replace the GitHub upload with a local stand-in.
+
+    The rendered file is left for Studio to clean up and a stub:// URL is
+    returned, so the full render -> upload path runs without credentials.
+    Catalog writes go to a scratch database so stub lessons never reach the
+    real lesson catalog.
+    """
+    import backend
+    import catalog
+
+    catalog.CATALOG_PATH = os.path.join(tempfile.gettempdir(), f"stub_lessons_{os.getpid()}.db")
+
+    os.environ.setdefault("GITHUB_TOKEN", "stub-token")
+    os.environ.setdefault("GITHUB_REPO", "stub/repo")
+
+    def upload(file_path, repo_name, token, commit_message="Upload generated video"):
+        if latency > 0:
+            time.sleep(latency)
+        if random.random() < error_rate:
+            return None, "GitHub upload failed: stub error"
+        return f"stub://{repo_name}/{os.path.basename(file_path)}", None
+
+    with _install_lock:
+        if "upload_to_github" not in _installed:
+            _installed["upload_to_github"] = backend.upload_to_github
+        backend.upload_to_github = upload
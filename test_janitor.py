@@ -0,0 +1,88 @@
+"""
+Behavior checks for the media janitor's quotas and in-flight protection
+"""
+import os
+import time
+import tempfile
+
+import janitor
+
+MB = janitor.MB
+
+def make_area(root, names):
+    """One directory entry per name, 1 MB each, oldest first."""
+    area = os.path.join(root, "workspaces")
+    for age, name in enumerate(reversed(names)):
+        path = os.path.join(area, name)
+        os.makedirs(path)
+        with open(os.path.join(path, "partial.mp4"), "wb") as f:
+            f.write(b"\0" * MB)
+        stamp = time.time() - 60 * (age + 1)
+        os.utime(os.path.join(path, "partial.mp4"), (stamp, stamp))
+        os.utime(path, (stamp, stamp))
+    return area
+
+def make_janitor(root, quota_mb):
+    areas = {"workspaces": {"path": "workspaces", "unit": "dir", "quota_mb": quota_mb, "max_age_hours": 24}}
+    return janitor.MediaJanitor(root=root, areas=areas, total_quota_mb=100)
+
+def with_lease_dir(test):
+    def run():
+        original = janitor.LEASE_DIR
+        with tempfile.TemporaryDirectory() as root:
+            janitor.LEASE_DIR = os.path.join(root, "leases")
+            try:
+                test(root)
+            finally:
+                janitor.LEASE_DIR = original
+    run.__name__ = test.__name__
+    return run
+
+@with_lease_dir
+def test_quota_evicts_least_recently_used_first(root):
+    area = make_area(root, ["old", "middle", "new"])
+    evicted = make_janitor(root, quota_mb=1).sweep()
+    assert [os.path.basename(entry["path"]) for entry in evicted] == ["old", "middle"]
+    assert os.listdir(area) == ["new"]
+
+@with_lease_dir
+def test_jobs_in_this_process_are_skipped(root):
+    area = make_area(root, ["old", "middle", "new"])
+    janitor.register_job(os.path.join(area, "old"))
+    try:
+        evicted = make_janitor(root, quota_mb=1).sweep()
+    finally:
+        janitor.release_job(os.path.join(area, "old"))
+    assert [os.path.basename(entry["path"]) for entry in evicted] == ["middle", "new"]
+    assert os.listdir(janitor.LEASE_DIR) == []
+
+@with_lease_dir
+def test_jobs_leased_by_other_processes_are_skipped(root):
+    area = make_area(root, ["old", "middle", "new"])
+    os.makedirs(janitor.LEASE_DIR)
+    # A live lease from another process and a stale one from a crashed process
+    with open(os.path.join(janitor.LEASE_DIR, "a-otherhost-1.lease"), "w", encoding="utf-8") as f:
+        f.write(os.path.abspath(os.path.join(area, "old")))
+    stale = os.path.join(janitor.LEASE_DIR, "b-otherhost-2.lease")
+    with open(stale, "w", encoding="utf-8") as f:
+        f.write(os.path.abspath(os.path.join(area, "middle")))
+    stamp = time.time() - janitor.LEASE_STALE_SECONDS - 1
+    os.utime(stale, (stamp, stamp))
+
+    evicted = make_janitor(root, quota_mb=1).sweep()
+    assert [os.path.basename(entry["path"]) for entry in evicted] == ["middle", "new"]
+    assert not os.path.exists(stale)
+
+@with_lease_dir
+def test_dry_run_removes_nothing(root):
+    area = make_area(root, ["old", "new"])
+    evicted = make_janitor(root, quota_mb=0).sweep(dry_run=True)
+    assert len(evicted) == 2
+    assert sorted(os.listdir(area)) == ["new", "old"]
+
+if __name__ == "__main__":
+    test_quota_evicts_least_recently_used_first()
+    test_jobs_in_this_process_are_skipped()
+    test_jobs_leased_by_other_processes_are_skipped()
+    test_dry_run_removes_nothing()
+    print("janitor checks passed.")
@@ -0,0 +1,52 @@
+"""
+Behavior checks for job parameter validation (no render or network needed)
+"""
+from jobs import validate_params, JOB_PARAMS, MAX_TOPIC_LENGTH
+
+def test_defaults_are_filled_in():
+    success, error, params = validate_params({"topic": "Photosynthesis"})
+    assert success, error
+    assert set(params) == set(JOB_PARAMS)
+    assert params["topic"] == "Photosynthesis"
+    assert params["quality"] == JOB_PARAMS["quality"]
+    assert params["voice_preset"] == JOB_PARAMS["voice_preset"]
+
+def test_known_values_are_accepted():
+    success, error, params = validate_params({
+        "topic": "Gravity", "quality": "Low", "voice_preset": "professor",
+        "lineage_id": "0123456789ab", "priority": "bulk", "languages": ["hi"],
+    })
+    assert success, error
+    assert params["lineage_id"] == "0123456789ab"
+
+def test_bad_parameters_are_rejected():
+    cases = [
+        {},
+        {"topic": "Gravity", "self": 1},
+        {"topic": "Gravity", "quality": "Ultra"},
+        {"topic": "Gravity", "voice_preset": "robot"},
+        {"topic": "Gravity", "priority": "urgent"},
+        {"topic": "Gravity", "languages": ["xx"]},
+        {"topic": ["Gravity"]},
+        {"topic": "   "},
+        {"topic": "x" * (MAX_TOPIC_LENGTH + 1)},
+        {"topic": "Gravity", "subject": 3},
+        {"topic": "Gravity", "feedback": {"text": "slower"}},
+        {"topic": "Gravity", "existing_code": ["from manim import *"]},
+        {"topic": "Gravity", "use_index": "false"},
+    ]
+    for params in cases:
+        success, error, validated = validate_params(params)
+        assert not success and error and validated is None, params
+
+def test_lineage_ids_cannot_leave_the_workspaces():
+    for lineage_id in ["../../x", "/tmp/x", ".", "0123456789AB", "0123456789abc", 12345]:
+        success, _, _ = validate_params({"topic": "Gravity", "lineage_id": lineage_id})
+        assert not success, lineage_id
+
+if __name__ == "__main__":
+    test_defaults_are_filled_in()
+    test_known_values_are_accepted()
+    test_bad_parameters_are_rejected()
+    test_lineage_ids_cannot_leave_the_workspaces()
+    print("jobs checks passed.")
@@ -0,0 +1,98 @@
+"""
+Behavior checks for hedged Gemini calls and the quota fallback (stub client, no network)
+"""
+import time
+
+import llm
+import voiceover_backend
+from model_router import FALLBACK_MODEL
+
+class StubModel:
+    """Answers after a delay, or raises, like GenerativeModel.generate_content."""
+
+    def __init__(self, name, behavior, calls):
+        self.name = name
+        self.behavior = behavior
+        self.calls = calls
+
+    def generate_content(self, prompt, request_options=None):
+        self.calls.append(self.name)
+        delay, result = self.behavior[self.name][min(self.calls.count(self.name), len(self.behavior[self.name])) - 1]
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return type("Response", (), {"text": result})()
+
+def with_stub_client(behavior, hedge_seconds=0.2, max_hedges=llm.MAX_HEDGES):
+    """
+    Run a test with llm.model answering from behavior: {model: [(delay, text or exception), ...]},
+    one entry per call to that model (the last one repeats).
+    """
+    def decorate(test):
+        def run():
+            calls = []
+            originals = (llm.model, llm.HEDGE_DEFAULT_SECONDS, llm.HEDGE_MIN_SECONDS, llm.MAX_HEDGES)
+            llm.model = lambda name: StubModel(name, behavior, calls)
+            llm.HEDGE_DEFAULT_SECONDS = llm.HEDGE_MIN_SECONDS = hedge_seconds
+            llm.MAX_HEDGES = max_hedges
+            try:
+                test(calls)
+            finally:
+                llm.model, llm.HEDGE_DEFAULT_SECONDS, llm.HEDGE_MIN_SECONDS, llm.MAX_HEDGES = originals
+        run.__name__ = test.__name__
+        return run
+    return decorate
+
+@with_stub_client({"fast-model": [(0.0, "first")]})
+def test_a_quick_answer_is_not_hedged(calls):
+    before = llm.metrics()
+    assert llm.generate("fast-model", "prompt") == "first"
+    after = llm.metrics()
+    assert calls == ["fast-model"]
+    assert after["hedged"] == before["hedged"]
+
+@with_stub_client({"slow-model": [(1.0, "primary"), (0.0, "hedge")]})
+def test_a_slow_call_is_hedged_and_the_first_answer_wins(calls):
+    before = llm.metrics()
+    started = time.monotonic()
+    assert llm.generate("slow-model", "prompt") == "hedge"
+    assert time.monotonic() - started < 0.9
+    after = llm.metrics()
+    assert calls == ["slow-model", "slow-model"]
+    assert after["hedged"] == before["hedged"] + 1
+    assert after["hedge_wins"] == before["hedge_wins"] + 1
+
+@with_stub_client({"slow-model": [(0.6, "primary")]}, max_hedges=0)
+def test_no_hedge_is_sent_when_too_many_are_outstanding(calls):
+    before = llm.metrics()
+    assert llm.generate("slow-model", "prompt") == "primary"
+    after = llm.metrics()
+    assert calls == ["slow-model"]
+    assert after["hedges_skipped"] == before["hedges_skipped"] + 1
+    assert after["hedged"] == before["hedged"]
+
+@with_stub_client({"busy-model": [(0.0, llm.ResourceExhausted("quota"))], FALLBACK_MODEL: [(0.0, "```python\nfrom manim import *\n```")]})
+def test_quota_errors_move_the_prompt_to_the_fallback_model(calls):
+    code = voiceover_backend.generate_code("busy-model", "prompt")
+    assert code == "from manim import *"
+    assert calls == ["busy-model", FALLBACK_MODEL]
+
+@with_stub_client({"slow-model": [(0.4, "primary"), (1.0, "hedge")]})
+def test_the_primary_can_still_win_and_the_loser_is_released(calls):
+    before = llm.metrics()
+    assert llm.generate("slow-model", "prompt") == "primary"
+    assert llm.metrics()["hedge_wins"] == before["hedge_wins"]
+    assert llm._outstanding == {"calls": 1, "hedges": 1}
+    # The abandoned hedge finishes in the background and gives its thread back
+    deadline = time.monotonic() + 5
+    while llm._outstanding["calls"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert llm._outstanding == {"calls": 0, "hedges": 0}
+
+if __name__ == "__main__":
+    test_a_quick_answer_is_not_hedged()
+    test_a_slow_call_is_hedged_and_the_first_answer_wins()
+    test_no_hedge_is_sent_when_too_many_are_outstanding()
+    test_quota_errors_move_the_prompt_to_the_fallback_model()
+    test_the_primary_can_still_win_and_the_loser_is_released()
+    print("llm checks passed.")
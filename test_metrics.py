@@ -0,0 +1,76 @@
+"""
+Behavior checks for the Prometheus exposition of every registered metric
+"""
+import os
+import re
+import tempfile
+
+import metrics
+import pipeline
+import render_scheduler
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+# Sample names a family of each kind may expose besides its own name
+SUFFIXES = {"counter": ("",), "gauge": ("",), "histogram": ("_bucket", "_sum", "_count")}
+
+def parse(text):
+    """Families by name, each {"kind": ..., "samples": [(sample name, labels, value)]}."""
+    families = {}
+    family = None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, family, kind = line.split(" ")
+            assert family not in families, f"{family} is declared twice"
+            families[family] = {"kind": kind, "samples": []}
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"Malformed sample line: {line!r}"
+        name, labels, value = match.groups()
+        assert family and name in [family + suffix for suffix in SUFFIXES[families[family]["kind"]]], \
+            f"{name} does not belong to the family declared before it"
+        float(value)
+        families[family]["samples"].append((name, labels or "", value))
+    return families
+
+def render_metrics():
+    """metrics.render() with the render scheduler's collector reading a throwaway slot table."""
+    original = render_scheduler._scheduler
+    with tempfile.TemporaryDirectory() as directory:
+        render_scheduler._scheduler = render_scheduler.RenderScheduler(os.path.join(directory, "render_slots.db"))
+        try:
+            return metrics.render()
+        finally:
+            render_scheduler._scheduler = original
+
+def test_every_family_parses_and_names_do_not_collide():
+    pipeline.RENDERS.inc(quality="Low", outcome="ok")
+    families = parse(render_metrics())
+    assert families["antigravity_renders_total"]["kind"] == "counter"
+    assert families["antigravity_renders_active"]["kind"] == "gauge"
+    # A counter "x_total" is family "x" to OpenMetrics scrapers, and histograms
+    # add _bucket/_sum/_count samples: none of those may be another family's name
+    exposed = {}
+    for name, family in families.items():
+        names = [name + suffix for suffix in SUFFIXES[family["kind"]]]
+        if family["kind"] == "counter":
+            assert name.endswith("_total"), name
+            names.append(name[:-len("_total")])
+        for exposed_name in names:
+            assert exposed_name not in exposed, f"{name} collides with {exposed[exposed_name]}"
+            exposed[exposed_name] = name
+
+def test_histograms_are_cumulative():
+    histogram = metrics.histogram("antigravity_test_seconds", "Test histogram", ["stage"])
+    for seconds in (0.1, 3, 3, 700):
+        histogram.observe(seconds, stage="x")
+    samples = parse(render_metrics())["antigravity_test_seconds"]["samples"]
+    buckets = [float(value) for name, _, value in samples if name.endswith("_bucket")]
+    assert buckets == sorted(buckets) and buckets[-1] == 4
+    assert dict((name, value) for name, _, value in samples if not name.endswith("_bucket"))["antigravity_test_seconds_count"] == "4"
+
+if __name__ == "__main__":
+    test_every_family_parses_and_names_do_not_collide()
+    test_histograms_are_cumulative()
+    print("metrics checks passed.")
@@ -0,0 +1,75 @@
+"""
+Behavior checks for adaptive model routing (no Gemini or catalog needed)
+"""
+import time
+
+import model_router
+from model_router import ModelRouter, get_router, TIER_MODELS, FALLBACK_MODEL, WINDOW_SECONDS
+
+FLASH = TIER_MODELS["Medium"][0]
+
+def with_fresh_router(test):
+    """Run a test against an empty process-wide router instead of one seeded from the catalog."""
+    def run():
+        original = model_router._router
+        model_router._router = ModelRouter(adaptive=True)
+        try:
+            test()
+        finally:
+            model_router._router = original
+    run.__name__ = test.__name__
+    return run
+
+def record_renders(model, subject, successes, failures, at=None):
+    for _ in range(successes):
+        get_router().record_render(model, subject, True, quality="Medium", at=at)
+    for _ in range(failures):
+        get_router().record_render(model, subject, False, quality="Medium", at=at)
+
+@with_fresh_router
+def test_each_tier_starts_on_its_preferred_model():
+    for quality, candidates in TIER_MODELS.items():
+        assert get_router().choose(quality, "Physics") == candidates[0]
+
+@with_fresh_router
+def test_failing_renders_move_the_tier_to_the_fallback_model():
+    assert FLASH != FALLBACK_MODEL
+    record_renders(FLASH, "Physics", successes=0, failures=20)
+    record_renders(FALLBACK_MODEL, "Physics", successes=20, failures=0)
+    assert get_router().choose("Medium", "Physics") == FALLBACK_MODEL
+    # Subjects with too few samples of their own follow the model's overall record
+    assert get_router().choose("Medium", "History") == FALLBACK_MODEL
+    # A subject where the preferred model does well keeps it: the fallback is not clearly faster
+    record_renders(FLASH, "Chemistry", successes=10, failures=0)
+    assert get_router().choose("Medium", "Chemistry") == FLASH
+
+@with_fresh_router
+def test_slow_or_failing_calls_move_the_tier_to_the_fallback_model():
+    for _ in range(30):
+        get_router().record_call(FLASH, "Physics", 200.0, ok=True)
+    assert get_router().choose("Medium", "Physics") == FALLBACK_MODEL
+
+    model_router._router = ModelRouter(adaptive=True)
+    for _ in range(30):
+        get_router().record_call(FLASH, "Physics", 5.0, ok=False)
+    assert get_router().choose("Medium", "Physics") == FALLBACK_MODEL
+
+@with_fresh_router
+def test_outcomes_outside_the_window_are_forgotten():
+    record_renders(FLASH, "Physics", successes=0, failures=20, at=time.time() - WINDOW_SECONDS - 1)
+    assert get_router().expected_seconds(FLASH, "Medium", "Physics")["render_success"] == model_router.PRIOR_RENDER_SUCCESS
+    assert get_router().choose("Medium", "Physics") == FLASH
+
+def test_static_routing_ignores_outcomes():
+    router = ModelRouter(adaptive=False)
+    for _ in range(20):
+        router.record_render(FLASH, "Physics", False, quality="Medium")
+    assert router.choose("Medium", "Physics") == FLASH
+
+if __name__ == "__main__":
+    test_each_tier_starts_on_its_preferred_model()
+    test_failing_renders_move_the_tier_to_the_fallback_model()
+    test_slow_or_failing_calls_move_the_tier_to_the_fallback_model()
+    test_outcomes_outside_the_window_are_forgotten()
+    test_static_routing_ignores_outcomes()
+    print("model_router checks passed.")
@@ -0,0 +1,70 @@
+"""
+Behavior checks for the durable render queue (uses a throwaway database)
+"""
+import os
+import time
+import tempfile
+
+from render_queue import RenderQueue, LEASE_LOST
+from jobs import QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+
+def make_queue(directory, max_attempts=3):
+    return RenderQueue(os.path.join(directory, "queue.db"), max_attempts=max_attempts)
+
+def test_jobs_are_leased_oldest_first_and_completed_by_their_holder():
+    with tempfile.TemporaryDirectory() as directory:
+        queue = make_queue(directory)
+        first = queue.enqueue({"topic": "Gravity"})
+        second = queue.enqueue({"topic": "Osmosis"})
+
+        task = queue.lease("worker-a")
+        assert task == {"id": first, "params": {"topic": "Gravity"}, "attempt": 1}
+        assert queue.lease("worker-b")["id"] == second
+        assert queue.lease("worker-c") is None
+
+        # Only the lease holder may heartbeat or publish the result
+        assert queue.heartbeat(first, "worker-b") == (False, LEASE_LOST, True)
+        assert queue.heartbeat(first, "worker-a", [{"kind": "progress", "message": "Rendering"}]) == (True, "", False)
+        assert queue.complete(first, "worker-b", SUCCEEDED, {"success": True}) == (False, LEASE_LOST)
+        assert queue.complete(first, "worker-a", SUCCEEDED, {"success": True}) == (True, "")
+        assert queue.get(first)["status"] == SUCCEEDED
+        assert "Rendering" in [event["message"] for event in queue.events_since(first, 0)]
+
+def test_expired_leases_are_requeued_until_attempts_run_out():
+    with tempfile.TemporaryDirectory() as directory:
+        queue = make_queue(directory, max_attempts=2)
+        task_id = queue.enqueue({"topic": "Gravity"})
+
+        assert queue.lease("worker-a", lease_seconds=0.01)["attempt"] == 1
+        time.sleep(0.05)
+        # The silent worker's lease expired, so the job goes to the next worker
+        task = queue.lease("worker-b", lease_seconds=0.01)
+        assert task["id"] == task_id and task["attempt"] == 2
+        assert queue.heartbeat(task_id, "worker-a") == (False, LEASE_LOST, True)
+
+        time.sleep(0.05)
+        assert queue.lease("worker-c") is None
+        task = queue.get(task_id)
+        assert task["status"] == FAILED
+        assert task["result"]["success"] is False
+
+def test_cancel_ends_queued_jobs_and_signals_running_ones():
+    with tempfile.TemporaryDirectory() as directory:
+        queue = make_queue(directory)
+        queued = queue.enqueue({"topic": "Gravity"})
+        running = queue.enqueue({"topic": "Osmosis"})
+        assert queue.cancel(queued) == (True, "")
+        assert queue.get(queued)["status"] == CANCELLED
+
+        assert queue.lease("worker-a")["id"] == running
+        assert queue.cancel(running) == (True, "")
+        assert queue.get(running)["status"] == RUNNING
+        # The worker learns about it at its next heartbeat
+        assert queue.heartbeat(running, "worker-a") == (True, "", True)
+        assert queue.stats()[QUEUED] == 0
+
+if __name__ == "__main__":
+    test_jobs_are_leased_oldest_first_and_completed_by_their_holder()
+    test_expired_leases_are_requeued_until_attempts_run_out()
+    test_cancel_ends_queued_jobs_and_signals_running_ones()
+    print("render_queue checks passed.")
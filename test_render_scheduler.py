@@ -0,0 +1,123 @@
+"""
+Behavior checks for render priority slots shared between processes (uses a throwaway table)
+"""
+import os
+import time
+import tempfile
+import threading
+
+import render_scheduler
+from render_scheduler import RenderScheduler, PREVIEW, FINAL, FEEDBACK, BULK
+
+def with_slots_table(test):
+    def run():
+        with tempfile.TemporaryDirectory() as directory:
+            test(os.path.join(directory, "render_slots.db"))
+    run.__name__ = test.__name__
+    return run
+
+def acquire_in_thread(scheduler, priority, granted):
+    """Ask for a slot without blocking the test; the ticket lands in granted[priority]."""
+    def run():
+        ticket = scheduler.acquire(priority)
+        granted.setdefault(priority, []).append(ticket)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+@with_slots_table
+def test_bulk_work_in_another_process_leaves_the_reserved_slot(path):
+    # Two schedulers on one table stand in for the batch runner and the app
+    batch = RenderScheduler(path, slots=2, reserved=1, preempt=False)
+    app = RenderScheduler(path, slots=2, reserved=1, preempt=False)
+    granted = {}
+    first_bulk = batch.acquire(BULK)
+    second_bulk = acquire_in_thread(batch, BULK, granted)
+    wait_for(lambda: batch.stats()["classes"][BULK]["waiting"] == 1)
+
+    # The second bulk render may not take the reserved slot; the app's preview does
+    preview = app.acquire(PREVIEW)
+    stats = app.stats()["classes"]
+    assert stats[BULK] == {**stats[BULK], "running": 1, "waiting": 1}
+    assert stats[PREVIEW]["running"] == 1
+
+    # Bulk work only takes unreserved capacity: it starts once both are done
+    batch.release(first_bulk)
+    time.sleep(render_scheduler.POLL_SECONDS * 2)
+    assert BULK not in granted
+    app.release(preview)
+    second_bulk.join(5)
+    assert granted[BULK][0] is not None
+    batch.release(granted[BULK][0])
+    assert all(counts["running"] == 0 for counts in app.stats()["classes"].values())
+
+@with_slots_table
+def test_interactive_waiters_pause_bulk_renders_of_other_processes(path):
+    batch = RenderScheduler(path, slots=2, reserved=1)
+    app = RenderScheduler(path, slots=2, reserved=1)
+    granted = {}
+    bulk = batch.acquire(BULK)
+    final = app.acquire(FINAL)
+    waiting_preview = acquire_in_thread(app, PREVIEW, granted)
+
+    # Every slot is busy and a preview waits, so the batch process's render is paused
+    waiting_preview.join(5)
+    assert granted[PREVIEW][0] is not None
+    wait_for(bulk.pause_event.is_set)
+    assert app.stats()["classes"][BULK]["paused"] == 1
+
+    # It resumes once the interactive renders leave it unreserved capacity again
+    app.release(granted[PREVIEW][0])
+    app.release(final)
+    wait_for(lambda: not bulk.pause_event.is_set())
+    assert app.stats()["classes"][BULK]["running"] == 1
+    batch.release(bulk)
+
+@with_slots_table
+def test_waiting_bulk_work_ages_ahead_of_newer_interactive_work(path):
+    scheduler = RenderScheduler(path, slots=1, reserved=0, preempt=False, aging_seconds=0.5)
+    granted = {}
+    running = scheduler.acquire(FINAL)
+    bulk = acquire_in_thread(scheduler, BULK, granted)
+    # After 1.5 s the bulk waiter ranks 3 - 3 = 0, ahead of a fresh feedback render (2)
+    time.sleep(1.5)
+    feedback = acquire_in_thread(scheduler, FEEDBACK, granted)
+    wait_for(lambda: scheduler.stats()["classes"][FEEDBACK]["waiting"] == 1)
+
+    scheduler.release(running)
+    bulk.join(5)
+    assert granted[BULK][0] is not None
+    assert FEEDBACK not in granted
+    scheduler.release(granted[BULK][0])
+    feedback.join(5)
+    scheduler.release(granted[FEEDBACK][0])
+
+@with_slots_table
+def test_rows_of_a_crashed_process_are_dropped(path):
+    crashed = RenderScheduler(path, slots=1, reserved=0)
+    crashed.acquire(FINAL)
+    # The process is gone: nobody heartbeats its row any more
+    crashed.tickets.clear()
+    original = render_scheduler.STALE_SECONDS
+    render_scheduler.STALE_SECONDS = 0.5
+    try:
+        time.sleep(1)
+        cancel_event = threading.Event()
+        threading.Timer(5, cancel_event.set).start()
+        ticket = RenderScheduler(path, slots=1, reserved=0).acquire(PREVIEW, cancel_event=cancel_event)
+        assert ticket is not None
+    finally:
+        render_scheduler.STALE_SECONDS = original
+
+if __name__ == "__main__":
+    test_bulk_work_in_another_process_leaves_the_reserved_slot()
+    test_interactive_waiters_pause_bulk_renders_of_other_processes()
+    test_waiting_bulk_work_ages_ahead_of_newer_interactive_work()
+    test_rows_of_a_crashed_process_are_dropped()
+    print("render_scheduler checks passed.")
@@ -34,7 +34,7 @@ def test_retry_logic():
         output_filename = "test_retry.mp4"
         
         # Try to render
-        render_success, render_error, rendered_path = Studio.render_video(current_code, output_filename, quality=quality)
+        render_success, render_error, rendered_path, _ = Studio.render_video(current_code, output_filename, quality=quality)
         
         if render_success:
             print("Render SUCCESS!")
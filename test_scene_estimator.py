@@ -0,0 +1,60 @@
+"""
+Behavior checks for the static scene cost estimator (no Manim needed)
+"""
+import scene_estimator
+
+SCENE = '''
+from manim import *
+
+class SceneTopic(VoiceoverScene):
+    def construct(self):
+        values = [4, 2, 5]
+        with self.voiceover(text="one two three four five six seven eight nine ten eleven twelve thirteen"):
+            title = Text("Sorting")
+            self.play(Write(title), run_time=2)
+        for value in values:
+            square = Square()
+            self.play(Create(square), FadeIn(Dot()))
+        self.wait(3)
+'''
+
+def test_analyze_counts_loops_and_narration():
+    features = scene_estimator.analyze(SCENE)
+    # 13 words of narration at 2.6 words/s outlast the 2s play; 3 loop plays; 3s wait
+    assert features["narration_seconds"] == 5.0
+    assert features["duration"] == 5.0 + 3 * 1.0 + 3.0
+    assert features["play_calls"] == 1 + 3
+    assert features["animations"] == 1 + 3 * 2
+    assert features["texts"] == 1
+    assert features["mobjects"] == 1 + 3 * 2
+    assert features["voiceover_blocks"] == 1
+    assert features["unbounded_loops"] == 0
+    assert features["max_loop_iterations"] == 3
+
+def test_analyze_budgets_unknown_loops():
+    code = SCENE.replace("for value in values:", "for value in get_values():")
+    features = scene_estimator.analyze(code)
+    assert features["unbounded_loops"] == 1
+    assert features["max_loop_iterations"] == scene_estimator.UNKNOWN_LOOP_ITERATIONS
+
+def test_analyze_rejects_code_without_scene():
+    assert scene_estimator.analyze("def construct(:") is None
+    assert scene_estimator.analyze("class Other(Scene):\n    def construct(self):\n        pass\n") is None
+
+def test_check_budget_flags_long_scenes_and_updaters():
+    features = scene_estimator.analyze(SCENE)
+    features["eta"] = 1.0
+    assert scene_estimator.check_budget(features, "Low") == []
+
+    features["duration"] = scene_estimator.MAX_VIDEO_SECONDS + 1
+    features["updaters"] = scene_estimator.MAX_UPDATERS + 1
+    problems = scene_estimator.check_budget(features, "Low")
+    assert len(problems) == 2
+    assert "seconds" in problems[0] and "updaters" in problems[1]
+
+if __name__ == "__main__":
+    test_analyze_counts_loops_and_narration()
+    test_analyze_budgets_unknown_loops()
+    test_analyze_rejects_code_without_scene()
+    test_check_budget_flags_long_scenes_and_updaters()
+    print("scene_estimator checks passed.")
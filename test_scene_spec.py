@@ -0,0 +1,75 @@
+"""
+Behavior checks for scene spec validation and compilation (no Manim needed)
+"""
+import ast
+
+import scene_spec
+import scene_estimator
+from narration import narration_texts
+
+SPEC = {
+    "title": "Bubble Sort",
+    "beats": [
+        {"narration": "We start with an unsorted array.",
+         "show": [{"type": "array", "id": "values", "values": [4, 2, 5]}]},
+        {"narration": "Four and two are out of order, so we swap them.",
+         "steps": [{"action": "highlight", "target": "values", "indices": [0, 1]},
+                   {"action": "swap", "target": "values", "i": 0, "j": 1}]},
+        {"narration": "Now the first pair is sorted.",
+         "show": [{"type": "text", "id": "note", "text": "2 < 4"}],
+         "steps": [{"action": "change_text", "target": "note", "text": "sorted"},
+                   {"action": "wait", "seconds": 1}]},
+    ],
+}
+
+def test_valid_spec_compiles_to_a_voiceover_scene():
+    success, errors, code = scene_spec.build_scene(SPEC, sox_effects=["pitch", "100"])
+    assert success and errors == []
+    ast.parse(code)
+    assert "class SceneTopic(VoiceoverScene):" in code
+    # The spec and voice travel with the code, so feedback versions can edit them
+    assert scene_spec.extract_spec(code) == SPEC
+    assert scene_spec.extract_sox_effects(code) == ["pitch", "100"]
+    assert narration_texts(code) == [beat["narration"] for beat in SPEC["beats"]]
+    features = scene_estimator.analyze(code)
+    assert features["voiceover_blocks"] == 3
+    assert features["texts"] >= 2
+
+def test_every_validation_error_is_reported():
+    spec = {"title": "x", "beats": [
+        {"narration": "a", "show": [
+            {"type": "text", "id": "t", "text": "x"},
+            {"type": "text", "id": "u", "text": "y"},
+            {"type": "shape", "id": "v", "shape": "circle"},
+        ]},
+        {"narration": "b", "show": [{"type": "text", "id": "t", "text": "z"}],
+         "steps": [{"action": "swap", "target": "nope", "i": 0, "j": 9},
+                   {"action": "wait", "seconds": 30}]},
+        {"narration": "c", "steps": [{"action": "fly", "target": "t"}]},
+    ]}
+    success, errors, code = scene_spec.build_scene(spec)
+    assert not success and code is None
+    assert errors == [
+        "beats[0].show: 3 elements would be on screen; at most 2 fit, remove some first",
+        "beats[1].show[0]: id 't' is already used",
+        "beats[1].steps[0].target: 'nope' is not on screen",
+        f"beats[1].steps[1].seconds: must be a number of seconds up to {scene_spec.MAX_WAIT}",
+        "beats[2].steps[0]: unknown action 'fly'; use one of " + ", ".join(scene_spec.ACTIONS),
+    ]
+
+def test_too_few_beats_are_rejected():
+    success, errors, _ = scene_spec.build_scene({"title": "x", "beats": SPEC["beats"][:1]})
+    assert not success
+    assert errors == [f"beats: must be a list of {scene_spec.MIN_BEATS} to {scene_spec.MAX_BEATS} beats"]
+
+def test_parse_spec_reads_fenced_json():
+    assert scene_spec.parse_spec('```json\n{"title": "x"}\n```') == (True, "", {"title": "x"})
+    assert scene_spec.parse_spec("I cannot do that.")[0] is False
+    assert scene_spec.extract_spec("from manim import *\n") is None
+
+if __name__ == "__main__":
+    test_valid_spec_compiles_to_a_voiceover_scene()
+    test_every_validation_error_is_reported()
+    test_too_few_beats_are_rejected()
+    test_parse_spec_reads_fenced_json()
+    print("scene_spec checks passed.")
@@ -0,0 +1,80 @@
+"""
+Behavior checks for single-flight request coalescing
+"""
+import time
+import threading
+
+from singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def work(emit, cancel_event):
+        runs.append(1)
+        emit("progress", "rendering")
+        started.set()
+        release.wait(5)
+        return "video.mp4"
+
+    results = []
+    events = [[], []]
+
+    def call(index):
+        results.append(flights.run("lesson", work, on_event=lambda kind, message: events[index].append(kind)))
+
+    first = threading.Thread(target=call, args=(0,))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=call, args=(1,))
+    second.start()
+    # Let the second caller attach before the work finishes
+    deadline = time.time() + 5
+    while flights.in_flight().get("lesson") != 2 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(runs) == 1
+    assert sorted(results) == [("video.mp4", False, False), ("video.mp4", True, False)]
+    # The caller that attached late still sees the events from the beginning
+    assert events == [["progress"], ["progress"]]
+    assert flights.in_flight() == {}
+
+def test_last_caller_cancelling_cancels_the_work():
+    flights = SingleFlight()
+    cancel = threading.Event()
+    seen_cancel = threading.Event()
+
+    def work(emit, cancel_event):
+        cancel.set()
+        if cancel_event.wait(5):
+            seen_cancel.set()
+        return None
+
+    result = flights.run("lesson", work, cancel_event=cancel)
+    assert result == (None, False, True)
+    assert seen_cancel.wait(5)
+
+def test_errors_reach_every_caller_and_the_flight_is_forgotten():
+    flights = SingleFlight()
+
+    def work(emit, cancel_event):
+        raise RuntimeError("render crashed")
+
+    try:
+        flights.run("lesson", work)
+    except RuntimeError as e:
+        assert str(e) == "render crashed"
+    else:
+        raise AssertionError("the work's error was swallowed")
+    assert flights.run("lesson", lambda emit, cancel_event: "again") == ("again", False, False)
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_run()
+    test_last_caller_cancelling_cancels_the_work()
+    test_errors_reach_every_caller_and_the_flight_is_forgotten()
+    print("singleflight checks passed.")
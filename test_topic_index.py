@@ -0,0 +1,81 @@
+"""
+Behavior checks for the near-duplicate topic index (uses a throwaway catalog)
+"""
+import os
+import tempfile
+
+import catalog
+import topic_index
+from topic_index import TopicIndex, normalize_tokens, shingles, signature, similarity, REUSE_SIMILARITY
+
+def test_normalize_tokens_folds_variants():
+    assert normalize_tokens("Newton's 3rd Law") == normalize_tokens("newtons third law")
+    assert normalize_tokens("Forces and Motion") == normalize_tokens("force and motion")
+    assert normalize_tokens("What is the Pythagorean Theorem?") == ["pythagorean", "theorem"]
+    assert normalize_tokens("Explain 2 Laws of Motion") == ["two", "laws", "motion"]
+    # Double s is not a plural, and short words and acronyms are not folded
+    assert normalize_tokens("Mass") == ["mass"]
+    assert normalize_tokens("Lens") == ["lens"]
+    assert normalize_tokens("HTTPS") == ["https"]
+    # Logic words carry meaning
+    assert normalize_tokens("NOT gate") == ["not", "gate"]
+
+def test_different_topics_are_not_reused():
+    pairs = [
+        ("OR gate", "AND gate"),
+        ("Binary to decimal", "Decimal to binary"),
+        ("Celsius to Fahrenheit", "Fahrenheit to Celsius"),
+        ("TCP vs UDP", "UDP vs TCP"),
+        ("HTTPS", "HTTP"),
+        ("lens", "len"),
+    ]
+    for first, second in pairs:
+        score = similarity(signature(shingles(first)), signature(shingles(second)))
+        assert score < REUSE_SIMILARITY, (first, second, score)
+
+def test_signature_similarity_tracks_topic_overlap():
+    same = similarity(signature(shingles("Newton's Third Law")), signature(shingles("newtons 3rd law")))
+    close = similarity(signature(shingles("Photosynthesis")), signature(shingles("Photosynthesis in plants")))
+    unrelated = similarity(signature(shingles("Photosynthesis")), signature(shingles("Bubble sort")))
+    assert same == 1.0
+    assert unrelated < close < same
+
+def test_index_matches_catalogued_lessons():
+    original_path = catalog.CATALOG_PATH
+    with tempfile.TemporaryDirectory() as directory:
+        catalog.CATALOG_PATH = os.path.join(directory, "lessons.db")
+        try:
+            catalog.record_lesson(video_url="https://example.com/newton.mp4", topic="Newton's Third Law", subject="Physics", quality="Low", voice_preset="professor", code="pass")
+            catalog.record_lesson(video_url="https://example.com/sort.mp4", topic="Bubble Sort", subject="Computer Science", quality="Low", voice_preset="professor", code="pass")
+            # Feedback versions are not served for plain requests
+            catalog.record_lesson(video_url="https://example.com/newton-v2.mp4", topic="Newton's Third Law", subject="Physics", quality="Low", voice_preset="professor", code="pass", feedback="slower")
+            index = TopicIndex()
+
+            score, match = index.best_match("newtons 3rd law", subject="physics", quality="Low")
+            assert score == 1.0
+            assert match["video_url"] == "https://example.com/newton.mp4"
+
+            # Other tiers and subjects do not match, and new lessons are picked up on lookup
+            assert index.best_match("newtons 3rd law", quality="High") == (0.0, None)
+            assert index.best_match("newtons 3rd law", subject="Chemistry") == (0.0, None)
+            catalog.record_lesson(video_url="https://example.com/newton-high.mp4", topic="Newton's third law", subject="Physics", quality="High", voice_preset="professor", code="pass")
+            assert index.best_match("newtons 3rd law", quality="High")[1]["video_url"] == "https://example.com/newton-high.mp4"
+
+            # Signatures stored by an older shingle version are recomputed and rewritten
+            stale = catalog.record_lesson(video_url="https://example.com/gates.mp4", topic="AND gate", subject="Computer Science", quality="Low", voice_preset="professor", code="pass")
+            catalog.set_topic_signatures({stale: signature(shingles("OR gate"))})
+            index = TopicIndex()
+            assert index.best_match("OR gate", threshold=REUSE_SIMILARITY) == (0.0, None)
+            assert index.best_match("AND gate")[1]["video_url"] == "https://example.com/gates.mp4"
+            assert all(topic_index._stored_signature(row["topic_signature"]) for row in catalog.lessons_after(0) if not row["feedback"])
+        finally:
+            catalog.connect().close()
+            catalog._local.connections.pop(catalog.CATALOG_PATH, None)
+            catalog.CATALOG_PATH = original_path
+
+if __name__ == "__main__":
+    test_normalize_tokens_folds_variants()
+    test_different_topics_are_not_reused()
+    test_signature_similarity_tracks_topic_overlap()
+    test_index_matches_catalogued_lessons()
+    print("topic_index checks passed.")
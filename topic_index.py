@@ -0,0 +1,268 @@
+"""
+Anti Gravity - Near-Duplicate Topic Index
+
+Finds previously generated lessons whose topic is a paraphrase of a new
+request ("Newton's 3rd law" / "Newtons Third Law"), so the lesson can be
+served again instead of running the whole pipeline.
+
+Topics are normalized (case, punctuation, possessives, ordinals, filler
+words) and turned into a shingle set of word tokens, character trigrams and
+ordered word bigrams. Each lesson keeps a MinHash signature of that set, and an LSH
+table over signature bands narrows a lookup to a handful of candidates, so
+lookups stay in the millisecond range however many lessons are indexed.
+
+Lessons come from the lesson catalog (catalog.py); each lookup first picks
+up rows added since the last one, so lessons finished by other processes are
+found too. Signatures are stored back in the catalog so loading the index
+does not recompute them, and scene code is only read for the lesson that is
+served.
+
+Usage:
+    python topic_index.py lookup "third law of motion" --subject Physics
+    python topic_index.py stats
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import sqlite3
+import argparse
+import threading
+
+import catalog
+
+# Similarity at which a lesson is served without generating a new one
+REUSE_SIMILARITY = float(os.getenv("TOPIC_REUSE_SIMILARITY", "0.85"))
+# Similarity at which an existing lesson is only pointed out
+SUGGEST_SIMILARITY = float(os.getenv("TOPIC_SUGGEST_SIMILARITY", "0.5"))
+
+# 32 bands of 2 rows: pairs above ~0.4 similarity almost always share a band
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures are persisted and must stay comparable across runs
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+# Bump when normalization or shingling changes; stored signatures of an older
+# version are recomputed when the index loads
+SHINGLE_VERSION = 2
+
+# "and", "or", "not" stay: they tell "OR gate" from "AND gate"
+STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "with", "by", "about",
+    "what", "is", "are", "how", "why", "does", "do", "explain", "explained", "explaining",
+    "introduction", "intro", "basics", "lesson", "understanding", "overview",
+}
+
+ORDINALS = {
+    "1st": "first", "2nd": "second", "3rd": "third", "4th": "fourth", "5th": "fifth",
+    "6th": "sixth", "7th": "seventh", "8th": "eighth", "9th": "ninth", "10th": "tenth",
+    "i": "first", "ii": "second", "iii": "third",
+}
+
+NUMBERS = {
+    "1": "one", "2": "two", "3": "three", "4": "four", "5": "five",
+    "6": "six", "7": "seven", "8": "eight", "9": "nine", "10": "ten",
+}
+
+def normalize_tokens(text):
+    """Content words of a topic, with spelling variants folded together."""
+    text = re.sub(r"'s\b", "", str(text).replace("’", "'"), flags=re.IGNORECASE)
+    tokens = []
+    for word in re.findall(r"[A-Za-z0-9]+", text):
+        token = word.casefold()
+        token = ORDINALS.get(token, NUMBERS.get(token, token))
+        if token in STOPWORDS:
+            continue
+        # Crude plural/possessive folding: "newtons" -> "newton", "forces" -> "force".
+        # Short words ("lens", "gas") and acronyms ("HTTPS") are left alone.
+        if (len(token) > 4 and token.isalpha() and not word.isupper()
+                and token.endswith("s") and not token.endswith(("ss", "us", "is"))):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def shingles(text):
+    """
+    Word tokens, character trigrams (which absorb small spelling differences)
+    and ordered word bigrams, so "Celsius to Fahrenheit" and "Fahrenheit to
+    Celsius" are told apart.
+    """
+    tokens = normalize_tokens(text)
+    result = set(tokens)
+    for token in tokens:
+        padded = f" {token} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    # Word order counts twice as much as a single word: one pair per position,
+    # including the first and last word, each in two copies
+    ordered = ["^"] + tokens + ["$"]
+    for first, second in zip(ordered, ordered[1:]):
+        result.update(f"{first}>{second}#{copy}" for copy in range(2))
+    return result
+
+def signature(shingle_set):
+    """MinHash signature of a shingle set."""
+    if not shingle_set:
+        return [_MAX_HASH] * NUM_PERM
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingle_set]
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERM
+
+def _stored_signature(stored):
+    """Signature saved in the catalog, or None when missing or from an older SHINGLE_VERSION."""
+    if not stored:
+        return None
+    stored = json.loads(stored)
+    # Version 1 stored the bare list
+    if not isinstance(stored, dict) or stored.get("version") != SHINGLE_VERSION:
+        return None
+    sig = stored.get("minhash")
+    return sig if isinstance(sig, list) and len(sig) == NUM_PERM else None
+
+def _band_keys(sig):
+    return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+class TopicIndex:
+    """In-memory MinHash LSH index over the new lessons in the lesson catalog."""
+
+    def __init__(self):
+        self.entries = []
+        self.buckets = {}
+        self.last_id = 0
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Index lessons added to the catalog since the last refresh (by this or another process)."""
+        with self.lock:
+            try:
+                rows = catalog.lessons_after(self.last_id)
+            except sqlite3.Error as e:
+                print(f"Could not read lesson catalog: {e}")
+                return
+            computed = {}
+            for row in rows:
+                self.last_id = row["id"]
+                # Feedback versions differ from what their topic asks for
+                if row["feedback"]:
+                    continue
+                sig = _stored_signature(row["topic_signature"])
+                if sig is None:
+                    sig = signature(shingles(row["topic"]))
+                    computed[row["id"]] = {"version": SHINGLE_VERSION, "minhash": sig}
+                entry = {key: row[key] for key in ("id", "topic", "subject", "quality", "voice_preset", "video_url", "lineage_id", "created_at")}
+                entry["signature"] = sig
+                self._insert(entry)
+        if computed:
+            # Stored so the next process loading the index skips the hashing
+            try:
+                catalog.set_topic_signatures(computed)
+            except sqlite3.Error as e:
+                print(f"Could not store topic signatures: {e}")
+
+    def _insert(self, entry):
+        position = len(self.entries)
+        self.entries.append(entry)
+        for key in _band_keys(entry["signature"]):
+            self.buckets.setdefault(key, []).append(position)
+
+    def load_code(self, entry):
+        """Scene code of an indexed lesson."""
+        lesson = catalog.get_lesson(entry["id"])
+        return lesson["code"] if lesson else None
+
+    def lookup(self, topic, subject=None, quality=None, voice_preset=None, limit=5):
+        """
+        Find indexed lessons similar to a topic.
+
+        Args:
+            topic: Requested topic
+            subject, quality, voice_preset: When given, only lessons with the
+                same value match (subject is compared case-insensitively)
+
+        Returns:
+            list: (similarity, entry) pairs, best first
+        """
+        query = signature(shingles(topic))
+        self.refresh()
+        with self.lock:
+            candidates = set()
+            for key in _band_keys(query):
+                candidates.update(self.buckets.get(key, ()))
+            entries = [self.entries[position] for position in candidates]
+
+        matches = {}
+        for entry in entries:
+            if subject and entry["subject"].casefold() != str(subject).casefold():
+                continue
+            if quality and entry["quality"] != quality:
+                continue
+            if voice_preset and entry["voice_preset"] != voice_preset:
+                continue
+            score = similarity(query, entry["signature"])
+            # The same topic may have been generated more than once; keep the newest
+            previous = matches.get(entry["video_url"])
+            if previous is None or entry["created_at"] > previous[1]["created_at"]:
+                matches[entry["video_url"]] = (score, entry)
+        ranked = sorted(matches.values(), key=lambda match: (match[0], match[1]["created_at"]), reverse=True)
+        return ranked[:limit]
+
+    def best_match(self, topic, subject=None, quality=None, voice_preset=None, threshold=SUGGEST_SIMILARITY):
+        """Best lesson at or above threshold, as (similarity, entry), or (0.0, None)."""
+        for score, entry in self.lookup(topic, subject, quality, voice_preset, limit=1):
+            if score >= threshold:
+                return score, entry
+        return 0.0, None
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Process-wide index, loaded on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TopicIndex()
+        return _index
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate lesson topic index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    lookup_parser = subparsers.add_parser("lookup", help="Find lessons similar to a topic")
+    lookup_parser.add_argument("topic")
+    lookup_parser.add_argument("--subject")
+    lookup_parser.add_argument("--quality")
+    lookup_parser.add_argument("--limit", type=int, default=5)
+    subparsers.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = get_index()
+    print(f"Loaded {len(index.entries)} lessons in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    if args.command == "lookup":
+        started = time.perf_counter()
+        matches = index.lookup(args.topic, args.subject, args.quality, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for score, entry in matches:
+            print(f"{score:.2f}  {entry['topic']} ({entry['subject']}, {entry['quality']})  {entry['video_url']}")
+        if not matches:
+            print("No similar lessons.")
+        print(f"Lookup took {elapsed:.2f} ms")
+    else:
+        print(f"{len(index.buckets)} LSH buckets, {NUM_PERM} permutations in {BANDS} bands")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
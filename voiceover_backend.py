@@ -3,18 +3,27 @@ Anti Gravity - Voiceover Backend
 
 This module extends the Artist class to generate VoiceoverScene code
 with integrated voice narration using manim-voiceover and SoX.
+
+New lessons and feedback versions are first asked for as a compact scene
+spec (scene_spec.py), which is validated and compiled into the scene; the
+model writes free-form Manim code only when it declares the topic outside
+what a spec can express, or its spec is still invalid after one repair
+round. Set SCENE_SPEC=0 to always ask for free-form code. Render failures
+are fixed on the compiled code like any other scene.
 """
 
 import os
 import subprocess
 import shutil
-import google.generativeai as genai
 from dotenv import load_dotenv
 import time
-from google.api_core import exceptions
+import json
+
+import llm
+import scene_spec
+from model_router import get_router, FALLBACK_MODEL
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
 # ===== Voice Configuration Presets =====
 
@@ -41,14 +50,51 @@ VOICE_PRESETS = {
     }
 }
 
-def get_model(quality):
-    """Get AI model based on quality setting."""
-    if quality == "High":
-        return genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
-    elif quality == "Medium":
-        return genai.GenerativeModel('gemini-2.0-flash')
-    else:
-        return genai.GenerativeModel('gemini-2.0-flash-lite')
+# Bump when the scene generation prompts change, so catalogued lessons can be
+# told apart by the prompt that produced them
+PROMPT_VERSION = "3"
+
+SCENE_SPEC = os.getenv("SCENE_SPEC", "1") != "0"
+
+SPEC_EXAMPLE = {
+    "title": "Pythagorean Theorem",
+    "beats": [
+        {"narration": "The Pythagorean theorem relates the three sides of every right triangle.",
+         "show": [{"type": "triangle", "id": "tri", "right_angle": True, "sides": {"a": "a", "b": "b", "c": "c"}}]},
+        {"narration": "The longest side, opposite the right angle, is called the hypotenuse.",
+         "steps": [{"action": "highlight", "target": "tri", "sides": ["c"], "color": "yellow"}]},
+        {"narration": "The square of the hypotenuse equals the sum of the squares of the other two sides.",
+         "show": [{"type": "text", "id": "rule", "text": "a² + b² = c²"}],
+         "steps": [{"action": "indicate", "target": "rule"}]},
+        {"narration": "With sides three and four, the hypotenuse is five.",
+         "steps": [{"action": "change_text", "target": "rule", "text": "3² + 4² = 5²"}]},
+    ],
+}
+
+def choose_model(quality, subject=None):
+    """Name of the Gemini model to use for a tier, see model_router."""
+    return get_router().choose(quality, subject)
+
+def generate_code(model_name, prompt, subject=None):
+    """
+    Run a code generation prompt, switching to the fallback model when the
+    quota is exhausted.
+
+    Returns:
+        str: The code without markdown fences, or a "# Error: ..." line
+    """
+    for attempt in range(3):
+        try:
+            text = llm.generate(model_name, prompt, subject=subject)
+            return text.replace("```python", "").replace("```", "").strip()
+        except llm.ResourceExhausted:
+            print(f"Quota exceeded on attempt {attempt + 1}. Switching to fallback...")
+            llm.QUOTA_FALLBACKS.inc(model=model_name)
+            model_name = FALLBACK_MODEL
+            time.sleep(2)
+        except Exception as e:
+            return f"# Error: {e}"
+    return "# Error: Failed to generate code after retries"
 
 def check_sox_available():
     """Check if SoX is available in system PATH."""
@@ -63,7 +109,8 @@ class VoiceoverArtist:
         subject, 
         quality="Medium",
         voice_preset="teaching_assistant",
-        use_sox=True
+        use_sox=True,
+        model_name=None
     ):
         """
         Generate a VoiceoverScene with narration instead of text captions.
@@ -74,6 +121,7 @@ class VoiceoverArtist:
             quality: AI model quality (Low/Medium/High)
             voice_preset: Voice character preset (see VOICE_PRESETS)
             use_sox: Whether to use SoX effects (auto-detected if True)
+            model_name: Gemini model to use (default: routed for the tier)
         
         Returns:
             str: Python code for VoiceoverScene
@@ -82,7 +130,15 @@ class VoiceoverArtist:
         sox_available = check_sox_available() if use_sox else False
         sox_effects = VOICE_PRESETS.get(voice_preset, VOICE_PRESETS["neutral"])["sox_effects"]
         
-        model = get_model(quality)
+        model_name = model_name or choose_model(quality, subject)
+
+        if SCENE_SPEC:
+            code = VoiceoverArtist.generate_spec_scene(
+                topic, subject, model_name, sox_effects if sox_available else None
+            )
+            if code:
+                return code
+            print("Falling back to free-form scene code.")
         
         # Build SoX effects string for the prompt
         if sox_available and sox_effects:
@@ -261,26 +317,129 @@ class VoiceoverArtist:
         Output ONLY the Python code. No markdown, no explanations.
         """
         
-        for attempt in range(3):
-            try:
-                response = model.generate_content(prompt)
-                code = response.text.replace("```python", "").replace("```", "").strip()
-                return code
-            except exceptions.ResourceExhausted:
-                print(f"Quota exceeded on attempt {attempt + 1}. Switching to fallback...")
-                model = genai.GenerativeModel('gemini-2.0-flash-lite')
-                time.sleep(2)
-            except Exception as e:
-                return f"# Error: {e}"
-        
-        return "# Error: Failed to generate code after retries"
+        return generate_code(model_name, prompt, subject=subject)
+
+    @staticmethod
+    def generate_spec_scene(topic, subject, model_name, sox_effects=None):
+        """
+        Ask for a scene spec and compile it (see scene_spec.py).
+
+        Returns:
+            str: The compiled scene code, or None when the model declared the
+            topic unsupported or no valid spec came back
+        """
+        prompt = f"""
+        CONTEXT: Plan a narrated educational animation as a JSON scene spec. A fixed engine turns the spec into the video, so you only decide what is said and shown.
+
+        TOPIC TO EXPLAIN: "{topic}"
+        SUBJECT AREA: {subject}
+
+        SPEC FORMAT:
+        {scene_spec.SPEC_FORMAT}
+
+        EXAMPLE:
+        {json.dumps(SPEC_EXAMPLE, ensure_ascii=False)}
+
+        INSTRUCTIONS:
+        1. Structure: introduction, core concept, a worked example, short conclusion.
+        2. 60-90 seconds of narration in total (about 160-230 words), in natural spoken sentences.
+        3. Let the visuals carry the explanation: arrays for algorithms, triangles for geometry, text elements for formulas and key results, shapes for concrete objects.
+        4. Every step must follow from the narration of its beat.
+        5. If the topic cannot be explained well with these elements (for example it needs plots, motion, 3D or detailed diagrams), output exactly {{"unsupported": "<one sentence why>"}}.
+        6. Output ONLY the JSON object. No markdown, no explanations.
+        """
+        return VoiceoverArtist._compile_spec_response(
+            generate_code(model_name, prompt, subject=subject), topic, subject, model_name, sox_effects
+        )
 
     @staticmethod
-    def regenerate_video_code(original_code, feedback, topic, subject, quality="Medium"):
+    def revise_spec_scene(spec, feedback, topic, subject, model_name, sox_effects=None):
+        """
+        Apply feedback to a compiled scene's spec and compile the result.
+
+        Returns:
+            str: The compiled scene code, or None if no valid spec came back
+        """
+        prompt = f"""
+        CONTEXT: You are improving the JSON scene spec of a narrated educational animation based on USER FEEDBACK.
+
+        TOPIC: "{topic}"
+        SUBJECT: "{subject}"
+
+        SPEC FORMAT:
+        {scene_spec.SPEC_FORMAT}
+
+        THE CURRENT SPEC:
+        {json.dumps(spec, ensure_ascii=False)}
+
+        USER FEEDBACK (the user disliked the previous video because):
+        "{feedback}"
+
+        INSTRUCTIONS:
+        1. Change the spec to ADDRESS the feedback specifically.
+        2. **MINIMAL EDIT**: Change only the beats the feedback is about; copy every other beat EXACTLY as it is, so unchanged parts are not rendered again.
+        3. If the feedback cannot be addressed within the spec format, output exactly {{"unsupported": "<one sentence why>"}}.
+        4. Output ONLY the JSON object. No markdown.
+        """
+        return VoiceoverArtist._compile_spec_response(
+            generate_code(model_name, prompt, subject=subject), topic, subject, model_name, sox_effects
+        )
+
+    @staticmethod
+    def _compile_spec_response(text, topic, subject, model_name, sox_effects):
+        """Compile a spec response, giving the model one round to repair validation errors."""
+        for attempt in range(2):
+            if text.startswith("# Error"):
+                print(f"Scene spec generation failed: {text}")
+                return None
+            success, error, spec = scene_spec.parse_spec(text)
+            if success and "unsupported" in spec:
+                print(f"Topic is outside the scene spec format: {spec['unsupported']}")
+                return None
+            errors = [error]
+            if success:
+                success, errors, code = scene_spec.build_scene(spec, sox_effects)
+                if success:
+                    return code
+            if attempt == 1:
+                break
+            print(f"Scene spec is invalid ({len(errors)} errors), asking for a repair...")
+            prompt = f"""
+        CONTEXT: You wrote a JSON scene spec for an educational animation about "{topic}", but it does not validate.
+
+        SPEC FORMAT:
+        {scene_spec.SPEC_FORMAT}
+
+        YOUR SPEC:
+        {text}
+
+        VALIDATION ERRORS:
+        {chr(10).join(errors)}
+
+        Fix every error and output ONLY the corrected JSON object. No markdown.
+        """
+            text = generate_code(model_name, prompt, subject=subject)
+        print(f"Scene spec still invalid: {'; '.join(errors[:5])}")
+        return None
+
+    @staticmethod
+    def regenerate_video_code(original_code, feedback, topic, subject, quality="Medium", model_name=None):
         """
         Regenerate the video code based on user feedback.
+
+        Scenes compiled from a spec are revised through their spec, falling
+        back to editing the code.
         """
-        model = get_model(quality)
+        model_name = model_name or choose_model(quality, subject)
+
+        spec = scene_spec.extract_spec(original_code)
+        if SCENE_SPEC and spec is not None:
+            code = VoiceoverArtist.revise_spec_scene(
+                spec, feedback, topic, subject, model_name, scene_spec.extract_sox_effects(original_code)
+            )
+            if code:
+                return code
+            print("Falling back to editing the scene code.")
         
         prompt = f"""
         CONTEXT: You are fixing/improving a Python script for Manim (VoiceoverScene) based on USER FEEDBACK.
@@ -303,29 +462,18 @@ class VoiceoverArtist:
         4. Keep the same visual style (Kurzgesagt/Vox, dark background, flat vector).
         5. Ensure all imports and setup (Voiceover, SoX) remain correct.
         6. **CRITICAL**: Do NOT use `SVGMobject` or `ImageMobject`. Use ONLY built-in shapes.
-        7. Output ONLY the fixed Python code. No markdown.
+        7. **MINIMAL EDIT**: Change only the `with self.voiceover(...)` blocks the feedback is about. Copy every other line, including the imports, setup and all other voiceover blocks, EXACTLY as it is (same text, names and order), so unchanged parts are not rendered again.
+        8. Output ONLY the fixed Python code. No markdown.
         """
         
-        for attempt in range(3):
-            try:
-                response = model.generate_content(prompt)
-                code = response.text.replace("```python", "").replace("```", "").strip()
-                return code
-            except exceptions.ResourceExhausted:
-                print(f"Quota exceeded on attempt {attempt + 1}. Switching to fallback...")
-                model = genai.GenerativeModel('gemini-2.0-flash-lite')
-                time.sleep(2)
-            except Exception as e:
-                return f"# Error: {e}"
-        
-        return "# Error: Failed to regenerate code after retries"
+        return generate_code(model_name, prompt, subject=subject)
 
     @staticmethod
-    def fix_code(original_code, error_message, topic, quality="Medium"):
+    def fix_code(original_code, error_message, topic, quality="Medium", model_name=None, subject=None):
         """
         Attempt to fix the generated code based on the Manim error message.
         """
-        model = get_model(quality)
+        model_name = model_name or choose_model(quality, subject)
         
         prompt = f"""
         CONTEXT: You are fixing a Python script for Manim (VoiceoverScene).
@@ -349,9 +497,8 @@ class VoiceoverArtist:
         """
         
         try:
-            response = model.generate_content(prompt)
-            code = response.text.replace("```python", "").replace("```", "").strip()
-            return code
+            text = llm.generate(model_name, prompt, subject=subject)
+            return text.replace("```python", "").replace("```", "").strip()
         except Exception as e:
             return f"# Error fixing code: {e}"
     
@@ -0,0 +1,118 @@
+"""
+Anti Gravity - Background Warm-up
+
+The first lesson after a cold start pays for more than its own render: the
+Gemini client import, Python bytecode compilation of manim and its
+dependencies, fontconfig/Pango font cache construction on the first Text,
+loading the topic index and rendering the lesson intro/outro clips
+(clips.py). start_warmup() does that work on a background
+thread once the UI is already being served, so the first user does not wait
+for it.
+
+Set WARMUP=0 to disable it (e.g. when measuring cold renders).
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+
+WARMUP_ENABLED = os.getenv("WARMUP", "1") != "0"
+# Seconds to wait before warming up, so the first page render is not slowed down
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY", "2"))
+
+# Run in a fresh interpreter, like a render: compiles manim's bytecode and
+# builds the font caches that Pango needs for the first Text
+MANIM_PRIMER = (
+    "from manim import Text, MarkupText, tempconfig\n"
+    "import manim_voiceover\n"
+    "with tempconfig({'media_dir': 'media'}):\n"
+    "    Text('Warm up 0123456789')\n"
+    "    MarkupText('<b>Warm</b> up')\n"
+)
+
+_status = {"state": "idle", "steps": {}}
+_started = False
+_lock = threading.Lock()
+
+def _prime_llm():
+    import llm
+    llm.init()
+
+def _prime_manim():
+    scratch = tempfile.mkdtemp(prefix="warmup_")
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", MANIM_PRIMER],
+            cwd=scratch,
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip()[-300:])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def _prime_ffmpeg():
+    subprocess.run(["ffmpeg", "-hide_banner", "-version"], capture_output=True, timeout=30)
+
+def _prime_clips():
+    # Only does work when LESSON_INTRO or LESSON_OUTRO is set
+    from clips import prebuild
+    for (name, quality, _), (success, error, _) in prebuild().items():
+        if not success:
+            raise RuntimeError(f"{name} ({quality}): {error}")
+
+def _prime_topic_index():
+    from topic_index import get_index
+    get_index()
+
+# Cheapest first, so a short-lived process still gets the quick wins
+STEPS = [
+    ("topic_index", _prime_topic_index),
+    ("ffmpeg", _prime_ffmpeg),
+    ("llm", _prime_llm),
+    ("manim", _prime_manim),
+    ("clips", _prime_clips),
+]
+
+def run_warmup():
+    """
+    Run every warm-up step in this thread.
+
+    Returns:
+        dict: per step, {"seconds": float, "error": str}
+    """
+    _status["state"] = "running"
+    for name, step in STEPS:
+        started = time.perf_counter()
+        error = ""
+        try:
+            step()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Warm-up step '{name}' failed: {error}")
+        _status["steps"][name] = {"seconds": round(time.perf_counter() - started, 3), "error": error}
+    _status["state"] = "done"
+    return dict(_status["steps"])
+
+def start_warmup(delay=WARMUP_DELAY):
+    """Start the background warm-up once per process (no-op when WARMUP=0)."""
+    global _started
+    with _lock:
+        if _started or not WARMUP_ENABLED:
+            return
+        _started = True
+
+    def worker():
+        time.sleep(delay)
+        run_warmup()
+
+    threading.Thread(target=worker, name="warmup", daemon=True).start()
+
+def warmup_status():
+    return {"state": _status["state"], "steps": dict(_status["steps"])}